@@ -1,13 +1,35 @@
 import numpy as np
 import tkinter as tk
 import webbrowser
+import time
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from scipy.fft import fft, fftfreq
-from scipy.signal import (butter, cheby1, cheby2, ellip, iirnotch,
-                          firwin, lfilter, filtfilt, tf2zpk, freqz, chirp)
+from scipy.signal import filtfilt, tf2zpk, chirp, sosfiltfilt, sos2zpk
 import customtkinter as ctk
 import complex_filters
+import lattice_filters
+import filter_design
+import pipeline
+import multirate
+import signal_import
+import c_export
+import precision
+import spectrogram
+import live_source
+import compare
+import cost_model
+import plot_export
+import shared_buffers
+import latency
+import attitude
+import polynomial
+import running_stats
+import session
+import stream_writer
+import kalman_models
+import kernels
+import response
 
 # Styling
 ctk.set_appearance_mode("Dark")
@@ -25,6 +47,7 @@ class SignalGenerator:
         self.noise_lvl = 0.05
         self.imported_data = None
         self.raw_matrix = None # For multi-column CSVs
+        self.live_data = None # Newest raw window of the Live source
         self.mode = "Synth" # Synth or Import
         self.waveform = "Sines"
         self.sweep_start = 10.0
@@ -35,6 +58,8 @@ class SignalGenerator:
     def get_signal(self):
         if self.mode == "Import" and self.imported_data is not None:
             return self.imported_data
+        if self.mode == "Live" and self.live_data is not None:
+            return self.live_data
         
         y = np.zeros_like(self.t)
         if self.waveform == "Sines":
@@ -56,6 +81,7 @@ class DSPApp(ctk.CTk):
     def __init__(self):
         super().__init__()
         self.title("Advanced DSP Studio Pro")
+        kernels.warm_up() # compile the C kernels and pick backends off the UI thread
         self.geometry("1600x950")
 
         # State Variables
@@ -70,8 +96,13 @@ class DSPApp(ctk.CTk):
         self.atten = 40.0 
         self.beta = 5.0
         self.notch_q = 30.0
+        self.notch_harmonics = 3
+        self.notch_track = ctk.BooleanVar(value=False)
+        self._tracked_f0 = None
+        self._track_key = None; self._track_due = 0.0
         self.low_bw = ctk.BooleanVar(value=True) # Logic placeholder
         self.min_phase = ctk.BooleanVar(value=False)
+        self.log_freq = ctk.BooleanVar(value=False) # log frequency axis on the response cards
         self.gauss_std = 7.0
         self.pm_width = 50.0 # Transition width for Parks-McClellan
         self.import_triggered = False
@@ -88,22 +119,74 @@ class DSPApp(ctk.CTk):
         self.c_data_type = ctk.StringVar(value="Float32")
         self.c_impl_style = ctk.StringVar(value="Standard C")
         self.c_iir_struct = ctk.StringVar(value="Cascaded Biquads (SOS)")
+        self.mcu_profile = ctk.StringVar(value=cost_model.DEFAULT_PROFILE)
+        self.cpu_budget = ctk.StringVar(value="50")
         
         self.sine_controls = [] # For hiding/showing
         self.sweep_controls = []
         
         # Complex Filter Parameters
         self.kf_q = 1e-4; self.kf_r = 1e-2
+        self.kf_model = "Random Walk"; self.kf_steady = False; self.kf_smooth = False # see kalman_models.py
         self.sg_win = 11; self.sg_poly = 2
         self.med_ker = 3
         self.wt_wave = "db4"; self.wt_lev = 2
         self.lms_mu = 0.01; self.lms_ord = 32
+        self.poly_order = 2; self.poly_seg = 0 # detrend segment in samples, 0 = one global fit
+        self.rs_metric = "RMS"; self.rs_win = 256; self.rs_freqs = [50.0] # running stats window (smp), Goertzel Hz
+        self.env_label = None; self._env = None; self._env_key = None
+        
+        # Multi-stage pipeline (list of stage dicts, see pipeline.py)
+        self.pipeline_stages = []
+        self.use_pipeline = ctk.BooleanVar(value=False)
+        self.pipe_streaming = ctk.BooleanVar(value=False)
+        self._pipeline_plan = None
+        self._pipeline_key = None
+        
+        # A/B comparison: pinned Stage 1 specs evaluated and filtered as one batch
+        self.pinned_specs = []
+        self.ab_overlay = ctk.BooleanVar(value=True)
+        self._ab_bank = None; self._ab_key = None
+        
+        # Multirate stage (L/M polyphase resampling ahead of the filter chain)
+        self.mr_down = 1; self.mr_up = 1
+        self.mr_restore = ctk.BooleanVar(value=False)
+        self._mr_taps = {}
+        
+        # Processing precision (Float32 halves buffer memory and matches the firmware)
+        self.precision = ctk.StringVar(value="Float64")
+        self.proc_mode = ctk.StringVar(value="Zero-Phase") # filtfilt, firmware-causal, or both
+        self._design_gd = 0.0
+        self._design = None # design_results() of the current spec
+        
+        # Spectrogram card: ring of STFT columns (live) or decimated overview (imports)
+        self.spec_nfft = 256; self.spec_cols = 200
+        self.spec_ring = None; self._spec_key = None; self._spec_img = None
+        
+        # Live acquisition (framed samples over UDP / named pipe / stdin, see live_source.py)
+        self.live_transport = ctk.StringVar(value="UDP")
+        self.live_address = ctk.StringVar(value="127.0.0.1:9000")
+        self.live_axes = ctk.StringVar(value="1")
+        self.live = None
+        self._live_key = None
+        self._live_new = None
         
         self.import_format = ctk.StringVar(value="Raw ADC File")
         self.accel_axis = ctk.StringVar(value="AX")
+        self.att_method = ctk.StringVar(value="Complementary") # Accel-Gyro fusion for the Roll / Pitch / Yaw Rate axes
+        self.att_params = dict(attitude.DEFAULTS)
+        self._att_cache = None
+        self.resample_method = ctk.StringVar(value="Linear")
+        self._import_source = None # (timestamps, raw columns) before resampling
         
         self.freq_sliders = []
         self.param_sliders = {}
+        self.slider_widgets = {} # label -> (slider, update command), for session restore
+        
+        # Project session: cached designs / chain outputs keyed by content hash (see session.py)
+        self.results = session.ResultCache()
+        self._raw_hash = (None, None)
+        self.session_path = None
         
         self.setup_ui()
         self.init_menu()
@@ -111,11 +194,15 @@ class DSPApp(ctk.CTk):
         # Optimization: Store last state to avoid redundant calculations/draws
         self._last_filter_params = None
         self.b, self.a = np.array([1.0]), np.array([1.0])
+        self.lattice = None
+        self.sos = None
         
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        shared_buffers.reap_orphans() # segments left behind by a crashed earlier session
         self.update_loop()
 
     def on_closing(self):
+        if self.live is not None: self.live.reader.stop()
         self.quit()
         self.destroy()
 
@@ -125,6 +212,11 @@ class DSPApp(ctk.CTk):
         # File Menu
         file_menu = tk.Menu(self.menubar, tearoff=0)
         file_menu.add_command(label="New Project (Reset)", command=self.manual_refresh)
+        file_menu.add_command(label="Open Session...", command=self.open_session)
+        file_menu.add_command(label="Save Session...", command=self.save_session)
+        file_menu.add_command(label="Save Pipeline Spec...", command=self.save_pipeline_spec)
+        file_menu.add_command(label="Export Report Bundle...", command=self.export_report)
+        file_menu.add_command(label="Export Filtered Output...", command=self.export_output)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.on_closing)
         self.menubar.add_cascade(label="File", menu=file_menu)
@@ -143,8 +235,20 @@ class DSPApp(ctk.CTk):
 
         # Polynomial Menu
         poly_menu = tk.Menu(self.menubar, tearoff=0)
-        poly_menu.add_command(label="Polynomial Analysis (Coming Soon)", state="disabled")
+        poly_menu.add_command(label="Detrend as Complex Layer", command=self.poly_use_complex)
+        poly_menu.add_command(label="Add Detrend Stage to Pipeline", command=self.poly_add_stage)
+        poly_menu.add_separator()
+        poly_menu.add_command(label="Baseline Fit Report...", command=self.poly_report)
         self.menubar.add_cascade(label="Polynomial", menu=poly_menu)
+
+        # Fusion Menu (Accel-Gyro imports: Roll / Pitch / Yaw Rate axes)
+        fusion_menu = tk.Menu(self.menubar, tearoff=0)
+        for m in attitude.METHODS:
+            fusion_menu.add_radiobutton(label=m, variable=self.att_method, value=m, command=self.update_axis_data)
+        fusion_menu.add_separator()
+        fusion_menu.add_command(label="Fusion Gains...", command=self.fusion_gains)
+        fusion_menu.add_command(label="Fusion Report...", command=self.fusion_report)
+        self.menubar.add_cascade(label="Fusion", menu=fusion_menu)
         
         self.configure(menu=self.menubar)
 
@@ -208,7 +312,7 @@ class DSPApp(ctk.CTk):
         self.fs_entry.pack(side="right", padx=5)
 
         # Signal Input Selection
-        self.source_segmented = ctk.CTkSegmentedButton(self.sidebar, values=["Synth", "Import"], 
+        self.source_segmented = ctk.CTkSegmentedButton(self.sidebar, values=["Synth", "Import", "Live"], 
                                                       command=self.toggle_source)
         self.source_segmented.set("Synth")
         self.source_segmented.pack(pady=5, padx=10, fill="x")
@@ -223,6 +327,8 @@ class DSPApp(ctk.CTk):
         
         ctk.CTkCheckBox(self.toggles_frame, text="FIR Minimum Phase", 
                         variable=self.min_phase).pack(pady=2, anchor="w", padx=5)
+        ctk.CTkCheckBox(self.toggles_frame, text="Log Frequency Axis",
+                        variable=self.log_freq, command=self.force_update).pack(pady=2, anchor="w", padx=5)
 
         # Synth Group
         # Synth Group
@@ -264,7 +370,7 @@ class DSPApp(ctk.CTk):
                 return update_cmd
             
             s = ctk.CTkSlider(sc, from_=low, to=high, command=make_update(cmd, vl, unit, label))
-            s.set(start); s.pack(fill="x")
+            s.set(start); s.pack(fill="x"); self.slider_widgets[label] = (s, make_update(cmd, vl, unit, label))
             if "Freq" in label: self.freq_sliders.append(s)
             if "Sine" in label: self.sine_controls.append(sc)
 
@@ -292,7 +398,7 @@ class DSPApp(ctk.CTk):
                 return up
             
             s = ctk.CTkSlider(sc, from_=low, to=high, command=make_sw_update(cmd, vl, unit))
-            s.set(start); s.pack(fill="x")
+            s.set(start); s.pack(fill="x"); self.slider_widgets[label] = (s, make_sw_update(cmd, vl, unit))
             self.sweep_controls.append(sc)
             if "Freq" in label: self.freq_sliders.append(s)
 
@@ -309,21 +415,42 @@ class DSPApp(ctk.CTk):
         self.axis_btns = ctk.CTkSegmentedButton(self.axis_frame, values=["AX", "AY", "AZ", "GX", "GY", "GZ"],
                                                variable=self.accel_axis, command=self.update_axis_data)
         self.axis_btns.pack(pady=5)
+        ctk.CTkSegmentedButton(self.axis_frame, values=list(attitude.OUTPUTS), variable=self.accel_axis,
+                               command=self.update_axis_data).pack(pady=2)
+        ctk.CTkLabel(self.axis_frame, text="Timestamp Resampling", font=ctk.CTkFont(size=11)).pack(pady=2)
+        ctk.CTkOptionMenu(self.axis_frame, values=signal_import.RESAMPLE_METHODS, variable=self.resample_method,
+                          command=lambda v: self.apply_import_timing()).pack(pady=2, padx=10)
         
         self.import_btn = ctk.CTkButton(self.import_group, text="Load Data (CSV/TXT)", command=self.load_file)
         self.import_btn.pack(pady=5, padx=10)
         self.file_label = ctk.CTkLabel(self.import_group, text="Pending Import...", font=ctk.CTkFont(size=10))
         self.file_label.pack()
+        self.import_info = ctk.CTkTextbox(self.import_group, height=90, font=ctk.CTkFont(size=10), fg_color="#1a1a1a")
         self.import_run_btn = ctk.CTkButton(self.import_group, text="▶ Run Analysis", fg_color="#ff7b00", 
                                             command=self.trigger_import_run)
 
+        # Live Acquisition Group
+        self.live_group = ctk.CTkFrame(self.sidebar)
+        ctk.CTkLabel(self.live_group, text="Live Acquisition", font=ctk.CTkFont(weight="bold")).pack(pady=5)
+        ctk.CTkOptionMenu(self.live_group, values=live_source.TRANSPORTS, variable=self.live_transport).pack(pady=2, padx=10)
+        ctk.CTkLabel(self.live_group, text="Address (host:port or pipe path)", font=ctk.CTkFont(size=11)).pack(pady=2)
+        ctk.CTkEntry(self.live_group, textvariable=self.live_address).pack(pady=2, padx=10, fill="x")
+        ctk.CTkSegmentedButton(self.live_group, values=["1", "6"], variable=self.live_axes).pack(pady=2)
+        ctk.CTkSegmentedButton(self.live_group, values=["AX", "AY", "AZ", "GX", "GY", "GZ"],
+                               variable=self.accel_axis).pack(pady=2)
+        self.live_btn = ctk.CTkButton(self.live_group, text="Connect", fg_color="#28a745", command=self.toggle_live)
+        self.live_btn.pack(pady=5, padx=10)
+        self.live_label = ctk.CTkLabel(self.live_group, text="Disconnected", font=ctk.CTkFont(size=10),
+                                       justify="left", wraplength=300)
+        self.live_label.pack(pady=2, padx=5)
+
         # Filter Hierarchy
         self.f_frame = ctk.CTkFrame(self.sidebar)
         self.f_frame.pack(fill="x", pady=10, padx=5)
         ctk.CTkLabel(self.f_frame, text="Filter Configuration", font=ctk.CTkFont(weight="bold")).pack(pady=5)
 
         ctk.CTkLabel(self.f_frame, text="Response Type").pack()
-        self.resp_menu = ctk.CTkOptionMenu(self.f_frame, values=["None", "Low-Pass", "High-Pass", "Band-Pass", "Band-Stop", "Notch"], 
+        self.resp_menu = ctk.CTkOptionMenu(self.f_frame, values=["None", "Low-Pass", "High-Pass", "Band-Pass", "Band-Stop", "Notch", "Notch Bank"], 
                                            variable=self.filter_resp, command=self.force_update)
         self.resp_menu.pack(pady=5)
 
@@ -345,8 +472,13 @@ class DSPApp(ctk.CTk):
             ("Kaiser Beta", 0.1, 15, 5, lambda v: setattr(self, 'beta', float(v))),
             ("Notch Quality (Q)", 1, 100, 30, lambda v: setattr(self, 'notch_q', float(v))),
             ("Gaussian StdDev", 0.1, 20, 7, lambda v: setattr(self, 'gauss_std', float(v))),
-            ("PM Trans. Width", 1, 500, 50, lambda v: setattr(self, 'pm_width', float(v)))
+            ("PM Trans. Width", 1, 500, 50, lambda v: setattr(self, 'pm_width', float(v))),
+            ("Notch Harmonics", 0, 20, 3, lambda v: setattr(self, 'notch_harmonics', int(float(v))))
         ])
+        track_row = ctk.CTkFrame(self.param_group, fg_color="transparent")
+        ctk.CTkCheckBox(track_row, text="Track Drifting Fundamental", variable=self.notch_track,
+                        command=self.force_update).pack(pady=2, anchor="w", padx=2)
+        self.param_sliders["Track Drift"] = track_row
 
         # New Toggle Location: Below Parameters
         self.complex_toggle = ctk.CTkCheckBox(self.sidebar, text="Enable Complex/AI Filter Layer", 
@@ -359,7 +491,7 @@ class DSPApp(ctk.CTk):
         ctk.CTkLabel(self.complex_group, text="Advanced Algorithms", font=ctk.CTkFont(weight="bold")).pack(pady=5)
         
         self.complex_menu = ctk.CTkOptionMenu(self.complex_group, 
-                                             values=["Kalman", "Savitzky-Golay", "Wavelet", "Adaptive (LMS)", "Median"],
+                                             values=["Kalman", "Savitzky-Golay", "Wavelet", "Adaptive (LMS)", "Median", "Poly Detrend", "Running Stats"],
                                              variable=self.complex_filter, command=self.update_complex_ui)
         self.complex_menu.pack(pady=5)
         
@@ -371,6 +503,67 @@ class DSPApp(ctk.CTk):
         
         self.update_complex_ui("Kalman")
 
+        # Multirate Stage Group
+        self.mr_group = ctk.CTkFrame(self.sidebar)
+        self.mr_group.pack(fill="x", pady=10, padx=5)
+        ctk.CTkLabel(self.mr_group, text="Multirate Stage", font=ctk.CTkFont(weight="bold")).pack(pady=5)
+        self.add_comp_slider("Decimate (M)", 1, 50, 1, lambda v: self.set_rate_change(down=v), parent=self.mr_group)
+        self.add_comp_slider("Interpolate (L)", 1, 10, 1, lambda v: self.set_rate_change(up=v), parent=self.mr_group)
+        ctk.CTkCheckBox(self.mr_group, text="Interpolate Back to Input Rate", variable=self.mr_restore,
+                        command=self.force_update).pack(pady=2, anchor="w", padx=5)
+        self.mr_label = ctk.CTkLabel(self.mr_group, text="Rate change bypassed (1/1)", font=ctk.CTkFont(size=10),
+                                     justify="left", wraplength=300)
+        self.mr_label.pack(pady=2, padx=5)
+
+        # Processing Precision Group
+        self.prec_group = ctk.CTkFrame(self.sidebar)
+        self.prec_group.pack(fill="x", pady=10, padx=5)
+        ctk.CTkLabel(self.prec_group, text="Processing Precision", font=ctk.CTkFont(weight="bold")).pack(pady=5)
+        ctk.CTkOptionMenu(self.prec_group, values=list(precision.PRECISIONS), variable=self.precision,
+                          command=self.on_precision_change, fg_color="#444").pack(pady=2, padx=10, fill="x")
+        self.prec_label = ctk.CTkLabel(self.prec_group, text="float64 (reference)", font=ctk.CTkFont(size=10),
+                                       justify="left", wraplength=300)
+        self.prec_label.pack(pady=2, padx=5)
+
+        # Processing Mode Group: offline zero-phase vs the causal filter the firmware runs
+        self.mode_group = ctk.CTkFrame(self.sidebar)
+        self.mode_group.pack(fill="x", pady=10, padx=5)
+        ctk.CTkLabel(self.mode_group, text="Processing Mode", font=ctk.CTkFont(weight="bold")).pack(pady=5)
+        ctk.CTkSegmentedButton(self.mode_group, values=latency.MODES, variable=self.proc_mode,
+                               command=self.force_update).pack(pady=2, padx=10, fill="x")
+        self.latency_label = ctk.CTkLabel(self.mode_group, text="filtfilt: zero phase, twice the work",
+                                          font=ctk.CTkFont(size=10), justify="left", wraplength=300)
+        self.latency_label.pack(pady=2, padx=5)
+
+        # Processing Pipeline Group
+        self.pipe_group = ctk.CTkFrame(self.sidebar)
+        self.pipe_group.pack(fill="x", pady=10, padx=5)
+        ctk.CTkLabel(self.pipe_group, text="Processing Pipeline", font=ctk.CTkFont(weight="bold")).pack(pady=5)
+        pipe_btns = ctk.CTkFrame(self.pipe_group, fg_color="transparent"); pipe_btns.pack(fill="x", pady=2)
+        for txt_, cmd in [("+ Filter", self.pipeline_add_filter), ("+ Complex", self.pipeline_add_complex),
+                          ("Undo", self.pipeline_undo), ("Clear", self.pipeline_clear)]:
+            ctk.CTkButton(pipe_btns, text=txt_, width=70, fg_color="#444", command=cmd).pack(side="left", padx=2, expand=True)
+        self.pipe_box = ctk.CTkTextbox(self.pipe_group, height=110, font=ctk.CTkFont(size=11), fg_color="#1a1a1a")
+        self.pipe_box.pack(fill="x", padx=10, pady=5)
+        ctk.CTkCheckBox(self.pipe_group, text="Run Pipeline (replaces Stage 1/2)", variable=self.use_pipeline,
+                        command=self.force_update).pack(pady=2, anchor="w", padx=5)
+        ctk.CTkCheckBox(self.pipe_group, text="Causal Block Streaming", variable=self.pipe_streaming,
+                        command=self.force_update).pack(pady=2, anchor="w", padx=5)
+        self.refresh_pipeline_box()
+
+        # A/B Comparison Group
+        self.ab_group = ctk.CTkFrame(self.sidebar)
+        self.ab_group.pack(fill="x", pady=10, padx=5)
+        ctk.CTkLabel(self.ab_group, text="A/B Comparison", font=ctk.CTkFont(weight="bold")).pack(pady=5)
+        ab_btns = ctk.CTkFrame(self.ab_group, fg_color="transparent"); ab_btns.pack(fill="x", pady=2)
+        for txt_, cmd in [("Pin Current", self.ab_pin), ("Unpin Last", self.ab_unpin), ("Clear", self.ab_clear)]:
+            ctk.CTkButton(ab_btns, text=txt_, width=90, fg_color="#444", command=cmd).pack(side="left", padx=2, expand=True)
+        ctk.CTkCheckBox(self.ab_group, text="Overlay Pinned Designs", variable=self.ab_overlay,
+                        command=self.force_update).pack(pady=2, anchor="w", padx=5)
+        self.ab_box = ctk.CTkTextbox(self.ab_group, height=110, font=ctk.CTkFont(size=10, family="Consolas"),
+                                     fg_color="#1a1a1a", wrap="none")
+        self.ab_box.pack(fill="x", padx=10, pady=5)
+
         # C-Code Export Settings Group
         self.c_settings_group = ctk.CTkFrame(self.sidebar)
         self.c_settings_group.pack(fill="x", pady=10, padx=5)
@@ -387,6 +580,16 @@ class DSPApp(ctk.CTk):
         ctk.CTkLabel(self.c_settings_group, text="IIR Structure", font=ctk.CTkFont(size=11)).pack()
         ctk.CTkOptionMenu(self.c_settings_group, values=["Direct Form II", "Cascaded Biquads (SOS)"], 
                           variable=self.c_iir_struct, fg_color="#444").pack(pady=2, padx=10, fill="x")
+        
+        # Cost model: cycles/sample on the chosen MCU against the per-sample budget at FS_HZ
+        ctk.CTkLabel(self.c_settings_group, text="MCU Profile / CPU Budget [%]", font=ctk.CTkFont(size=11)).pack()
+        mcu_row = ctk.CTkFrame(self.c_settings_group, fg_color="transparent"); mcu_row.pack(fill="x", padx=10, pady=2)
+        ctk.CTkOptionMenu(mcu_row, values=list(cost_model.MCU_PROFILES), variable=self.mcu_profile,
+                          fg_color="#444", width=190).pack(side="left", fill="x", expand=True)
+        ctk.CTkEntry(mcu_row, textvariable=self.cpu_budget, width=50).pack(side="left", padx=(5, 0))
+        self.cost_label = ctk.CTkLabel(self.c_settings_group, text="", font=ctk.CTkFont(size=10),
+                                       justify="left", wraplength=300)
+        self.cost_label.pack(pady=2, padx=5)
 
         # Analyze Button - ALWAYS AT BOTTOM
         self.calc_btn = ctk.CTkButton(self.sidebar, text="Calculate & Analyze", 
@@ -417,6 +620,10 @@ class DSPApp(ctk.CTk):
              "AIM: To decompose the complex time signal into its constituent sine frequency components.\n"
              "UTILITY: Essential for identifying exact noise frequencies and harmonics. Verifies that the filter has effectively suppressed the target interference bands."),
             
+            ("spec", "Spectrogram (Waterfall)",
+             "AIM: To show how the spectrum of the filtered signal evolves over time (STFT, dB colour scale).\n"
+             "UTILITY: Reveals time-varying content a single FFT averages away, such as sweeps or motor run-ups. Live signals scroll through a ring of recent frames; long imports show a decimated overview of the whole record."),
+            
             ("resp", "Magnitude Response (dB)",
              "AIM: To show the mathematical transfer function of the filter in logarithmic scale.\n"
              "UTILITY: This is the primary design chart. Use it to measure transition bandwidth (slope), confirm the -3dB cutoff point, and verify stopband attenuation levels required by your system."),
@@ -435,7 +642,15 @@ class DSPApp(ctk.CTk):
             
             ("gain_lin", "Linear Gain Profile",
              "AIM: To view the gain as a simple multiplier (0.0 to 1.0) rather than logarithmic decibels.\n"
-             "UTILITY: Simplifies real-world voltage sensitivity calculations. Knowing exactly what percentage of a sensor's input voltage translates to the output simplifies ADC scaling.")
+             "UTILITY: Simplifies real-world voltage sensitivity calculations. Knowing exactly what percentage of a sensor's input voltage translates to the output simplifies ADC scaling."),
+
+            ("gd", "Group Delay (Samples)",
+             "AIM: To show how many samples each frequency component is delayed by the filter.\n"
+             "UTILITY: A flat curve means the waveform keeps its shape. Peaks near the cutoff of IIR designs show where pulses will smear; divide by Fs for the delay in seconds."),
+
+            ("step", "Step Response",
+             "AIM: To show the output for an input that switches from 0 to 1 and stays there, run until it has settled.\n"
+             "UTILITY: Reads off overshoot and settling time directly. The dashed line marks the sample after which the output stays within 2% of its final value.")
         ]
 
         for key, title, desc in plots:
@@ -446,12 +661,8 @@ class DSPApp(ctk.CTk):
             
             # Cinematic Full-Width Figure
             fig = plt.figure(figsize=(14, 6), facecolor='#242424') 
-            ax = fig.add_subplot(111); ax.set_facecolor('#1a1a1a')
-            ax.tick_params(colors='white'); ax.xaxis.label.set_color('white'); ax.yaxis.label.set_color('white')
-            ax.grid(True, color='#444444', linestyle='--')
-            
-            # Edge-to-Edge Margins
-            fig.subplots_adjust(left=0.06, right=0.98, top=0.94, bottom=0.12)
+            ax = fig.add_subplot(111)
+            plot_export.style_axes(fig, ax) # dark theme, edge-to-edge margins
             
             canvas = FigureCanvasTkAgg(fig, master=card)
             canvas.get_tk_widget().pack(fill="both", expand=True, pady=0, padx=0)
@@ -463,6 +674,37 @@ class DSPApp(ctk.CTk):
             
             self.cards[key] = {"card": card, "fig": fig, "ax": ax, "canvas": canvas, "info": info}
 
+    def update_spectrogram(self, y, fs):
+        """
+        Push new Live frames into the STFT ring, or rebuild the overview of the whole buffer
+        (Import, and Synth, which regenerates the same window every tick), and update the image in place.
+        """
+        if len(y) < 2: return
+        live = self.sig_gen.mode == "Live"
+        key = (fs, y.dtype, live)
+        if live:
+            if self.spec_ring is None or key != self._spec_key:
+                self.spec_ring = spectrogram.StftRing(self.spec_nfft, self.spec_nfft // 2, self.spec_cols, dtype=y.dtype)
+            self.spec_ring.push(y)
+            img = self.spec_ring.image()
+            span = self.spec_cols * self.spec_ring.hop / fs
+            extent = [-span, 0, 0, fs / 2]; xlabel = "Time [s] (0 = now)"
+        else:
+            img, t_edges = spectrogram.overview(y, fs, self.spec_nfft, max_cols=2 * self.spec_cols)
+            extent = [t_edges[0], t_edges[-1], 0, fs / 2]; xlabel = "Time [s]"
+        self._spec_key = key
+        
+        ax = self.cards["spec"]["ax"]
+        if self._spec_img is None or self._spec_img.get_array().shape != img.shape:
+            ax.clear()
+            self._spec_img = ax.imshow(img, aspect='auto', origin='lower', cmap='magma', extent=extent, interpolation='nearest')
+            ax.set_ylabel("Frequency [Hz]", color='white', fontsize=9)
+        else:
+            self._spec_img.set_data(img); self._spec_img.set_extent(extent)
+        ax.set_xlabel(xlabel, color='white', fontsize=9)
+        top = float(np.max(img)); self._spec_img.set_clim(top - 80, top)
+        self.cards["spec"]["canvas"].draw_idle()
+
     def toggle_briefs(self):
         for k in self.cards:
             self.cards[k]["card"].pack_forget()
@@ -495,7 +737,7 @@ class DSPApp(ctk.CTk):
             vl.pack(side="right", padx=2)
             def make_update(c, l, u): return lambda v: (l.configure(text=f"{float(v):.1f} {u}"), c(v))
             s = ctk.CTkSlider(sc, from_=low, to=high, command=make_update(cmd, vl, unit))
-            s.set(start); s.pack(fill="x")
+            s.set(start); s.pack(fill="x"); self.slider_widgets[label] = (s, make_update(cmd, vl, unit))
             if any(key in label for key in ["Freq", "Fs", "Cutoff"]): 
                 self.freq_sliders.append(s)
         return group_frame
@@ -513,11 +755,12 @@ class DSPApp(ctk.CTk):
             vl.pack(side="right", padx=2)
             def make_update(c, l, u, lb):
                 def update_cmd(v):
-                    fmt = f"{int(float(v))}" if "Order" in lb else f"{float(v):.1f}"
+                    fmt = f"{int(float(v))}" if "Order" in lb or "Harmonics" in lb else f"{float(v):.1f}"
                     l.configure(text=f"{fmt} {u}"); c(v)
                 return update_cmd
             s = ctk.CTkSlider(sc, from_=low, to=high, command=make_update(cmd, vl, unit, label))
             s.set(start); s.pack(fill="x"); self.param_sliders[label] = sc
+            self.slider_widgets[label] = (s, make_update(cmd, vl, unit, label))
             if any(key in label for key in ["Freq", "Fs", "Cutoff"]): 
                 self.freq_sliders.append(s)
         return group_frame
@@ -528,20 +771,12 @@ class DSPApp(ctk.CTk):
             # Update all frequency sliders (Sines and Cutoffs)
             s.configure(to=new_max)
             if s.get() > new_max: s.set(new_max)
-        
-        # Update the Fs Slider itself (Spectrum range)
-        fs_max = 20000 if self.high_bw.get() else 2000
-        self.fs_slider.configure(to=fs_max)
-        if self.fs_slider.get() > fs_max: self.fs_slider.set(fs_max)
 
     def toggle_source(self, mode):
         self.sig_gen.mode = mode
-        if mode == "Synth":
-            self.import_group.pack_forget()
-            self.synth_group.pack(fill="x", pady=5, padx=5, after=self.source_segmented)
-        else:
-            self.synth_group.pack_forget()
-            self.import_group.pack(fill="x", pady=5, padx=5, after=self.source_segmented)
+        for grp in (self.synth_group, self.import_group, self.live_group): grp.pack_forget()
+        grp = {"Synth": self.synth_group, "Import": self.import_group, "Live": self.live_group}[mode]
+        grp.pack(fill="x", pady=5, padx=5, after=self.source_segmented)
         
         # Ensure FS input and filtering frames are always visible
         self.fs_frame.pack(fill="x", pady=5, padx=5, before=self.source_segmented)
@@ -592,8 +827,16 @@ class DSPApp(ctk.CTk):
             
         # Add relevant sliders
         if choice == "Kalman":
+            ctk.CTkOptionMenu(self.comp_param_frame, values=list(kalman_models.MODELS), width=170,
+                              variable=ctk.StringVar(value=self.kf_model),
+                              command=lambda v: (setattr(self, 'kf_model', v), self.force_update())).pack(pady=2)
             self.add_comp_slider("Process Noise (Q) log", -6, -1, -4, lambda v: setattr(self, 'kf_q', 10**float(v)))
             self.add_comp_slider("Meas. Noise (R) log", -4, 1, -2, lambda v: setattr(self, 'kf_r', 10**float(v)))
+            steady, smooth = ctk.BooleanVar(value=self.kf_steady), ctk.BooleanVar(value=self.kf_smooth)
+            ctk.CTkCheckBox(self.comp_param_frame, text="Steady-state gain (as exported)", variable=steady,
+                            command=lambda: (setattr(self, 'kf_steady', steady.get()), self.force_update())).pack(anchor="w", padx=5, pady=2)
+            ctk.CTkCheckBox(self.comp_param_frame, text="RTS smoother (offline)", variable=smooth,
+                            command=lambda: (setattr(self, 'kf_smooth', smooth.get()), self.force_update())).pack(anchor="w", padx=5, pady=2)
         elif choice == "Savitzky-Golay":
             self.add_comp_slider("Window Length", 3, 51, 11, lambda v: setattr(self, 'sg_win', int(float(v))))
             self.add_comp_slider("Polynomial Order", 1, 5, 2, lambda v: setattr(self, 'sg_poly', int(float(v))))
@@ -606,9 +849,25 @@ class DSPApp(ctk.CTk):
         elif choice == "Adaptive (LMS)":
             self.add_comp_slider("Learning Rate (mu)", 0.001, 0.1, 0.01, lambda v: setattr(self, 'lms_mu', float(v)))
             self.add_comp_slider("Filter Order", 8, 128, 32, lambda v: setattr(self, 'lms_ord', int(float(v))))
+        elif choice == "Poly Detrend":
+            self.add_comp_slider("Polynomial Order", 0, polynomial.MAX_ORDER, self.poly_order, lambda v: setattr(self, 'poly_order', int(float(v))))
+            self.add_comp_slider("Segment (smp, 0 = global)", 0, 8192, self.poly_seg, lambda v: setattr(self, 'poly_seg', int(float(v))))
+        elif choice == "Running Stats":
+            ctk.CTkOptionMenu(self.comp_param_frame, values=list(running_stats.METRICS), width=140,
+                              variable=ctk.StringVar(value=self.rs_metric),
+                              command=lambda v: (setattr(self, 'rs_metric', v), self.force_update())).pack(pady=2)
+            self.add_comp_slider("Window (smp)", 16, 4096, self.rs_win, lambda v: setattr(self, 'rs_win', int(float(v))))
+            f = ctk.CTkFrame(self.comp_param_frame, fg_color="transparent"); f.pack(fill="x", pady=2)
+            ctk.CTkLabel(f, text="Band Hz", font=ctk.CTkFont(size=11)).pack(side="left", padx=5)
+            ent = ctk.CTkEntry(f, width=120); ent.insert(0, ", ".join(f"{x:g}" for x in self.rs_freqs)); ent.pack(side="right", padx=5)
+            ent.bind("<Return>", lambda e: (setattr(self, 'rs_freqs', running_stats.parse_freqs(ent.get())), self.force_update()))
+            # Latest per-axis readout (all Accel-Gyro axes / Live channels, one vectorised tracker)
+            self.env_label = ctk.CTkLabel(self.comp_param_frame, text="", font=ctk.CTkFont(family="Consolas", size=10),
+                                          justify="left", anchor="w")
+            self.env_label.pack(fill="x", padx=5, pady=2)
 
-    def add_comp_slider(self, label, low, high, start, cmd):
-        f = ctk.CTkFrame(self.comp_param_frame, fg_color="transparent"); f.pack(fill="x", pady=2)
+    def add_comp_slider(self, label, low, high, start, cmd, parent=None):
+        f = ctk.CTkFrame(parent or self.comp_param_frame, fg_color="transparent"); f.pack(fill="x", pady=2)
         ctk.CTkLabel(f, text=label, font=ctk.CTkFont(size=11)).pack(side="left", padx=5)
         v_lbl = ctk.CTkLabel(f, text=str(start), font=ctk.CTkFont(size=11, weight="bold"), text_color="#00d1ff")
         v_lbl.pack(side="right", padx=5)
@@ -616,6 +875,396 @@ class DSPApp(ctk.CTk):
             v_lbl.configure(text=f"{float(v):.2f}")
             cmd(v)
         s = ctk.CTkSlider(f, from_=low, to=high, command=_up); s.set(start); s.pack(fill="x", padx=5)
+        self.slider_widgets[label] = (s, _up)
+
+    def pipeline_add_filter(self):
+        self.pipeline_stages.append(pipeline.filter_stage(self.get_filter_spec()))
+        self.refresh_pipeline_box()
+
+    def pipeline_add_complex(self):
+        c_spec = self.get_complex_spec()
+        self.pipeline_stages.append(pipeline.complex_stage(c_spec["name"], c_spec["params"]))
+        self.refresh_pipeline_box()
+
+    def poly_use_complex(self):
+        self.complex_filter.set("Poly Detrend"); self.show_complex.set(True)
+        self.update_complex_ui("Poly Detrend")
+
+    def poly_add_stage(self):
+        self.pipeline_stages.append(pipeline.complex_stage("Poly Detrend", self.get_complex_spec()["params"]))
+        self.refresh_pipeline_box()
+
+    def poly_report(self):
+        from tkinter import messagebox
+        raw = np.asarray(self.sig_gen.get_signal(), dtype=float)
+        messagebox.showinfo("Baseline Fit", polynomial.fit_report(raw, self.sig_gen.fs, self.poly_order))
+
+    def pipeline_undo(self):
+        if self.pipeline_stages: self.pipeline_stages.pop()
+        self.refresh_pipeline_box()
+
+    def pipeline_clear(self):
+        self.pipeline_stages = []
+        self.refresh_pipeline_box()
+
+    def refresh_pipeline_box(self):
+        lines = [f"{i+1}. {pipeline.describe_stage(st)}" for i, st in enumerate(self.pipeline_stages)]
+        if self.pipeline_stages:
+            try:
+                plan = pipeline.build_pipeline(self.pipeline_stages, self.sig_gen.fs)
+                lines.append(f"-> {len(self.pipeline_stages)} stages fused into {len(plan)} passes")
+            except Exception as e: lines.append(f"-> Plan error: {e}")
+        else:
+            lines.append("Empty: add the current filter or complex layer as stages.")
+        self.pipe_box.configure(state="normal")
+        self.pipe_box.delete("1.0", "end")
+        self.pipe_box.insert("1.0", "\n".join(lines))
+        self.pipe_box.configure(state="disabled")
+        self._pipeline_key = None
+        self.force_update()
+
+    def ab_pin(self):
+        if len(self.pinned_specs) >= compare.MAX_PINNED: self.pinned_specs.pop(0)
+        spec = self.get_filter_spec()
+        if not filter_design.is_identity(spec): self.pinned_specs.append(spec)
+        self.force_update()
+
+    def ab_unpin(self):
+        if self.pinned_specs: self.pinned_specs.pop()
+        self.force_update()
+
+    def ab_clear(self):
+        self.pinned_specs = []
+        self.force_update()
+
+    def get_ab_bank(self, fs):
+        """Stacked designs of the pinned specs at fs (rebuilt only when pins or fs change)."""
+        key = (fs, repr(self.pinned_specs))
+        if key != self._ab_key:
+            self._ab_bank = compare.design_bank(self.pinned_specs, fs); self._ab_key = key
+        return self._ab_bank
+
+    def refresh_ab_box(self, fs):
+        if self.pinned_specs:
+            def compute():
+                bank = self.get_ab_bank(fs)
+                freqs, H = compare.batched_response(bank, 1024)
+                return {"text": compare.metrics_table(compare.bank_metrics(bank, freqs, H), fs)}
+            text = str(self.results.get_or(session.content_key("ab_table", fs, repr(self.pinned_specs)), compute)["text"])
+        else:
+            text = f"No pinned designs: pin up to {compare.MAX_PINNED} with 'Pin Current'."
+        self.ab_box.configure(state="normal")
+        self.ab_box.delete("1.0", "end")
+        self.ab_box.insert("1.0", text)
+        self.ab_box.configure(state="disabled")
+
+    def current_stages(self):
+        """The user pipeline if one is defined, otherwise the live Stage 1 (+ Stage 2) chain."""
+        if self.pipeline_stages: return list(self.pipeline_stages)
+        return self.dual_stages()
+
+    def dual_stages(self):
+        """Stage 1 (+ Stage 2 when enabled) as a pipeline stage list."""
+        stages = [pipeline.filter_stage(self.get_filter_spec())]
+        if self.show_complex.get():
+            c_spec = self.get_complex_spec()
+            stages.append(pipeline.complex_stage(c_spec["name"], c_spec["params"]))
+        return stages
+
+    def save_pipeline_spec(self):
+        """Write the current chain as JSON for batch_process.py."""
+        from tkinter import filedialog
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Pipeline Spec", "*.json")])
+        if path:
+            pipeline.save_spec(path, self.current_stages(), self.sig_gen.fs, zero_phase=not (self.pipe_streaming.get() or self.proc_mode.get() == "Causal"))
+
+    # Session state: ctk variables and plain attributes saved by name; slider positions by label
+    SESSION_VARS = ("filter_resp", "filter_class", "filter_proto", "notch_track", "min_phase", "high_bw",
+                    "show_complex", "complex_filter", "fs_val", "c_data_type", "c_impl_style", "c_iir_struct",
+                    "mcu_profile", "cpu_budget", "use_pipeline", "pipe_streaming", "ab_overlay", "mr_restore",
+                    "precision", "proc_mode", "import_format", "accel_axis", "resample_method", "att_method",
+                    "log_freq")
+    SESSION_ATTRS = ("wt_wave", "pipeline_stages", "pinned_specs", "rs_metric", "rs_freqs", "att_params",
+                     "kf_model", "kf_steady", "kf_smooth")
+
+    def session_state(self):
+        state = {name: getattr(self, name).get() for name in self.SESSION_VARS}
+        state.update({name: getattr(self, name) for name in self.SESSION_ATTRS})
+        state["sliders"] = {label: float(s.get()) for label, (s, _) in self.slider_widgets.items() if s.winfo_exists()}
+        state["source"] = self.sig_gen.mode; state["waveform"] = self.sig_gen.waveform
+        state["file_label"] = self.file_label.cget("text")
+        return state
+
+    def apply_session_state(self, state):
+        for name in self.SESSION_VARS:
+            if name in state: getattr(self, name).set(state[name])
+        for name in self.SESSION_ATTRS:
+            if name in state: setattr(self, name, state[name])
+        self.update_bw_range()
+        self.stim_selector.set(state["waveform"]); self.toggle_waveform_ui(state["waveform"])
+        self.toggle_complex_visibility(); self.update_complex_ui(self.complex_filter.get())
+        # Moving a slider runs its command, which sets the attribute behind it
+        for label, v in state["sliders"].items():
+            if label in self.slider_widgets and self.slider_widgets[label][0].winfo_exists():
+                s, update = self.slider_widgets[label]; s.set(v); update(v)
+        self.source_segmented.set(state["source"]); self.toggle_source(state["source"])
+        self.on_format_change(self.import_format.get())
+        self.refresh_pipeline_box()
+
+    def raw_hash(self, raw):
+        """Content hash of the current input, recomputed only when the array object changes."""
+        if self._raw_hash[0] is not raw: self._raw_hash = (raw, session.array_hash(raw))
+        return self._raw_hash[1]
+
+    def save_session(self):
+        """Write parameters, pipeline, the capture reference and every cached result (.dsps)."""
+        from tkinter import filedialog, messagebox
+        path = filedialog.asksaveasfilename(defaultextension=session.SUFFIX, initialfile=self.session_path or "",
+                                            filetypes=[("DSP Studio Session", "*" + session.SUFFIX)])
+        if not path: return
+        g = self.sig_gen
+        capture = g.raw_matrix if g.raw_matrix is not None else g.imported_data
+        state = self.session_state()
+        state["capture_kind"] = "matrix" if g.raw_matrix is not None else "signal"
+        try:
+            session.save_session(path, state, capture, self.results)
+            self.session_path = path
+            self.file_label.configure(text=f"Saved: {session.describe(path)}", text_color="#00ff00")
+        except Exception as e: messagebox.showerror("Save Session", f"Could not save session: {e}")
+
+    def open_session(self):
+        """Restore a session; its capture is memory-mapped and cached results are reused where still valid."""
+        from tkinter import filedialog, messagebox
+        path = filedialog.askopenfilename(filetypes=[("DSP Studio Session", "*" + session.SUFFIX)])
+        if not path: return
+        try:
+            self.results.clear()
+            state, capture, _ = session.load_session(path, self.results)
+        except Exception as e:
+            messagebox.showerror("Open Session", f"Could not open session: {e}"); return
+        g = self.sig_gen
+        self._import_source = None
+        g.raw_matrix = capture if capture is not None and state.get("capture_kind") == "matrix" else None
+        g.imported_data = capture if g.raw_matrix is None else None
+        try:
+            self.apply_session_state(state)
+            if g.raw_matrix is not None: self.update_axis_data()
+        except Exception as e:
+            messagebox.showerror("Open Session", f"Session loaded but its settings could not be fully restored: {e}")
+        if capture is not None:
+            self.fs_frame.pack(fill="x", pady=5, padx=5, before=self.source_segmented)
+        self.session_path = path
+        self.file_label.configure(text=state.get("file_label") or f"Session: {path.split('/')[-1]}", text_color="#00ff00")
+        self.manual_refresh()
+
+    def export_report(self):
+        """Render all plots, the C export and metrics.json off-screen into a folder (background thread)."""
+        import threading
+        from tkinter import filedialog, messagebox
+        out_dir = filedialog.askdirectory(title="Export Report Bundle")
+        if not out_dir: return
+        up, down = self.get_rate_change()
+        fs = self.get_processing_fs()
+        raw = np.asarray(self.sig_gen.get_signal(), dtype=float)
+        if (up, down) != (1, 1): raw = multirate.resample(raw, up, down, self.get_mr_taps(up, down))
+        kwargs = dict(zero_phase=not (self.pipe_streaming.get() or self.proc_mode.get() == "Causal"), data_type=self.c_data_type.get(),
+                      impl_style=self.c_impl_style.get(), iir_struct=self.c_iir_struct.get(),
+                      mcu_profile=self.mcu_profile.get(), budget_pct=self.get_budget_pct(), start_method="spawn")
+        stages = self.current_stages()
+
+        def work():
+            try:
+                m = plot_export.export_bundle(out_dir, stages, fs, raw, **kwargs)
+                msg = (messagebox.showinfo, f"{len(m['files'])} files written to {out_dir} in {m['render_seconds']:.1f} s")
+            except Exception as e:
+                msg = (messagebox.showerror, f"Export failed: {e}")
+            self.after(0, lambda: msg[0]("Export Report Bundle", msg[1]))
+        threading.Thread(target=work, daemon=True).start()
+
+    def export_output(self):
+        """
+        Stream the current input through the chain into .npy / raw float32 / raw int16 / CSV,
+        optionally with every stage's output (background thread). Accel-Gyro imports export
+        all axes; restored sessions read the memory-mapped capture block by block.
+        """
+        import threading
+        from tkinter import filedialog, messagebox
+        path = filedialog.asksaveasfilename(defaultextension=".npy", title="Export Filtered Output",
+                                            filetypes=[("NumPy array", "*.npy"), ("Raw float32 LE", "*.f32"),
+                                                       ("Raw int16 LE", "*.i16"), ("CSV", "*.csv")])
+        if not path: return
+        fmt = next((f for f, ext in stream_writer.FORMATS.items() if path.endswith(ext)), "npy")
+        intermediate = len(self.current_stages()) > 1 and messagebox.askyesno(
+            "Export Filtered Output", "Also write each stage's output (<name>_stageN)?")
+        up, down = self.get_rate_change()
+        g = self.sig_gen
+        if g.mode == "Import" and g.raw_matrix is not None and (up, down) == (1, 1):
+            x = g.raw_matrix[:, 1:]; names = ["AX", "AY", "AZ", "GX", "GY", "GZ"][:x.shape[1]]
+        else:
+            x = g.get_signal(); names = ["filtered"]
+            if (up, down) != (1, 1): x = multirate.resample(np.asarray(x, dtype=float), up, down, self.get_mr_taps(up, down))
+        # int16 full scale: input peak, found block by block so a memmap is never loaded whole
+        peak = max((float(np.max(np.abs(x[i:i + stream_writer.BLOCK]))) for i in range(0, len(x), stream_writer.BLOCK)), default=1.0)
+        kwargs = dict(zero_phase=not (self.pipe_streaming.get() or self.proc_mode.get() == "Causal"), intermediate=intermediate,
+                      dtype=self.get_dtype(), names=names, full_scale=peak or 1.0)
+        stages = self.current_stages(); fs = self.get_processing_fs()
+
+        def work():
+            try:
+                res = stream_writer.export_signal(x, stages, fs, path, fmt, **kwargs)
+                msg = (messagebox.showinfo, stream_writer.summary(res))
+            except Exception as e:
+                msg = (messagebox.showerror, f"Export failed: {e}")
+            self.after(0, lambda: msg[0]("Export Filtered Output", msg[1]))
+        threading.Thread(target=work, daemon=True).start()
+
+    def run_pipeline(self, raw, fs, causal=False):
+        key = (fs, repr(self.pipeline_stages))
+        if key != self._pipeline_key:
+            self._pipeline_plan = pipeline.build_pipeline(self.pipeline_stages, fs)
+            self._pipeline_key = key
+        if self.pipe_streaming.get():
+            return pipeline.stream_pipeline(self._pipeline_plan, raw, dtype=raw.dtype)
+        return pipeline.run_pipeline(self._pipeline_plan, raw, zero_phase=not causal, dtype=raw.dtype)
+
+    def process_chain(self, raw, fs, causal=False):
+        """
+        Stage 1 (or the pipeline) then Stage 2, in the precision of raw.
+        causal=True runs Stage 1 as the firmware does (single forward pass,
+        steady-state initial conditions) instead of forward-backward.
+        """
+        dt = raw.dtype
+        use_pipe = self.use_pipeline.get() and len(self.pipeline_stages) > 0
+        if use_pipe:
+            stage1_out = self.run_pipeline(raw, fs, causal)
+        elif self.lattice is not None and isinstance(self.lattice, dict):
+            # Lattice designs run through their own kernel
+            if causal: stage1_out = lattice_filters.apply_lattice(self.lattice, raw, lattice_filters.lattice_zi(self.lattice, raw[0]))
+            else: stage1_out = lattice_filters.lattice_filtfilt(self.lattice, raw)
+        elif self.sos is not None:
+            sos = self.sos.astype(dt)
+            stage1_out = latency.causal_sosfilt(sos, raw) if causal else sosfiltfilt(sos, raw)
+        elif len(self.a) > 1 or len(self.b) > 1:
+            b, a = self.b.astype(dt), self.a.astype(dt)
+            stage1_out = latency.causal_lfilter(b, a, raw) if causal else filtfilt(b, a, raw)
+        else:
+            stage1_out = raw
+        
+        # Stage 2: Complex Filter (If enabled)
+        if self.show_complex.get() and not use_pipe:
+            c_spec = self.get_complex_spec()
+            return precision.as_signal(complex_filters.apply_complex_filter(c_spec["name"], stage1_out, c_spec["params"]), dt)
+        return stage1_out
+
+    def design_group_delay(self, fs):
+        """Passband group delay (samples) of the LTI part of the chain, summed over pipeline filter stages."""
+        if self.use_pipeline.get() and self.pipeline_stages:
+            specs = [st["spec"] for st in self.pipeline_stages if st["type"] == "filter"]
+        else:
+            specs = [self.get_filter_spec()]
+        return sum(cost_model.filter_cost(spec, fs)["gd_samples"] for spec in specs)
+
+    def get_dtype(self):
+        return precision.get_dtype(self.precision.get())
+
+    def on_precision_change(self, choice):
+        """Re-cast loaded data to the new precision (Float32 -> Float64 needs a reload to regain digits)."""
+        dt = self.get_dtype(); g = self.sig_gen
+        if self._import_source is not None:
+            self._import_source = (self._import_source[0], self._import_source[1].astype(dt))
+        if g.raw_matrix is not None:
+            g.raw_matrix = g.raw_matrix.astype(dt); self.update_axis_data()
+        elif g.imported_data is not None:
+            g.imported_data = g.imported_data.astype(dt)
+        if dt == np.float64: self.prec_label.configure(text="float64 (reference)")
+        self.force_update()
+
+    def set_rate_change(self, up=None, down=None):
+        if up is not None: self.mr_up = int(round(float(up)))
+        if down is not None: self.mr_down = int(round(float(down)))
+        self.force_update()
+
+    def get_rate_change(self):
+        """Active (L, M) in lowest terms; (1, 1) when the multirate stage is bypassed."""
+        return multirate.reduce_factors(self.mr_up, self.mr_down)
+
+    def get_processing_fs(self):
+        up, down = self.get_rate_change()
+        return self.sig_gen.fs * up / down
+
+    def get_mr_taps(self, up, down):
+        if (up, down) not in self._mr_taps:
+            self._mr_taps[(up, down)] = multirate.design_antialias(up, down)
+        return self._mr_taps[(up, down)]
+
+    def update_mr_label(self, fs, n_fft):
+        up, down = self.get_rate_change()
+        if (up, down) == (1, 1):
+            self.mr_label.configure(text="Rate change bypassed (1/1)"); return
+        stage_macs = cost_model.filter_cost(self.get_filter_spec(), fs * up / down, self.c_impl_style.get(),
+                                            self.c_iir_struct.get())["macs"]
+        sv = multirate.compute_savings(fs, up, down, stage_macs, fft_len=n_fft, aa_taps=len(self.get_mr_taps(up, down)))
+        self.mr_label.configure(text=(
+            f"{fs:g} Hz x {up}/{down} -> {sv['fs_eff']:g} Hz\n"
+            f"Filter {sv['full_macs']/1e3:.1f}k -> {sv['reduced_macs']/1e3:.1f}k MAC/s (+ resampler {sv['resampler_macs']/1e3:.1f}k)\n"
+            f"FFT {sv['fft_full_ops']/1e3:.1f}k -> {sv['fft_reduced_ops']/1e3:.1f}k ops | Net saving {100*sv['saving']:.0f}%"))
+
+    def toggle_live(self):
+        """Start or stop the background reader of the Live source."""
+        if self.live is not None:
+            self.live.reader.stop(); self.live = None; self.sig_gen.live_data = None
+            self.live_btn.configure(text="Connect", fg_color="#28a745")
+            self.live_label.configure(text="Disconnected")
+            return
+        reader = live_source.LiveReader(self.live_transport.get(), self.live_address.get(), axes=int(self.live_axes.get()))
+        reader.start()
+        self.live = live_source.LiveSource(reader); self._live_key = None
+        self.live_btn.configure(text="Disconnect", fg_color="#c0392b")
+
+    def live_step(self, fs):
+        """
+        Drain new Live samples through a causal pipeline stream whose state is
+        carried across ticks (rebuilt only when the chain, axis or precision
+        changes) and publish the newest display window.
+        """
+        axis = {"AX": 0, "AY": 1, "AZ": 2, "GX": 3, "GY": 4, "GZ": 5}.get(self.accel_axis.get(), 0)
+        stages = list(self.pipeline_stages) if self.use_pipeline.get() and self.pipeline_stages else self.dual_stages()
+        key = (fs, repr(stages), axis, self.precision.get())
+        if key != self._live_key:
+            plan = pipeline.build_pipeline(stages, fs)
+            self.live.set_stream(pipeline.PipelineStream(plan, self.get_dtype()), axis)
+            self._live_key = key
+        self._live_new = self.live.step()
+        raw, filtered = self.live.window(int(self.sig_gen.duration * fs))
+        self.sig_gen.live_data = precision.as_signal(raw, self.get_dtype())
+        self.live_label.configure(text=live_source.stats_summary(self.live.stats()))
+        return filtered
+
+    def update_envelope(self, fs, changed):
+        """
+        Running Stats readout for every axis: Live feeds each tick's new frames into a
+        tracker that keeps its state (O(1) per new sample); Accel-Gyro imports are
+        tracked once per parameter change and show the values at the end of the capture.
+        """
+        if self.env_label is None or not self.env_label.winfo_exists(): return
+        if not (self.show_complex.get() and self.complex_filter.get() == "Running Stats"): return
+        freqs = self.rs_freqs if self.rs_metric == "Band Power" else []
+        g = self.sig_gen
+        if g.mode == "Live" and self.live is not None:
+            block = self.live.last_block
+            key = ("live", fs, self.rs_win, repr(freqs), block.shape[1])
+            if key != self._env_key:
+                self._env = running_stats.RunningStats(block.shape[1], self.rs_win, freqs, fs); self._env_key = key
+            self._env.update(block)
+        elif g.mode == "Import" and g.raw_matrix is not None:
+            if not changed and self._env is not None: return
+            x = g.raw_matrix[:, 1:]
+            self._env = running_stats.RunningStats(x.shape[1], self.rs_win, freqs, fs); self._env_key = None
+            self._env.update(x)
+        else:
+            self.env_label.configure(text=""); return
+        names = ["AX", "AY", "AZ", "GX", "GY", "GZ"][:self._env.channels] if self._env.channels <= 6 else [f"CH{i}" for i in range(self._env.channels)]
+        self.env_label.configure(text=running_stats.summary(self._env.latest, names, freqs))
 
     def trigger_import_run(self):
         self.import_triggered = True; self.f_frame.pack(fill="x", pady=10, padx=5)
@@ -646,14 +1295,55 @@ class DSPApp(ctk.CTk):
 
     def update_axis_data(self, *args):
         if self.sig_gen.raw_matrix is not None:
-            axis_map = {"AX": 1, "AY": 2, "AZ": 3, "GX": 4, "GY": 5, "GZ": 6}
-            col_idx = axis_map.get(self.accel_axis.get(), 1)
-            # Ensure index is safe
-            if col_idx < self.sig_gen.raw_matrix.shape[1]:
-                self.sig_gen.imported_data = self.sig_gen.raw_matrix[:, col_idx]
+            data = self.axis_signal(self.sig_gen.raw_matrix)
+            if data is not None:
+                self.sig_gen.imported_data = data
                 self.import_triggered = True # Refresh graphs
                 self._force_redraw = True
 
+    def axis_signal(self, matrix):
+        """Selected Accel-Gyro channel: a raw column, or a fused attitude output (cached per matrix and gains)."""
+        axis = self.accel_axis.get()
+        if axis in attitude.OUTPUTS:
+            if matrix.shape[1] < 7: return None
+            try: fs = float(self.fs_val.get())
+            except ValueError: fs = float(self.sig_gen.fs)
+            key = (self.att_method.get(), repr(self.att_params), fs)
+            if self._att_cache is None or self._att_cache[0] is not matrix or self._att_cache[1] != key:
+                res = complex_filters.apply_attitude_fusion(matrix, fs, self.att_method.get(), self.att_params)
+                self._att_cache = (matrix, key, res)
+            return self._att_cache[2][attitude.OUTPUTS[axis]].astype(matrix.dtype)
+        axis_map = {"AX": 1, "AY": 2, "AZ": 3, "GX": 4, "GY": 5, "GZ": 6}
+        col_idx = axis_map.get(axis, 1)
+        # Ensure index is safe
+        return matrix[:, col_idx] if col_idx < matrix.shape[1] else None
+
+    def get_fusion_spec(self):
+        """Fusion front end for the export when a fused axis of an Accel-Gyro import is selected, else None."""
+        if self.sig_gen.mode != "Import" or self.sig_gen.raw_matrix is None or self.accel_axis.get() not in attitude.OUTPUTS:
+            return None
+        return {"method": self.att_method.get(), "params": dict(self.att_params), "output": self.accel_axis.get()}
+
+    def fusion_gains(self):
+        from tkinter import simpledialog
+        labels = {"Complementary": [("att_tau", "Time constant tau (s)")], "Madgwick": [("att_beta", "Gain beta")],
+                  "Mahony": [("att_kp", "Proportional gain Kp"), ("att_ki", "Integral gain Ki")]}[self.att_method.get()]
+        for key, text in labels:
+            v = simpledialog.askfloat("Fusion Gains", f"{self.att_method.get()}: {text}", initialvalue=self.att_params[key],
+                                      minvalue=0.0, parent=self)
+            if v is None: return
+            self.att_params[key] = v
+        self.update_axis_data(); self.force_update()
+
+    def fusion_report(self):
+        from tkinter import messagebox
+        m = self.sig_gen.raw_matrix
+        if m is None or m.shape[1] < 7:
+            messagebox.showinfo("Fusion Report", "Import an Accel-Gyro CSV (time + AX..GZ) first."); return
+        try: fs = float(self.fs_val.get())
+        except ValueError: fs = float(self.sig_gen.fs)
+        messagebox.showinfo("Fusion Report", attitude.fusion_report(m, fs, self.att_method.get(), self.att_params))
+
     def load_file(self):
         from tkinter import filedialog, messagebox
         path = filedialog.askopenfilename(filetypes=[("Text/CSV", "*.txt *.csv")])
@@ -661,21 +1351,15 @@ class DSPApp(ctk.CTk):
             try:
                 fmt = self.import_format.get()
                 if fmt == "Raw ADC File":
-                    data = np.loadtxt(path, delimiter=",")
+                    data = np.loadtxt(path, delimiter=",", dtype=self.get_dtype())
                     if data.ndim > 1: data = data[:, 0]
                     self.sig_gen.raw_matrix = None
+                    self._import_source = None
+                    self.import_info.pack_forget()
                 else: # Accel-Gyro CSV
-                    # Skip header line, use columns 1-6 (time is index 0)
-                    data_raw = np.loadtxt(path, delimiter=",", skiprows=1)
-                    self.sig_gen.raw_matrix = data_raw
-                    # Auto select appropriate FS from time diff if possible
-                    if data_raw.shape[0] > 1:
-                        avg_dt = np.mean(np.diff(data_raw[:10, 0]))
-                        if avg_dt > 0: self.fs_val.set(str(int(1/avg_dt)))
-                    
-                    axis_map = {"AX": 1, "AY": 2, "AZ": 3, "GX": 4, "GY": 5, "GZ": 6}
-                    col_idx = axis_map.get(self.accel_axis.get(), 1)
-                    data = data_raw[:, col_idx]
+                    # Skip header line, use columns 1-6 (time is index 0, kept float64)
+                    self._import_source = signal_import.load_timed_csv(path, skiprows=1, dtype=self.get_dtype())
+                    data = self.apply_import_timing()
                 
                 self.sig_gen.imported_data = data
                 self.import_triggered = True # Auto-trigger analysis
@@ -685,6 +1369,38 @@ class DSPApp(ctk.CTk):
                 self.fs_frame.pack(fill="x", pady=5, padx=5, before=self.source_segmented)
             except Exception as e: self.file_label.configure(text=f"Error: {e}", text_color="#ff4444")
 
+    def apply_import_timing(self):
+        """
+        Analyze the full time column of the last Accel-Gyro import, set Fs from the
+        robust (median) interval and, unless disabled, resample every axis onto a
+        uniform grid. Returns the currently selected axis.
+        """
+        if self._import_source is None: return None
+        t, cols = self._import_source
+        method = self.resample_method.get()
+        stats = signal_import.analyze_timestamps(t)
+        # The Fs shown is the Fs the samples are on: resample at the displayed (6-digit) value
+        fs = float(f"{stats['fs']:.6g}")
+        if fs > 0: self.fs_val.set(f"{fs:g}")
+        n_out = None
+        if method != "None" and fs > 0 and len(t) > 1:
+            t, cols = signal_import.resample_uniform(t, cols, fs, method)
+            n_out = len(t)
+        data_raw = np.column_stack([t.astype(cols.dtype), cols])
+        self.sig_gen.raw_matrix = data_raw
+        
+        self.import_info.configure(state="normal")
+        self.import_info.delete("1.0", "end")
+        self.import_info.insert("1.0", signal_import.import_summary(stats, method, n_out))
+        self.import_info.configure(state="disabled")
+        self.import_info.pack(fill="x", padx=10, pady=5)
+        
+        data = self.axis_signal(data_raw)
+        self.sig_gen.imported_data = data if data is not None else data_raw[:, min(1, data_raw.shape[1] - 1)]
+        self.import_triggered = True
+        self._force_redraw = True
+        return self.sig_gen.imported_data
+
     def update_ui_visibility(self, *args):
         resp = self.filter_resp.get(); proto = self.filter_proto.get(); f_class = self.filter_class.get()
         
@@ -721,8 +1437,11 @@ class DSPApp(ctk.CTk):
             if proto == "Gaussian":
                 self.param_sliders["Gaussian StdDev"].pack(fill="x", pady=2)
         
-        if resp == "Notch":
+        if resp in ["Notch", "Notch Bank"]:
             self.param_sliders["Notch Quality (Q)"].pack(fill="x", pady=2)
+        if resp == "Notch Bank":
+            self.param_sliders["Notch Harmonics"].pack(fill="x", pady=2)
+            self.param_sliders["Track Drift"].pack(fill="x", pady=2)
             
         if f_class == "FIR":
             if proto == "Kaiser": self.param_sliders["Kaiser Beta"].pack(fill="x", pady=2)
@@ -740,56 +1459,99 @@ class DSPApp(ctk.CTk):
         else: opts = ["Grey-Markel", "All-Pass Lattice"]
         self.proto_menu.configure(values=opts); self.filter_proto.set(opts[0]); self.update_ui_visibility()
 
+    def get_filter_spec(self):
+        """Snapshot of the Stage 1 design parameters as a plain dict (see filter_design)."""
+        spec = filter_design.make_spec(
+            resp=self.filter_resp.get(), f_class=self.filter_class.get(), proto=self.filter_proto.get(),
+            order=self.order, cutoff_1=self.cutoff_1, cutoff_2=self.cutoff_2,
+            ripple=self.ripple, atten=self.atten, beta=self.beta, notch_q=self.notch_q,
+            gauss_std=self.gauss_std, pm_width=self.pm_width, min_phase=self.min_phase.get(),
+            notch_harmonics=self.notch_harmonics)
+        if spec["resp"] == "Notch Bank" and self.notch_track.get() and self._tracked_f0 is not None:
+            spec["cutoff_1"] = self._tracked_f0
+        return spec
+
+    TRACK_INTERVAL = 2.0 # s between fundamental re-estimates on Synth / Live data
+
+    def track_fundamental(self, x, fs):
+        """
+        Re-centre the notch bank on the measured mains fundamental. Estimated when the
+        nominal, Fs, Q or source changes, then every TRACK_INTERVAL on changing data; the
+        tracked value only moves by more than half a notch bandwidth (f0 / Q / 2), so
+        estimator jitter does not redesign the bank.
+        """
+        key = (self.cutoff_1, fs, self.notch_q, self.sig_gen.mode, id(self.sig_gen.imported_data))
+        now = time.monotonic()
+        if key == self._track_key and (self.sig_gen.mode == "Import" or now < self._track_due): return
+        f0 = filter_design.estimate_fundamental(x, fs, self.cutoff_1)
+        if key != self._track_key or self._tracked_f0 is None or abs(f0 - self._tracked_f0) > 0.5 * self._tracked_f0 / self.notch_q:
+            self._tracked_f0 = round(f0, 2)
+        self._track_key = key; self._track_due = now + self.TRACK_INTERVAL
+
+    def get_complex_spec(self):
+        """Snapshot of the Stage 2 (complex layer) selection and its parameters."""
+        return {"name": self.complex_filter.get(), "params": {
+            "kf_q": self.kf_q, "kf_r": self.kf_r, "kf_model": self.kf_model, "kf_steady": self.kf_steady,
+            "kf_smooth": self.kf_smooth, "sg_win": self.sg_win, "sg_poly": self.sg_poly,
+            "med_ker": self.med_ker, "wt_wave": self.wt_wave, "wt_lev": self.wt_lev,
+            "lms_mu": self.lms_mu, "lms_ord": self.lms_ord, "poly_order": self.poly_order, "poly_seg": self.poly_seg,
+            "rs_metric": self.rs_metric, "rs_win": self.rs_win, "rs_freqs": list(self.rs_freqs), "rs_fs": self.get_processing_fs()}}
+
+    def get_budget_pct(self):
+        try: return min(100.0, max(1.0, float(self.cpu_budget.get())))
+        except ValueError: return 100.0
+
+    def get_chain_cost(self, fs):
+        """Cost model of the chain as it would be exported at FS_HZ = fs."""
+        up, down = self.get_rate_change()
+        return c_export.chain_cost(
+            self.get_filter_spec(), fs, self.c_data_type.get(), self.c_impl_style.get(), self.c_iir_struct.get(),
+            complex_spec=self.get_complex_spec() if self.show_complex.get() else None,
+            rate_change=(up, down), fs_in=self.sig_gen.fs,
+            mr_taps=self.get_mr_taps(up, down) if (up, down) != (1, 1) else None,
+            mcu_profile=self.mcu_profile.get(), budget_pct=self.get_budget_pct(), fusion=self.get_fusion_spec())
+
+    def update_cost_label(self, fs):
+        sm = self.get_chain_cost(fs)
+        coef, state = sm["memory"][self.c_data_type.get()]
+        text = (f"{sm['macs']} mul + {sm['adds']} add/sample | {coef} B coef + {state} B state\n"
+                f"Latency {sm['gd_samples']:.1f} samples ({sm['gd_ms']:.2f} ms)\n"
+                f"~{sm['total_cycles']:.0f} of {sm['budget_cycles']:.0f} cycles/sample ({sm['load_pct']:.1f}% CPU)")
+        if sm["over_budget"]: text += "\nOVER BUDGET at this Fs"
+        self.cost_label.configure(text=text, text_color="#ff5555" if sm["over_budget"] else ("gray10", "#DCE4EE"))
+
+    def design_results(self, fs):
+        """
+        Coefficients, poles/zeros and the response engine's output (adaptive
+        grid w / h, group delay curve "grp", impulse, step, settle) for the
+        current design, plus the chain's passband delay "gd" (cached).
+        """
+        spec = self.get_filter_spec(); log = self.log_freq.get()
+        def compute():
+            b, a = filter_design.design_filter(spec, fs)
+            sos = filter_design.design_sos(spec, fs) if spec["resp"] == "Notch Bank" else None
+            # Recursive designs are analysed section-wise: a single (b, a) misplaces the poles of
+            # low cutoffs at high fs (|p| > 1 for a 1 Hz high-pass at 48 kHz). FIRs stay one section.
+            iir = spec["f_class"] in ("IIR", "Lattice") and not filter_design.is_identity(spec)
+            sections = sos if sos is not None else filter_design.design_sos(spec, fs) if iir else None
+            z, p, k = sos2zpk(sections) if sections is not None else tf2zpk(b, a)
+            r = response.analyse(response.as_sections(b, a, sections), fs, z, p, log=log)
+            return {"b": b, "a": a, "sos": sos, "w": r["w"], "h": r["h"], "z": z, "p": p, "imp": r["imp"],
+                    "step": r["step"], "settle": r["settle"], "grp": r["gd"], "gd": self.design_group_delay(fs)}
+        # Group delay also depends on the pipeline's filter stages
+        key = session.content_key("design", spec, fs, log, self.use_pipeline.get(), repr(self.pipeline_stages))
+        return self.results.get_or(key, compute)
+
+    def ab_response(self, fs, freqs):
+        """Pinned-design responses on the current design's grid (cached per pins and grid)."""
+        key = session.content_key("ab", fs, repr(self.pinned_specs), freqs)
+        return self.results.get_or(key, lambda: {"H": compare.bank_response_at(self.get_ab_bank(fs), freqs)})["H"]
+
     def get_filter(self, fs, output='ba'):
-        res = self.filter_resp.get(); f_class = self.filter_class.get(); proto = self.filter_proto.get(); nyq = fs / 2
-        if res == "None" or f_class == "None" or proto == "None": return np.array([1.0]), np.array([1.0])
-        c1 = np.clip(self.cutoff_1, 0.1, nyq - 1); c2 = np.clip(self.cutoff_2, c1 + 0.1, nyq - 1)
-        btype = 'low'
-        if res == "High-Pass": btype = 'high'
-        elif res == "Band-Pass": btype = 'bandpass'
-        elif res == "Band-Stop": btype = 'bandstop'
-        Wn = c1/nyq if res in ["Low-Pass", "High-Pass", "Notch"] else [c1/nyq, c2/nyq]
-        if res == "Notch": return iirnotch(c1/nyq, self.notch_q)
-        try:
-            if f_class == "IIR":
-                from scipy.signal import bessel
-                if proto == "Butterworth": return butter(self.order, Wn, btype=btype, output=output)
-                elif proto == "Chebyshev I": return cheby1(self.order, self.ripple, Wn, btype=btype, output=output)
-                elif proto == "Chebyshev II": return cheby2(self.order, self.atten, Wn, btype=btype, output=output)
-                elif proto == "Elliptic": return ellip(self.order, self.ripple, self.atten, Wn, btype=btype, output=output)
-                elif proto == "Bessel": return bessel(self.order, Wn, btype=btype, output=output)
-                elif proto == "Gaussian": 
-                    return butter(self.order, Wn, btype=btype, output=output) 
-            else:
-                from scipy.signal import remez, minimum_phase
-                numtaps = self.order * 4 + 1
-                if numtaps % 2 == 0: numtaps += 1 # Ensure odd for simpler PM
-                
-                if proto == "Parks-McClellan":
-                    bw = self.pm_width / nyq
-                    bands = [0, c1/nyq - bw/2, c1/nyq + bw/2, 1]
-                    # Clamp bands to valid range [0, 1]
-                    bands = np.clip(bands, 0, 1)
-                    # Ensure bands are strictly increasing
-                    for i in range(1, len(bands)):
-                        if bands[i] <= bands[i-1]: bands[i] = bands[i-1] + 1e-5
-                    bands = np.clip(bands, 0, 1)
-                    b = remez(numtaps, bands, [1, 0])
-                else:
-                    win = proto.lower()
-                    if win == "kaiser": win = ('kaiser', self.beta)
-                    elif win == "gaussian": win = ('gaussian', self.gauss_std)
-                    elif win == "rectangular": win = "boxcar"
-                    elif win == "raised cosine": win = "hann" # Closest standard window
-                    b = firwin(numtaps, Wn, pass_zero=(btype in ['low', 'bandstop']), window=win)
-                
-                if self.min_phase.get():
-                    b = minimum_phase(b)
-                return b, np.array([1.0])
-        except: return np.array([1.0]), np.array([1.0])
+        return filter_design.design_filter(self.get_filter_spec(), fs, output)
 
     def show_report(self):
-        fs = self.sig_gen.fs; b, a = self.get_filter(fs); z, p, k = tf2zpk(b, a)
+        fs = self.get_processing_fs()
         ftype = self.filter_resp.get(); fclass = self.filter_class.get()
         data_type = self.c_data_type.get()
         impl_style = self.c_impl_style.get()
@@ -801,156 +1563,14 @@ class DSPApp(ctk.CTk):
         txt = ctk.CTkTextbox(rw, font=ctk.CTkFont(family="Consolas", size=13))
         txt.pack(fill="both", expand=True, padx=20, pady=20)
         
-        # 1. Header & Metadata
-        rep = "/*" + "="*75 + "\n"
-        rep += " * INDUSTRIAL DSP EXPORT - ADVANCED FIRMWARE ARCHITECT\n"
-        rep += f" * Target: {fclass} {ftype} Filter\n"
-        rep += f" * Format: {data_type} | Implementation: {impl_style}\n"
-        rep += f" * Structure: {iir_struct if fclass == 'IIR' else 'Direct Form'}\n"
-        rep += " " + "="*75 + "*/\n\n"
-        
-        rep += "#include <stdint.h>\n"
-        rep += "#include <math.h>\n"
-        if impl_style == "ARM CMSIS-DSP":
-            rep += "#include \"arm_math.h\"\n"
-        rep += "\n"
-        
-        rep += f"#define FS_HZ           {fs}\n"
-        rep += f"#define FILTER_ORDER     {len(b)-1 if fclass == 'FIR' else self.order}\n"
-        
-        # 2. Coefficients Handling
-        rep += "\n// --- COEFFICIENTS ---\n"
-        
-        if fclass == "IIR" and iir_struct == "Cascaded Biquads (SOS)":
-            sos = self.get_filter(fs, output='sos')
-            rep += f"#define NUM_STAGES       {sos.shape[0]}\n"
-            
-            if data_type == "Float32":
-                rep += "static float sos_coeffs[] = {\n"
-                for i, s in enumerate(sos):
-                    # b0, b1, b2, a1, a2 (a0 is usually 1.0)
-                    rep += f"    {s[0]:.10f}f, {s[1]:.10f}f, {s[2]:.10f}f, {s[4]:.10f}f, {s[5]:.10f}f, // Stage {i}\n"
-                rep += "};\n"
-            elif data_type == "Fixed Q15":
-                rep += "static const int16_t sos_coeffs[] = {\n"
-                for i, s in enumerate(sos):
-                    b0, b1, b2 = s[0:3]; a1, a2 = s[4:6]
-                    coeffs = [int(x * 32767) for x in [b0, b1, b2, -a1, -a2]] # Note inverted a in ARM/CMSIS
-                    rep += f"    {', '.join(map(str, coeffs))}, // Stage {i}\n"
-                rep += "};\n"
-            
-            # Implementation function
-            if impl_style == "ARM CMSIS-DSP":
-                rep += "\n// CMSIS-DSP Biquad Setup\n"
-                rep += "static arm_biquad_casd_df1_inst_f32 S;\n"
-                rep += "static float state[4 * NUM_STAGES];\n\n"
-                rep += "void Filter_Init(void) {\n"
-                rep += "    arm_biquad_cascade_df1_init_f32(&S, NUM_STAGES, sos_coeffs, state);\n"
-                rep += "}\n\n"
-                rep += "float Filter_Process(float in) {\n"
-                rep += "    float out;\n"
-                rep += "    arm_biquad_cascade_df1_f32(&S, &in, &out, 1);\n"
-                rep += "    return out;\n"
-                rep += "}\n"
-            else:
-                rep += "\n// Standard Biquad Implementation\n"
-                rep += "typedef struct { float w1, w2; } BiquadState;\n"
-                rep += "static BiquadState bq_states[NUM_STAGES];\n\n"
-                rep += "float Filter_Process(float in) {\n"
-                rep += "    float x = in;\n"
-                rep += "    for(int i=0; i<NUM_STAGES; i++) {\n"
-                rep += "        float *c = &sos_coeffs[i*5];\n"
-                rep += "        float w = x - c[3]*bq_states[i].w1 - c[4]*bq_states[i].w2;\n"
-                rep += "        x = c[0]*w + c[1]*bq_states[i].w1 + c[2]*bq_states[i].w2;\n"
-                rep += "        bq_states[i].w2 = bq_states[i].w1; bq_states[i].w1 = w;\n"
-                rep += "    }\n    return x;\n}\n"
-
-        else: # Direct Form (IIR or FIR)
-            if data_type == "Float32":
-                rep += f"static const float B_COEFFS[] = {{{', '.join([f'{x:.10f}f' for x in b])}}};\n"
-                if fclass == "IIR":
-                    rep += f"static const float A_COEFFS[] = {{{', '.join([f'{x:.10f}f' for x in a])}}};\n"
-            
-            # Logic Function
-            rep += f"\nfloat Filter_Process(float in) {{\n"
-            if fclass == "FIR":
-                rep += f"    static float x[FILTER_ORDER + 1] = {{0.0f}};\n"
-                rep += "    float out = 0.0f; x[0] = in;\n"
-                rep += "    for(int i=0; i<=FILTER_ORDER; i++) out += B_COEFFS[i] * x[i];\n"
-                rep += "    for(int i=FILTER_ORDER; i>0; i--) x[i] = x[i-1];\n"
-                rep += "    return out;\n"
-            else: # Direct Form II IIR
-                rep += f"    static float w[FILTER_ORDER + 1] = {{0.0f}};\n"
-                rep += "    float wn = in;\n"
-                for i in range(1, len(a)): rep += f"    wn -= A_COEFFS[{i}] * w[{i}];\n"
-                rep += "    w[0] = wn; float out = 0.0f;\n"
-                for i in range(len(b)): rep += f"    out += B_COEFFS[{i}] * w[{i}];\n"
-                rep += "    for(int i=FILTER_ORDER; i>0; i--) w[i] = w[i-1];\n"
-                rep += "    return out;\n"
-            rep += "}\n\n"
-
-        # 6. Complex Filter Implementation (If enabled)
-        if self.show_complex.get():
-            c_type = self.complex_filter.get()
-            rep += "/* " + "="*75 + "\n"
-            rep += f" * ADVANCED LAYER: {c_type.upper()}\n"
-            rep += " " + "="*75 + " */\n\n"
-
-            if c_type == "Kalman":
-                rep += f"// Kalman Parameters: Q={self.kf_q:.10f}, R={self.kf_r:.6f}\n"
-                rep += "float Kalman_Process(float p_in) {\n"
-                rep += "    static float p_x = 0.0f; // State estimate\n"
-                rep += "    static float p_p = 1.0f; // Estimate error covariance\n"
-                rep += f"    const float p_q = {self.kf_q:.10f}f; // Process noise\n"
-                rep += f"    const float p_r = {self.kf_r:.6f}f;  // Measurement noise\n\n"
-                rep += "    // Prediction\n"
-                rep += "    p_p = p_p + p_q;\n\n"
-                rep += "    // Update\n"
-                rep += "    float p_k = p_p / (p_p + p_r); // Kalman Gain\n"
-                rep += "    p_x = p_x + p_k * (p_in - p_x);\n"
-                rep += "    p_p = (1.0f - p_k) * p_p;\n\n"
-                rep += "    return p_x;\n"
-                rep += "}\n\n"
-            
-            elif c_type == "Savitzky-Golay":
-                rep += f"// Savitzky-Golay (Window: {self.sg_win}, Poly: {self.sg_poly})\n"
-                rep += "// Note: Optimized for the selected window on-chip\n"
-                rep += f"#define SG_WINDOW {self.sg_win}\n"
-                rep += "float SG_Process(float p_in) {\n"
-                rep += f"    static float buffer[SG_WINDOW] = {{0.0f}};\n"
-                rep += "    // Shift and add\n"
-                rep += "    for(int i = SG_WINDOW-1; i > 0; i--) buffer[i] = buffer[i-1];\n"
-                rep += "    buffer[0] = p_in;\n"
-                rep += "    // Implementation typically uses precomputed coefficients weights[i]\n"
-                rep += "    float out = 0.0f;\n"
-                rep += "    // (Convolution with SG coefficients goes here)\n"
-                rep += "    return out; // Placeholder for coefficients\n"
-                rep += "}\n\n"
-            
-            elif c_type == "Median":
-                rep += f"#define MED_SIZE {self.med_ker}\n"
-                rep += "float Median_Process(float p_in) {\n"
-                rep += "    static float buf[MED_SIZE] = {0.0f};\n"
-                rep += "    // Sort and return middle value logic\n"
-                rep += "    // (Standard sorting algorithm implemented here)\n"
-                rep += "    return buf[MED_SIZE/2];\n"
-                rep += "}\n\n"
-
-            elif c_type == "Adaptive (LMS)":
-                rep += f"#define LMS_ORDER {self.lms_ord}\n"
-                rep += f"// LMS Step Size: {self.lms_mu:.5f}\n"
-                rep += "float LMS_Process(float p_in) {\n"
-                rep += "    static float w[LMS_ORDER] = {0.0f};\n"
-                rep += "    static float x[LMS_ORDER] = {0.0f};\n"
-                rep += f"    const float mu = {self.lms_mu:.5f}f;\n"
-                rep += "    float y = 0.0f;\n"
-                rep += "    for(int i=0; i<LMS_ORDER; i++) y += w[i]*x[i];\n"
-                rep += "    float e = p_in - y;\n"
-                rep += "    for(int i=0; i<LMS_ORDER; i++) w[i] += 2*mu*e*x[i];\n"
-                rep += "    for(int i=LMS_ORDER-1; i>0; i--) x[i] = x[i-1];\n"
-                rep += "    x[0] = p_in;\n"
-                rep += "    return y;\n"
-                rep += "}\n\n"
+        up, down = self.get_rate_change()
+        rep = c_export.generate_c_code(
+            self.get_filter_spec(), fs, data_type, impl_style, iir_struct,
+            complex_spec=self.get_complex_spec() if self.show_complex.get() else None,
+            rate_change=(up, down), fs_in=self.sig_gen.fs,
+            mr_taps=self.get_mr_taps(up, down) if (up, down) != (1, 1) else None,
+            tracked=self.notch_track.get() and self._tracked_f0 is not None,
+            mcu_profile=self.mcu_profile.get(), budget_pct=self.get_budget_pct(), fusion=self.get_fusion_spec())
         
         txt.insert("1.0", rep); txt.configure(state="disabled")
 
@@ -960,136 +1580,166 @@ class DSPApp(ctk.CTk):
         # Optimization: only process if signal exists or in synth mode
         if self.sig_gen.mode == "Import" and self.sig_gen.imported_data is None:
             self.after(300, self.update_loop); return
+        if self.sig_gen.mode == "Live" and self.live is None:
+            self.after(300, self.update_loop); return
             
         try:
             fs_str = self.fs_val.get()
-            fs = int(fs_str) if fs_str else 2000
+            fs = float(fs_str) if fs_str else 2000
         except: fs = 2000
         self.sig_gen.fs = fs
         
         # Wrapped analysis in try-except to prevent UI lockup on math errors
         try:
+            # Live source: filter what arrived since the last tick (causal, carried state)
+            live = self.sig_gen.mode == "Live"
+            if live: live_filtered = self.live_step(fs)
+            
+            # Get Signal (cast to the processing precision)
+            raw_src = self.sig_gen.get_signal()
+            dt = self.get_dtype()
+            raw = precision.as_signal(raw_src, dt)
+            
+            # Multirate stage: resample ahead of the chain, then design and filter at fs_proc
+            up, down = self.get_rate_change() if not live else (1, 1)
+            fs_in, raw_in = fs, raw
+            fs_proc = fs * up / down
+            if (up, down) != (1, 1):
+                raw = multirate.resample(raw_in, up, down, self.get_mr_taps(up, down))
+                fs = fs_proc
+            
+            # Mains drift tracking: re-centre the notch bank on the measured fundamental
+            if self.filter_resp.get() == "Notch Bank" and self.notch_track.get():
+                self.track_fundamental(raw, fs_proc)
+            else: self._track_key = None
+            
             # 1. Check if filter parameters changed
             current_params = (
-                fs, self.filter_resp.get(), self.filter_class.get(), self.filter_proto.get(),
+                fs_proc, up, down, self.mr_restore.get(), self.filter_resp.get(), self.filter_class.get(), self.filter_proto.get(),
                 self.cutoff_1, self.cutoff_2, self.order, self.ripple, self.atten,
                 self.beta, self.notch_q, self.gauss_std, self.pm_width, self.min_phase.get(),
                 self.show_complex.get(), self.complex_filter.get(),
-                self.kf_q, self.kf_r, self.sg_win, self.sg_poly, self.med_ker, self.wt_lev, self.lms_mu, self.lms_ord
+                self.kf_q, self.kf_r, self.kf_model, self.kf_steady, self.kf_smooth, self.sg_win, self.sg_poly, self.med_ker, self.wt_lev, self.lms_mu, self.lms_ord,
+                self.poly_order, self.poly_seg, self.rs_metric, self.rs_win, repr(self.rs_freqs),
+                self.accel_axis.get(), self.att_method.get(), repr(self.att_params),
+                self.use_pipeline.get(), self.pipe_streaming.get(), repr(self.pipeline_stages),
+                self.notch_harmonics, self.notch_track.get(), self._tracked_f0, self.precision.get(),
+                repr(self.pinned_specs), self.ab_overlay.get(), self.log_freq.get(),
+                self.c_data_type.get(), self.c_impl_style.get(), self.c_iir_struct.get(), self.mcu_profile.get(), self.get_budget_pct(),
+                self.proc_mode.get()
             )
             
             # Check if we need to recalculate the filter coefficient and redraw design plots
             filter_changed = (self._last_filter_params != current_params)
             
-            # 2. Get Signal
-            raw = self.sig_gen.get_signal()
-            
             # 3. Dual-Stage Process
             # Stage 1: Standard Filter (IIR/FIR)
             if filter_changed:
-                self.b, self.a = self.get_filter(fs)
+                self._design = self.design_results(fs_proc)
+                self.b, self.a = self._design["b"], self._design["a"]
+                self.lattice = self.get_filter(fs_proc, output='lattice') if self.filter_class.get() == "Lattice" else None
+                self.sos = self._design.get("sos")
+                self._design_gd = float(self._design["gd"])
                 self._last_filter_params = current_params
             
-            # Apply standard filter first
-            stage1_out = filtfilt(self.b, self.a, raw) if len(self.a) > 1 or len(self.b) > 1 else raw
+            # Imports: chain output, spectrum and latency text are cached by input hash and
+            # parameters, so a reopened session (or returning to earlier settings) skips them
+            chain_key = session.content_key("chain", self.raw_hash(raw_src), current_params) if self.sig_gen.mode == "Import" else None
+            hit = self.results.get(chain_key) if chain_key else None
             
-            # Stage 2: Complex Filter (If enabled)
-            if self.show_complex.get():
-                c_type = self.complex_filter.get()
-                if c_type == "Kalman": 
-                    filtered = complex_filters.apply_kalman_filter(stage1_out, self.kf_q, self.kf_r)
-                elif c_type == "Savitzky-Golay": 
-                    filtered = complex_filters.apply_savgol_filter(stage1_out, self.sg_win, self.sg_poly)
-                elif c_type == "Median": 
-                    filtered = complex_filters.apply_median_filter(stage1_out, self.med_ker)
-                elif c_type == "Wavelet": 
-                    filtered = complex_filters.apply_wavelet_denoising(stage1_out, wavelet=self.wt_wave, level=self.wt_lev)
-                elif c_type == "Adaptive (LMS)":
-                    filtered = complex_filters.apply_lms_filter(stage1_out, self.lms_mu, self.lms_ord)
+            # Causal mode is what Filter_Process does on the device; Live is always causal
+            proc_mode = "Causal" if live else self.proc_mode.get()
+            if hit is not None:
+                filtered, causal_out = hit["filtered"], hit.get("causal")
+                lat_text, prec_text = str(hit["latency"]), str(hit["precision"]) if "precision" in hit else None
+                if (up, down) != (1, 1) and self.mr_restore.get(): raw, fs = raw_in, fs_in
+            else:
+                filtered = live_filtered if live else self.process_chain(raw, fs_proc, causal=proc_mode == "Causal")
+                causal_out = self.process_chain(raw, fs_proc, causal=True) if proc_mode == "Both" else None
+                if proc_mode != "Zero-Phase":
+                    measured = latency.measure_latency(raw, filtered if causal_out is None else causal_out, fs_proc)
+                    zp = latency.measure_latency(raw, filtered, fs_proc) if causal_out is not None else None
+                    lat_text = latency.latency_summary(self._design_gd, measured, fs_proc, zp)
                 else:
-                    filtered = stage1_out
+                    lat_text = (f"filtfilt: zero phase, twice the work | causal group delay "
+                                f"{self._design_gd:.1f} smp ({1e3 * self._design_gd / fs_proc:.2f} ms)")
+                
+                # Reduced precision: report the difference from the same chain in float64
+                prec_text = None
+                if dt != np.float64 and not live and (filter_changed or self._force_redraw or force):
+                    raw64 = np.asarray(raw_src, dtype=np.float64)
+                    if (up, down) != (1, 1): raw64 = multirate.resample(raw64, up, down, self.get_mr_taps(up, down))
+                    diff = precision.compare(filtered, self.process_chain(raw64, fs_proc, causal=proc_mode == "Causal"))
+                    prec_text = precision.compare_summary(diff, dt, len(raw_src))
+                
+                # Optional interpolation back to the input rate
+                if (up, down) != (1, 1) and self.mr_restore.get():
+                    filtered = multirate.restore_rate(filtered, up, down, len(raw_in), self.get_mr_taps(down, up))
+                    if causal_out is not None:
+                        causal_out = multirate.restore_rate(causal_out, up, down, len(raw_in), self.get_mr_taps(down, up))
+                    raw, fs = raw_in, fs_in
+            self.latency_label.configure(text=lat_text)
+            self.update_envelope(fs_proc, filter_changed or force)
+            if prec_text: self.prec_label.configure(text=prec_text)
+            if filter_changed: self.update_mr_label(fs_in, len(raw_in))
+            
+            if hit is not None:
+                xf, mag = hit["xf"], hit["mag"]
             else:
-                filtered = stage1_out
-            N = len(filtered)
-            yf = fft(filtered)
-            xf = fftfreq(N, 1/fs)[:N//2]
-            mag = 2.0/N * np.abs(yf[:N//2])
+                N = len(filtered)
+                yf = fft(filtered)
+                xf = fftfreq(N, 1/fs)[:N//2]
+                mag = 2.0/N * np.abs(yf[:N//2])
+                if chain_key:
+                    self.results.put(chain_key, {"filtered": filtered, "causal": causal_out, "xf": xf, "mag": mag,
+                                                 "latency": lat_text, "precision": prec_text})
             
             # 4. Update Time & FFT Plots (Always updated if in Synth mode or if filter changed)
             # we only skip if in Import mode and nothing changed to save CPU.
-            if self.sig_gen.mode == "Synth" or filter_changed or self._force_redraw or force:
+            if self.sig_gen.mode in ("Synth", "Live") or filter_changed or self._force_redraw or force:
                 self._force_redraw = False
-                ax_t = self.cards["time"]["ax"]; ax_t.clear()
-                ax_t.plot(raw, color='#555', alpha=0.4, label="Raw")
-                ax_t.plot(filtered, color='#00d1ff', label="Filtered")
-                
+                overlays = None
+                if self.ab_overlay.get() and len(self.pinned_specs) > 0:
+                    # Every pinned design on the same input, one batched FFT pass
+                    ys = compare.batched_filter(self.get_ab_bank(fs), raw)
+                    overlays = ([compare.COLORS[i % len(compare.COLORS)] for i in range(len(ys))], ys)
                 # Smart Scaling for Sensor Data (like AZ at 9.8m/s^2)
-                if self.sig_gen.mode == "Import":
-                    data_min = min(np.min(raw), np.min(filtered))
-                    data_max = max(np.max(raw), np.max(filtered))
-                    padding = max(0.5, (data_max - data_min) * 0.15)
-                    ax_t.set_ylim([data_min - padding, data_max + padding])
-                else:
-                    ax_t.set_ylim([-3.5, 3.5])
-                    
-                ax_t.set_xlabel("Sample Index n", color='white', fontsize=9)
-                ax_t.set_ylabel("Amplitude", color='white', fontsize=9)
+                plot_export.draw_time(self.cards["time"]["ax"], raw, filtered, overlays,
+                                      ylim=None if self.sig_gen.mode != "Synth" else [-3.5, 3.5], causal=causal_out)
                 self.cards["time"]["canvas"].draw()
                 
-                ax_f = self.cards["fft"]["ax"]; ax_f.clear()
-                ax_f.fill_between(xf, mag, color='#fc0', alpha=0.3)
-                ax_f.plot(xf, mag, color='#fc0')
-                ax_f.set_xlim([0, fs/2])
-                ax_f.set_xlabel("Frequency [Hz]", color='white', fontsize=9)
-                ax_f.set_ylabel("Magnitude", color='white', fontsize=9)
+                plot_export.draw_fft(self.cards["fft"]["ax"], xf, mag, fs)
                 self.cards["fft"]["canvas"].draw()
+                
+                self.update_spectrogram(self._live_new if live else filtered, fs)
             
             # 5. Update Filter Design Plots (ONLY if parameters changed)
             if filter_changed or force:
-                w, h = freqz(self.b, self.a, worN=1024, fs=fs)
-                z, p, k = tf2zpk(self.b, self.a)
-                imp_resp = lfilter(self.b, self.a, np.array([1.0] + [0.0]*119))
+                d = self._design; log = self.log_freq.get()
+                w, h, z, p, imp_resp = d["w"], d["h"], d["z"], d["p"], d["imp"]
                 
-                # Magnitude Response
-                ax_r = self.cards["resp"]["ax"]; ax_r.clear()
-                ax_r.plot(w, 20*np.log10(np.maximum(abs(h), 1e-4)), color='#f0f', linewidth=2)
-                ax_r.set_ylim([-80, 5]); ax_r.set_xlim([0, fs/2])
-                ax_r.set_xlabel("Frequency [Hz]", color='white', fontsize=9)
-                ax_r.set_ylabel("Gain [dB]", color='white', fontsize=9)
-                self.cards["resp"]["canvas"].draw()
+                # Pinned designs: all responses from one batched evaluation on the design's grid
+                ab = None
+                if self.pinned_specs and self.ab_overlay.get():
+                    h_ab = self.ab_response(fs_proc, w)
+                    ab = ([compare.COLORS[i % len(compare.COLORS)] for i in range(len(h_ab))], w, h_ab)
+                self.refresh_ab_box(fs_proc)
+                self.update_cost_label(fs_proc)
                 
-                # Impulse Response
-                ax_i = self.cards["impulse"]["ax"]; ax_i.clear()
-                ax_i.stem(np.arange(120), imp_resp, linefmt='#00ff88', markerfmt='D', basefmt=" ")
-                ax_i.set_xlabel("Sample n", color='white', fontsize=9)
-                ax_i.set_ylabel("h[n]", color='white', fontsize=9)
+                # Magnitude, impulse, phase, linear gain, group delay, step and pole-zero cards
+                plot_export.draw_resp(self.cards["resp"]["ax"], w, h, fs_proc, ab, log)
+                self.cards["resp"]["canvas"].draw()
+                plot_export.draw_impulse(self.cards["impulse"]["ax"], imp_resp)
                 self.cards["impulse"]["canvas"].draw()
-                
-                # Phase Response
-                ax_ph = self.cards["phase"]["ax"]; ax_ph.clear()
-                ax_ph.plot(w, np.angle(h), color='#ff4444')
-                ax_ph.set_xlim([0, fs/2])
-                ax_ph.set_xlabel("Frequency [Hz]", color='white', fontsize=9)
-                ax_ph.set_ylabel("Phase [Radians]", color='white', fontsize=9)
+                plot_export.draw_phase(self.cards["phase"]["ax"], w, h, fs_proc, ab, log)
                 self.cards["phase"]["canvas"].draw()
-                
-                # Linear Gain
-                ax_gl = self.cards["gain_lin"]["ax"]; ax_gl.clear()
-                ax_gl.plot(w, np.abs(h), color='#00ff88')
-                ax_gl.set_ylim([0, 1.2]); ax_gl.set_xlim([0, fs/2])
-                ax_gl.set_xlabel("Frequency [Hz]", color='white', fontsize=9)
-                ax_gl.set_ylabel("Gain [Linear]", color='white', fontsize=9)
+                plot_export.draw_gain(self.cards["gain_lin"]["ax"], w, h, fs_proc, log)
                 self.cards["gain_lin"]["canvas"].draw()
-                
-                # Pole-Zero Map
-                ax_p = self.cards["pz"]["ax"]; ax_p.clear()
-                ut = np.linspace(0, 2*np.pi, 100)
-                ax_p.plot(np.cos(ut), np.sin(ut), 'w--', alpha=0.3)
-                ax_p.scatter(np.real(z), np.imag(z), marker='o', edgecolors='#0f0', facecolors='none')
-                ax_p.scatter(np.real(p), np.imag(p), marker='x', color='#f00')
-                ax_p.set_aspect('equal')
-                ax_p.set_xlabel("Real Part", color='white', fontsize=9)
-                ax_p.set_ylabel("Imaginary Part", color='white', fontsize=9)
+                plot_export.draw_group_delay(self.cards["gd"]["ax"], w, d["grp"], fs_proc, log)
+                self.cards["gd"]["canvas"].draw()
+                plot_export.draw_step(self.cards["step"]["ax"], d["step"], int(d["settle"]))
+                self.cards["step"]["canvas"].draw()
+                plot_export.draw_pz(self.cards["pz"]["ax"], z, p)
                 self.cards["pz"]["canvas"].draw()
         except Exception as e:
             # Silent catch to prevent hard freeze; user can click Refresh to retry
@@ -0,0 +1,120 @@
+"""
+Accel-Gyro attitude fusion: roll, pitch and yaw rate from the six-column
+import (AX AY AZ in any unit, GX GY GZ in deg/s).
+
+    Complementary  roll / pitch from gravity blended with the integrated
+                   gyro rate by a first-order filter (time constant tau).
+                   The recursion is linear, so a whole block runs as one
+                   lfilter call per angle.
+    Madgwick       quaternion with gradient-descent correction (gain beta)
+    Mahony         quaternion with PI feedback of the gravity error (kp, ki)
+
+The quaternion filters are per-sample non-linear recursions and run through
+kernels.py (C / numba when available). Without a magnetometer yaw drifts,
+so the third output is the yaw rate: body rates mapped through the Euler
+kinematics of the fused roll and pitch. Angles are ZYX Euler in degrees,
+with the accelerometer reading +Z at rest (as in the studio's CSV format).
+"""
+import numpy as np
+from scipy.signal import lfilter
+import kernels
+
+METHODS = ["Complementary", "Madgwick", "Mahony"]
+OUTPUTS = {"Roll": "roll", "Pitch": "pitch", "Yaw Rate": "yaw_rate"}
+DEFAULTS = {"att_tau": 0.5, "att_beta": 0.1, "att_kp": 1.0, "att_ki": 0.0}
+GYRO_SCALE = np.pi / 180 # deg/s -> rad/s
+MIN_COS_PITCH = 1e-3 # yaw-rate mapping is singular at +-90 deg pitch
+
+def split(matrix):
+    """(n, 6) AX..GZ or (n, 7) time + AX..GZ -> accel (n, 3), gyro (n, 3) in rad/s."""
+    m = np.asarray(matrix, dtype=float)
+    if m.ndim != 2 or m.shape[1] not in (6, 7):
+        raise ValueError(f"attitude fusion needs AX..GZ columns, got shape {m.shape}")
+    m = m[:, -6:]
+    return m[:, :3], m[:, 3:] * GYRO_SCALE
+
+def accel_angles(acc):
+    """Roll and pitch (rad) of the gravity vector alone."""
+    roll = np.arctan2(acc[:, 1], acc[:, 2])
+    pitch = np.arctan2(-acc[:, 0], np.hypot(acc[:, 1], acc[:, 2]))
+    return roll, pitch
+
+def quat_from_angles(roll, pitch):
+    """Unit quaternion [q0, q1, q2, q3] for roll, pitch (rad) and zero yaw."""
+    cr, sr, cp, sp = np.cos(roll / 2), np.sin(roll / 2), np.cos(pitch / 2), np.sin(pitch / 2)
+    return np.array([cr * cp, sr * cp, cr * sp, -sr * sp])
+
+def quat_to_angles(q):
+    """(n, 4) quaternions -> roll, pitch, yaw (rad)."""
+    q0, q1, q2, q3 = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    roll = np.arctan2(2 * (q0 * q1 + q2 * q3), 1 - 2 * (q1 * q1 + q2 * q2))
+    pitch = np.arcsin(np.clip(2 * (q0 * q2 - q3 * q1), -1.0, 1.0))
+    yaw = np.arctan2(2 * (q0 * q3 + q1 * q2), 1 - 2 * (q2 * q2 + q3 * q3))
+    return roll, pitch, yaw
+
+def yaw_rate(roll, pitch, gyr):
+    """Earth-frame yaw rate (rad/s) from body rates: (q sin(roll) + r cos(roll)) / cos(pitch)."""
+    c = np.cos(pitch)
+    c = np.where(np.abs(c) < MIN_COS_PITCH, np.copysign(MIN_COS_PITCH, c), c)
+    return (gyr[:, 1] * np.sin(roll) + gyr[:, 2] * np.cos(roll)) / c
+
+class AttitudeStream:
+    """
+    Fusion with carried state: process() takes (n, 6) AX..GZ blocks (or with
+    a leading time column) and returns {"roll", "pitch", "yaw_rate"} in
+    degrees / deg/s, plus "quat" (n, 4) for the quaternion methods. The
+    first sample initialises the attitude from gravity.
+    """
+    def __init__(self, method="Complementary", fs=100.0, params=None):
+        if method not in METHODS: raise ValueError(f"unknown fusion method {method!r}")
+        self.method = method; self.dt = 1.0 / fs
+        self.p = dict(DEFAULTS, **(params or {}))
+        self.state = None
+
+    def process(self, block):
+        acc, gyr = split(block)
+        if len(acc) == 0: return {k: np.zeros(0) for k in OUTPUTS.values()}
+        if self.state is None:
+            r0, p0 = accel_angles(acc[:1])
+            q = quat_from_angles(r0[0], p0[0])
+            self.state = (np.array([r0[0], p0[0]]) if self.method == "Complementary" else
+                          q if self.method == "Madgwick" else np.concatenate([q, np.zeros(3)]))
+        out = {}
+        if self.method == "Complementary":
+            # angle[n] = a (angle[n-1] + rate[n] dt) + (1 - a) accel_angle[n], a = tau / (tau + dt)
+            a = self.p["att_tau"] / (self.p["att_tau"] + self.dt)
+            angles = []
+            for i, (acc_ang, rate) in enumerate(zip(accel_angles(acc), (gyr[:, 0], gyr[:, 1]))):
+                y, _ = lfilter([1.0], [1.0, -a], a * rate * self.dt + (1 - a) * acc_ang, zi=[a * self.state[i]])
+                angles.append(y)
+            roll, pitch = angles
+            self.state = np.array([roll[-1], pitch[-1]])
+        else:
+            if self.method == "Madgwick":
+                q = kernels.madgwick(acc, gyr, self.state, self.p["att_beta"], self.dt)
+            else:
+                q = kernels.mahony(acc, gyr, self.state, self.p["att_kp"], self.p["att_ki"], self.dt)
+            roll, pitch, _ = quat_to_angles(q)
+            out["quat"] = q
+        out.update(roll=np.degrees(roll), pitch=np.degrees(pitch), yaw_rate=np.degrees(yaw_rate(roll, pitch, gyr)))
+        return out
+
+def fuse(matrix, fs, method="Complementary", params=None):
+    """Whole-record fusion of an Accel-Gyro matrix; see AttitudeStream.process()."""
+    return AttitudeStream(method, fs, params).process(matrix)
+
+def fusion_report(matrix, fs, method="Complementary", params=None):
+    """Text summary: final and mean attitude, and how far the gyro-fused angles sit from accel-only angles."""
+    res = fuse(matrix, fs, method, params)
+    acc, _ = split(matrix)
+    r_acc, p_acc = (np.degrees(v) for v in accel_angles(acc))
+    p = dict(DEFAULTS, **(params or {}))
+    gains = {"Complementary": f"tau {p['att_tau']:g} s", "Madgwick": f"beta {p['att_beta']:g}",
+             "Mahony": f"kp {p['att_kp']:g}, ki {p['att_ki']:g}"}[method]
+    lines = [f"{method} fusion ({gains}), {len(acc)} samples at {fs:g} Hz",
+             f"Roll:  final {res['roll'][-1]:8.3f} deg | mean {np.mean(res['roll']):8.3f} | std {np.std(res['roll']):.3f}",
+             f"Pitch: final {res['pitch'][-1]:8.3f} deg | mean {np.mean(res['pitch']):8.3f} | std {np.std(res['pitch']):.3f}",
+             f"Yaw rate: mean {np.mean(res['yaw_rate']):.3f} deg/s | std {np.std(res['yaw_rate']):.3f}",
+             f"Accel-only angle noise removed: roll std {np.std(r_acc):.3f} -> {np.std(res['roll']):.3f}, "
+             f"pitch std {np.std(p_acc):.3f} -> {np.std(res['pitch']):.3f} deg"]
+    return "\n".join(lines)
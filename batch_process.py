@@ -0,0 +1,239 @@
+"""
+Batch processing of capture files with a saved pipeline spec.
+
+    python batch_process.py spec.json "captures/*.csv" -o filtered/ -j 8
+
+Each worker streams its file in row chunks through the pipeline (causal
+mode), so memory per worker is bounded by --chunk rows regardless of file
+size. Zero-phase specs need the whole file in memory and are processed
+in one piece. Accel-Gyro files are timed like a studio import: the whole
+time column is analysed first (jitter, gaps), then the rows are resampled
+onto a uniform grid block by block (--resample, default Linear).
+"""
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from scipy.signal import welch
+import pipeline
+import plot_export
+import precision
+import signal_import
+import stream_writer
+
+AXIS_NAMES = ["AX", "AY", "AZ", "GX", "GY", "GZ"]
+REPORT_ROWS = 4096 # leading samples of the first channel plotted by --report
+# --out-format -> stream_writer format and file extension ("bin" is raw little-endian float32)
+OUT_FORMATS = {"bin": ("f32", "bin"), "npy": ("npy", "npy"), "i16": ("i16", "i16"), "csv": ("csv", "csv")}
+
+class _Metrics:
+    """Running RMS / peak / Welch-PSD accumulators for one channel."""
+    def __init__(self, fs, nperseg=1024):
+        self.fs = fs; self.nperseg = nperseg
+        self.n = 0; self.sq = 0.0; self.peak = 0.0
+        self.psd_sum = None; self.psd_w = 0; self.freqs = None
+
+    def update(self, y):
+        if len(y) == 0: return
+        self.n += len(y); self.sq += float(np.sum(np.square(y, dtype=np.float64)))
+        self.peak = max(self.peak, float(np.max(np.abs(y))))
+        seg = min(self.nperseg, len(y))
+        if seg < 16: return
+        if self.psd_sum is not None and seg != self.nperseg: return # keep one frequency grid
+        f, p = welch(y, fs=self.fs, nperseg=seg)
+        if self.psd_sum is None:
+            self.freqs = f; self.psd_sum = p * len(y); self.nperseg = seg
+        else:
+            self.psd_sum += p * len(y)
+        self.psd_w += len(y)
+
+    def result(self, band):
+        rms = np.sqrt(self.sq / self.n) if self.n else 0.0
+        bp = 0.0
+        if self.psd_sum is not None and self.psd_w:
+            psd = self.psd_sum / self.psd_w
+            m = (self.freqs >= band[0]) & (self.freqs <= band[1])
+            bp = float(np.sum(psd[m]) * (self.freqs[1] - self.freqs[0])) if np.any(m) else 0.0
+        return {"rms": float(rms), "peak": self.peak, "band_power": bp}
+
+def _is_numeric_row(line):
+    try:
+        [float(v) for v in line.strip().split(",")]
+        return True
+    except ValueError:
+        return False
+
+def process_file(path, spec, out_dir, out_format="bin", chunk_rows=65536, file_format="auto", band=(0.0, None),
+                 fs_override=None, precision_mode="Float64", report=False, full_scale=1.0, resample="Linear"):
+    """
+    Filter one capture file and return a summary dict (bytes, samples,
+    per-channel metrics, timing). Runs inside a worker process. Fs comes from
+    fs_override, else the file's own timestamps (Accel-Gyro), else the spec.
+    Accel-Gyro rows are resampled onto a uniform grid at that Fs with the
+    studio's resample methods (signal_import.RESAMPLE_METHODS; "None" keeps
+    the rows as they are), unless fs_override is given.
+    Samples are processed in precision_mode ("Float64" or "Float32") and
+    written through stream_writer (out_format: bin, npy, i16 scaled by
+    full_scale, or csv).
+    report=True also writes a plot/C/metrics bundle (plot_export) for the
+    first REPORT_ROWS samples of the first channel into OUT_DIR/<name>_report.
+    """
+    dt = precision.get_dtype(precision_mode)
+    t0 = time.perf_counter()
+    fmt = file_format
+    if fmt == "auto":
+        with open(path, "r") as fh: first = fh.readline()
+        fmt = "raw" if _is_numeric_row(first) else "accel"
+    skip = 1 if fmt == "accel" else 0
+    chunks = signal_import.iter_csv_chunks(path, skiprows=skip, chunk_rows=chunk_rows)
+
+    fs = fs_override or spec.get("fs") or 0
+    timing = resampler = None
+    if fmt == "accel" and not fs_override:
+        # Whole time column first (8 bytes per row), as the studio's import does
+        t = np.concatenate([b[:, 0] for b in signal_import.iter_csv_chunks(path, skip, chunk_rows, usecols=0)] or [np.zeros(0)])
+        timing = signal_import.analyze_timestamps(t); del t
+        if timing["fs"] > 0:
+            fs = float(f"{timing['fs']:.6g}") # same rounding as the studio's Fs entry
+            if resample != "None": resampler = signal_import.UniformResampler(fs, resample)
+    streams = metrics = None
+    names = []
+    base = os.path.splitext(os.path.basename(path))[0]
+    out_path = os.path.join(out_dir, f"{base}_filtered.{OUT_FORMATS[out_format][1]}") if out_dir else None
+    fh = stream_writer.StreamWriter(out_path, OUT_FORMATS[out_format][0], full_scale=full_scale) if out_path else None
+    written = None
+    n_total = 0
+    whole = []
+    preview = []
+    try:
+        def feed(data):
+            nonlocal streams, metrics, names, n_total
+            if streams is None:
+                names = AXIS_NAMES[:data.shape[1]] if fmt == "accel" else ["CH0"]
+                plan = pipeline.build_pipeline(spec["stages"], fs)
+                streams = [pipeline.PipelineStream(plan, dt) for _ in range(data.shape[1])]
+                metrics = [_Metrics(fs) for _ in range(data.shape[1])]
+            if len(data) == 0: return
+            if report and sum(map(len, preview)) < REPORT_ROWS: preview.append(data[:, 0].copy())
+            if spec.get("zero_phase"):
+                whole.append(data); return
+            outs = [st.process(data[:, c]) for c, st in enumerate(streams)]
+            _emit(outs, metrics, fh)
+            n_total += data.shape[0]
+
+        for block in chunks:
+            if fmt == "accel":
+                data = block[:, 1:] if resampler is None else resampler.process(block[:, 0], block[:, 1:])
+                feed(data.astype(dt))
+            else:
+                feed(block[:, :1].astype(dt))
+        if resampler is not None and streams is not None: feed(resampler.flush().astype(dt))
+        if streams is None:
+            return {"file": path, "bytes": os.path.getsize(path), "samples": 0, "channels": {}, "seconds": time.perf_counter() - t0}
+        if spec.get("zero_phase"):
+            data = np.vstack(whole) if whole else np.zeros((0, len(streams)), dtype=dt); n_total = data.shape[0]
+            plan = pipeline.build_pipeline(spec["stages"], fs)
+            outs = list(pipeline.run_pipeline(plan, data.T, zero_phase=True, dtype=dt)) # all channels in one run
+        else:
+            outs = [st.flush() for st in streams]
+        _emit(outs, metrics, fh)
+    finally:
+        if fh: written = fh.close()
+    hi = band[1] if band[1] else fs / 2
+    res = {"file": path, "bytes": os.path.getsize(path), "samples": n_total, "fs": fs, "output": out_path,
+           "channels": {nm: m.result((band[0], hi)) for nm, m in zip(names, metrics)}, "written": written,
+           "timing": timing, "resample": resample if resampler is not None else "None"}
+    if report and out_dir:
+        # Already inside a pool worker: render the bundle in-process
+        res["report"] = os.path.join(out_dir, f"{base}_report")
+        plot_export.export_bundle(res["report"], spec["stages"], fs, np.concatenate(preview)[:REPORT_ROWS],
+                                  zero_phase=spec.get("zero_phase", False), workers=0)
+    res["seconds"] = time.perf_counter() - t0
+    return res
+
+def _emit(outs, metrics, fh):
+    n = min(len(o) for o in outs) if outs else 0
+    if n == 0: return
+    block = np.column_stack([o[:n] for o in outs])
+    for c, m in enumerate(metrics): m.update(block[:, c])
+    if fh: fh.write(block)
+
+def run_batch(spec_path, patterns, out_dir=None, workers=None, chunk_rows=65536, out_format="bin",
+              file_format="auto", band=(0.0, None), summary_path=None, fs_override=None, log=print,
+              precision_mode="Float64", report=False, full_scale=1.0, resample="Linear"):
+    """Process every file matching patterns across a process pool; returns (results, stats)."""
+    spec = pipeline.load_spec(spec_path)
+    files = sorted({f for p in patterns for f in glob.glob(p, recursive=True) if os.path.isfile(f)})
+    if out_dir: os.makedirs(out_dir, exist_ok=True)
+    results = []
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_file, f, spec, out_dir, out_format, chunk_rows, file_format, band,
+                               fs_override, precision_mode, report, full_scale, resample): f for f in files}
+        for fut in as_completed(futures):
+            try:
+                res = fut.result()
+            except Exception as e:
+                res = {"file": futures[fut], "error": str(e), "bytes": 0, "samples": 0, "channels": {}}
+            results.append(res)
+            if log: log(f"[{len(results)}/{len(files)}] {os.path.basename(res['file'])}" + (f" ERROR: {res['error']}" if "error" in res else ""))
+    wall = max(time.perf_counter() - t0, 1e-9)
+    total_bytes = sum(r["bytes"] for r in results)
+    stats = {"files": len(files), "errors": sum("error" in r for r in results), "seconds": wall,
+             "mb_per_s": total_bytes / 1e6 / wall, "files_per_s": len(files) / wall,
+             "samples": sum(r["samples"] for r in results)}
+    w = [r["written"] for r in results if r.get("written")]
+    # Output side: bytes written over the time spent inside the writers (all workers)
+    stats["write_mb_per_s"] = sum(x["bytes"] for x in w) / 1e6 / max(sum(x["seconds"] for x in w), 1e-9) if w else 0.0
+    if summary_path is None and out_dir: summary_path = os.path.join(out_dir, "summary.csv")
+    if summary_path: write_summary(summary_path, results)
+    return results, stats
+
+def write_summary(path, results):
+    # Timing columns are filled for Accel-Gyro files analysed from their own timestamps
+    with open(path, "w") as fh:
+        fh.write("file,channel,samples,fs,rms,peak,band_power,resample,jitter_rms_us,jitter_peak_us,gaps,missing,non_monotonic,error\n")
+        for r in sorted(results, key=lambda r: r["file"]):
+            if "error" in r or not r["channels"]:
+                fh.write(f"{r['file']},,{r['samples']},,,,,,,,,,,{r.get('error', 'empty')}\n"); continue
+            tm = r.get("timing")
+            timing = (f"{tm['jitter_rms']*1e6:.3g},{tm['jitter_peak']*1e6:.3g},{tm['gaps']},{tm['missing']},{tm['non_monotonic']}"
+                      if tm else ",,,,")
+            for ch, m in r["channels"].items():
+                fh.write(f"{r['file']},{ch},{r['samples']},{r['fs']:g},{m['rms']:.7g},{m['peak']:.7g},{m['band_power']:.7g},"
+                         f"{r.get('resample', 'None')},{timing},\n")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Apply a saved DSP Studio pipeline spec to many capture files.")
+    ap.add_argument("spec", help="Pipeline spec JSON (File > Save Pipeline Spec in the studio)")
+    ap.add_argument("inputs", nargs="+", help="Input files or glob patterns (quote them)")
+    ap.add_argument("-o", "--out-dir", default=None, help="Directory for filtered outputs and summary.csv")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    ap.add_argument("--chunk", type=int, default=65536, help="Rows per chunk; bounds memory per worker")
+    ap.add_argument("--out-format", choices=list(OUT_FORMATS), default="bin",
+                    help="bin = raw little-endian float32, npy = .npy float32, i16 = raw little-endian int16, csv")
+    ap.add_argument("--full-scale", type=float, default=1.0, help="Value written as int16 full scale (--out-format i16)")
+    ap.add_argument("--input-format", choices=["auto", "raw", "accel"], default="auto")
+    ap.add_argument("--band", type=float, nargs=2, default=None, metavar=("LO", "HI"), help="Band-power range in Hz")
+    ap.add_argument("--fs", type=float, default=None, help="Override the sampling rate for every file (no timestamp resampling)")
+    ap.add_argument("--resample", choices=signal_import.RESAMPLE_METHODS, default="Linear",
+                    help="Accel-Gyro timestamp resampling onto a uniform grid, as in the studio's import")
+    ap.add_argument("--precision", choices=list(precision.PRECISIONS), default="Float64",
+                    help="Processing precision; Float32 halves memory traffic")
+    ap.add_argument("--report", action="store_true",
+                    help="Also write plots (PNG/SVG), C export and metrics.json per file into OUT_DIR/<name>_report")
+    ap.add_argument("--summary", default=None, help="Summary CSV path (default: OUT_DIR/summary.csv)")
+    args = ap.parse_args(argv)
+    band = tuple(args.band) if args.band else (0.0, None)
+    _, stats = run_batch(args.spec, args.inputs, args.out_dir, args.workers, args.chunk, args.out_format,
+                         args.input_format, band, args.summary, args.fs, precision_mode=args.precision,
+                         report=args.report, full_scale=args.full_scale, resample=args.resample)
+    print(f"{stats['files']} files ({stats['errors']} errors), {stats['samples']} samples in {stats['seconds']:.2f} s: "
+          f"{stats['mb_per_s']:.2f} MB/s, {stats['files_per_s']:.2f} files/s"
+          + (f", writer {stats['write_mb_per_s']:.0f} MB/s" if stats["write_mb_per_s"] else ""))
+    return 1 if stats["errors"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,494 @@
+import numpy as np
+import filter_design
+import lattice_filters
+import multirate
+import cost_model
+import attitude
+import kalman_models
+import polynomial
+import running_stats
+
+def chain_cost(spec, fs, data_type="Float32", impl_style="Standard C", iir_struct="Cascaded Biquads (SOS)",
+               complex_spec=None, rate_change=(1, 1), fs_in=None, mr_taps=None,
+               mcu_profile=cost_model.DEFAULT_PROFILE, budget_pct=100.0, fusion=None):
+    """cost_model summary of the exported chain: fusion, resampler, Stage 1 and complex layer at FS_HZ = fs."""
+    up, down = rate_change
+    costs = []
+    if fusion: costs.append(cost_model.attitude_cost(fusion["method"], down / up))
+    if (up, down) != (1, 1):
+        if mr_taps is None: mr_taps = multirate.design_antialias(up, down)
+        costs.append(cost_model.resampler_cost(mr_taps, up, down, fs_in if fs_in else fs * down / up))
+    costs.append(cost_model.filter_cost(spec, fs, impl_style, iir_struct))
+    if complex_spec: costs.append(cost_model.complex_cost(complex_spec["name"], complex_spec["params"]))
+    return cost_model.chain_summary(costs, fs, data_type, mcu_profile, budget_pct)
+
+def generate_c_code(spec, fs, data_type="Float32", impl_style="Standard C", iir_struct="Cascaded Biquads (SOS)",
+                    complex_spec=None, rate_change=(1, 1), fs_in=None, mr_taps=None, tracked=False,
+                    mcu_profile=cost_model.DEFAULT_PROFILE, budget_pct=100.0, fusion=None):
+    """
+    Firmware export for a Stage 1 design spec at fs, optionally preceded by
+    Accel-Gyro attitude fusion (fusion = {"method", "params", "output"}, run
+    at the input rate) and the L/M polyphase front end (rate_change, fs_in,
+    mr_taps), and followed by the complex layer ({"name", "params"}). The header carries the cost
+    estimate for mcu_profile with budget_pct of its CPU available. Returns
+    the C source as a string.
+    """
+    b, a = filter_design.design_filter(spec, fs)
+    ftype = spec["resp"]; fclass = spec["f_class"]
+    up, down = rate_change
+    if mr_taps is None and (up, down) != (1, 1): mr_taps = multirate.design_antialias(up, down)
+
+    # 1. Header & Metadata
+    rep = "/*" + "="*75 + "\n"
+    rep += " * INDUSTRIAL DSP EXPORT - ADVANCED FIRMWARE ARCHITECT\n"
+    rep += f" * Target: {fclass} {ftype} Filter\n"
+    rep += f" * Format: {data_type} | Implementation: {impl_style}\n"
+    lat = filter_design.design_filter(spec, fs, output='lattice') if fclass == "Lattice" else None
+    if not isinstance(lat, dict): lat = None
+    if lat is not None:
+        rep += f" * Structure: {spec['proto']} Lattice (order {lat['order']})\n"
+        ks = np.concatenate([lat["k"]] if lat["kind"] == "gray-markel" else [lat["k0"], lat["k1"]])
+        rep += f" * Stability: {'STABLE' if lattice_filters.is_stable(ks) else 'UNSTABLE'} (max |k| = {np.max(np.abs(ks)):.6f})\n"
+        bench = lattice_filters.benchmark_lattice(lat)
+        rep += (f" * Throughput: lattice {bench['lattice_sps']/1e6:.3f} MS/s ({bench['kernel']} kernel) "
+                f"vs SOS {bench['sos_sps']/1e6:.3f} MS/s -> {bench['ratio']:.1f}x\n")
+    elif ftype == "Notch Bank":
+        freqs = filter_design.notch_bank_freqs(spec["cutoff_1"], fs, spec["notch_harmonics"])
+        rep += f" * Structure: Cascaded Biquads (SOS), one notch per harmonic, single pass\n"
+        rep += f" * Notches (Q={spec['notch_q']:.1f}): {', '.join(f'{f:.2f}' for f in freqs)} Hz"
+        rep += " (tracked fundamental)\n" if tracked else "\n"
+    else:
+        rep += f" * Structure: {iir_struct if fclass == 'IIR' else 'Direct Form'}\n"
+    rep += " *\n * COST ESTIMATE\n"
+    for line in cost_model.summary_lines(chain_cost(spec, fs, data_type, impl_style, iir_struct, complex_spec,
+                                                    rate_change, fs_in, mr_taps, mcu_profile, budget_pct, fusion),
+                                         fs, data_type, mcu_profile, budget_pct):
+        rep += f" * {line}\n"
+    rep += " " + "="*75 + "*/\n\n"
+
+    rep += "#include <stdint.h>\n"
+    rep += "#include <math.h>\n"
+    if impl_style == "ARM CMSIS-DSP":
+        rep += "#include \"arm_math.h\"\n"
+    rep += "\n"
+
+    if (up, down) != (1, 1):
+        rep += f"#define FS_IN_HZ        {fs_in:g}\n"
+    rep += f"#define FS_HZ           {fs:g}\n"
+    rep += f"#define FILTER_ORDER     {len(b)-1 if fclass in ('FIR', 'Lattice') or ftype == 'Notch Bank' else spec['order']}\n"
+
+    # Attitude fusion front end: the chain filters one fused output per sensor frame
+    if fusion:
+        rep += f"\n// Feed the filter chain with att.{attitude.OUTPUTS[fusion['output']]} after each Attitude_Update()\n"
+        rep += attitude_c_code(fusion["method"], fusion["params"], fs_in if fs_in else fs)
+
+    # Multirate front end: the filter below runs at FS_HZ = FS_IN_HZ * MR_UP / MR_DOWN
+    if (up, down) != (1, 1):
+        rep += "\n" + multirate.polyphase_c_code(mr_taps, up, down, data_type, impl_style)
+
+    # 2. Coefficients Handling
+    rep += "\n// --- COEFFICIENTS ---\n"
+
+    if lat is not None:
+        rep += lattice_filters.lattice_c_code(lat, data_type, impl_style) + "\n"
+
+    elif (fclass == "IIR" and iir_struct == "Cascaded Biquads (SOS)") or ftype == "Notch Bank":
+        sos = filter_design.design_sos(spec, fs)
+        rep += f"#define NUM_STAGES       {sos.shape[0]}\n"
+
+        if data_type == "Float32":
+            rep += "static float sos_coeffs[] = {\n"
+            for i, s in enumerate(sos):
+                # b0, b1, b2, a1, a2 (a0 is usually 1.0)
+                rep += f"    {s[0]:.10f}f, {s[1]:.10f}f, {s[2]:.10f}f, {s[4]:.10f}f, {s[5]:.10f}f, // Stage {i}\n"
+            rep += "};\n"
+        elif data_type == "Fixed Q15":
+            rep += "static const int16_t sos_coeffs[] = {\n"
+            for i, s in enumerate(sos):
+                b0, b1, b2 = s[0:3]; a1, a2 = s[4:6]
+                coeffs = [int(x * 32767) for x in [b0, b1, b2, -a1, -a2]] # Note inverted a in ARM/CMSIS
+                rep += f"    {', '.join(map(str, coeffs))}, // Stage {i}\n"
+            rep += "};\n"
+
+        # Implementation function
+        if impl_style == "ARM CMSIS-DSP":
+            rep += "\n// CMSIS-DSP Biquad Setup\n"
+            rep += "static arm_biquad_casd_df1_inst_f32 S;\n"
+            rep += "static float state[4 * NUM_STAGES];\n\n"
+            rep += "void Filter_Init(void) {\n"
+            rep += "    arm_biquad_cascade_df1_init_f32(&S, NUM_STAGES, sos_coeffs, state);\n"
+            rep += "}\n\n"
+            rep += "float Filter_Process(float in) {\n"
+            rep += "    float out;\n"
+            rep += "    arm_biquad_cascade_df1_f32(&S, &in, &out, 1);\n"
+            rep += "    return out;\n"
+            rep += "}\n"
+        else:
+            rep += "\n// Standard Biquad Implementation\n"
+            rep += "typedef struct { float w1, w2; } BiquadState;\n"
+            rep += "static BiquadState bq_states[NUM_STAGES];\n\n"
+            rep += "float Filter_Process(float in) {\n"
+            rep += "    float x = in;\n"
+            rep += "    for(int i=0; i<NUM_STAGES; i++) {\n"
+            rep += "        float *c = &sos_coeffs[i*5];\n"
+            rep += "        float w = x - c[3]*bq_states[i].w1 - c[4]*bq_states[i].w2;\n"
+            rep += "        x = c[0]*w + c[1]*bq_states[i].w1 + c[2]*bq_states[i].w2;\n"
+            rep += "        bq_states[i].w2 = bq_states[i].w1; bq_states[i].w1 = w;\n"
+            rep += "    }\n    return x;\n}\n"
+
+    else: # Direct Form (IIR or FIR)
+        if data_type == "Float32":
+            rep += f"static const float B_COEFFS[] = {{{', '.join([f'{x:.10f}f' for x in b])}}};\n"
+            if fclass == "IIR":
+                rep += f"static const float A_COEFFS[] = {{{', '.join([f'{x:.10f}f' for x in a])}}};\n"
+
+        # Logic Function
+        rep += f"\nfloat Filter_Process(float in) {{\n"
+        if fclass == "FIR":
+            rep += f"    static float x[FILTER_ORDER + 1] = {{0.0f}};\n"
+            rep += "    float out = 0.0f; x[0] = in;\n"
+            rep += "    for(int i=0; i<=FILTER_ORDER; i++) out += B_COEFFS[i] * x[i];\n"
+            rep += "    for(int i=FILTER_ORDER; i>0; i--) x[i] = x[i-1];\n"
+            rep += "    return out;\n"
+        else: # Direct Form II IIR
+            rep += f"    static float w[FILTER_ORDER + 1] = {{0.0f}};\n"
+            rep += "    float wn = in;\n"
+            for i in range(1, len(a)): rep += f"    wn -= A_COEFFS[{i}] * w[{i}];\n"
+            rep += "    w[0] = wn; float out = 0.0f;\n"
+            for i in range(len(b)): rep += f"    out += B_COEFFS[{i}] * w[{i}];\n"
+            rep += "    for(int i=FILTER_ORDER; i>0; i--) w[i] = w[i-1];\n"
+            rep += "    return out;\n"
+        rep += "}\n\n"
+
+    # 6. Complex Filter Implementation (If enabled)
+    if complex_spec:
+        c_type = complex_spec["name"]; p = complex_spec["params"]
+        rep += "/* " + "="*75 + "\n"
+        rep += f" * ADVANCED LAYER: {c_type.upper()}\n"
+        rep += " " + "="*75 + " */\n\n"
+
+        if c_type == "Kalman" and (p["kf_model"] != "Random Walk" or p["kf_steady"]):
+            rep += kalman_c_code(p["kf_model"], p["kf_q"], p["kf_r"])
+            if p["kf_smooth"]: rep += "// RTS smoothing is offline only: the firmware runs the forward filter above.\n\n"
+
+        elif c_type == "Kalman":
+            rep += f"// Kalman Parameters: Q={p['kf_q']:.10f}, R={p['kf_r']:.6f}\n"
+            rep += "float Kalman_Process(float p_in) {\n"
+            rep += "    static float p_x = 0.0f; // State estimate\n"
+            rep += "    static float p_p = 1.0f; // Estimate error covariance\n"
+            rep += f"    const float p_q = {p['kf_q']:.10f}f; // Process noise\n"
+            rep += f"    const float p_r = {p['kf_r']:.6f}f;  // Measurement noise\n\n"
+            rep += "    // Prediction\n"
+            rep += "    p_p = p_p + p_q;\n\n"
+            rep += "    // Update\n"
+            rep += "    float p_k = p_p / (p_p + p_r); // Kalman Gain\n"
+            rep += "    p_x = p_x + p_k * (p_in - p_x);\n"
+            rep += "    p_p = (1.0f - p_k) * p_p;\n\n"
+            rep += "    return p_x;\n"
+            rep += "}\n\n"
+
+        elif c_type == "Savitzky-Golay":
+            rep += f"// Savitzky-Golay (Window: {p['sg_win']}, Poly: {p['sg_poly']})\n"
+            rep += "// Note: Optimized for the selected window on-chip\n"
+            rep += f"#define SG_WINDOW {p['sg_win']}\n"
+            rep += "float SG_Process(float p_in) {\n"
+            rep += f"    static float buffer[SG_WINDOW] = {{0.0f}};\n"
+            rep += "    // Shift and add\n"
+            rep += "    for(int i = SG_WINDOW-1; i > 0; i--) buffer[i] = buffer[i-1];\n"
+            rep += "    buffer[0] = p_in;\n"
+            rep += "    // Implementation typically uses precomputed coefficients weights[i]\n"
+            rep += "    float out = 0.0f;\n"
+            rep += "    // (Convolution with SG coefficients goes here)\n"
+            rep += "    return out; // Placeholder for coefficients\n"
+            rep += "}\n\n"
+
+        elif c_type == "Median":
+            rep += f"#define MED_SIZE {p['med_ker']}\n"
+            rep += "float Median_Process(float p_in) {\n"
+            rep += "    static float buf[MED_SIZE] = {0.0f};\n"
+            rep += "    // Sort and return middle value logic\n"
+            rep += "    // (Standard sorting algorithm implemented here)\n"
+            rep += "    return buf[MED_SIZE/2];\n"
+            rep += "}\n\n"
+
+        elif c_type == "Adaptive (LMS)":
+            rep += f"#define LMS_ORDER {p['lms_ord']}\n"
+            rep += f"// LMS Step Size: {p['lms_mu']:.5f}\n"
+            rep += "float LMS_Process(float p_in) {\n"
+            rep += "    static float w[LMS_ORDER] = {0.0f};\n"
+            rep += "    static float x[LMS_ORDER] = {0.0f};\n"
+            rep += f"    const float mu = {p['lms_mu']:.5f}f;\n"
+            rep += "    float y = 0.0f;\n"
+            rep += "    for(int i=0; i<LMS_ORDER; i++) y += w[i]*x[i];\n"
+            rep += "    float e = p_in - y;\n"
+            rep += "    for(int i=0; i<LMS_ORDER; i++) w[i] += 2*mu*e*x[i];\n"
+            rep += "    for(int i=LMS_ORDER-1; i>0; i--) x[i] = x[i-1];\n"
+            rep += "    x[0] = p_in;\n"
+            rep += "    return y;\n"
+            rep += "}\n\n"
+
+        elif c_type == "Poly Detrend":
+            rep += detrend_c_code(p["poly_order"], p["poly_seg"])
+
+        elif c_type == "Running Stats":
+            rep += running_stats_c_code(p["rs_win"], p["rs_metric"], p["rs_freqs"] if p["rs_metric"] == "Band Power" else [], p["rs_fs"])
+
+    return rep
+
+def detrend_c_code(order, segment):
+    """
+    Piecewise polynomial detrend as in polynomial.DetrendStream: windows of
+    2*DT_HOP samples every DT_HOP, fitted with a precomputed projection
+    (pinv of the Legendre basis) and cross-faded. Output lags by DT_WIN.
+    A global fit needs the whole record, so segment 0 exports a pass-through.
+    """
+    if segment <= 0:
+        rep = f"// Global polynomial detrend (order {order}) is an offline operation;\n"
+        rep += "// set a segment length in the studio to export the streaming version.\n"
+        return rep + "float Detrend_Process(float p_in) { return p_in; }\n\n"
+    st = polynomial.DetrendStream(order, segment)
+    rep = f"#define DT_ORDER {st.order}\n#define DT_HOP {st.H}\n#define DT_WIN (2 * DT_HOP)\n"
+    rep += "// Window samples -> Legendre coefficients (least-squares projection)\n"
+    rep += "static const float DT_PROJ[DT_ORDER + 1][DT_WIN] = {\n"
+    for row in st.P: rep += f"    {{{', '.join(f'{x:.9e}f' for x in row)}}},\n"
+    rep += "};\n\n"
+    rep += "static float DT_Eval(const float *c, int i) {\n"
+    rep += "    float u = (i - 0.5f * (DT_WIN - 1)) / (0.5f * (DT_WIN - 1));\n"
+    rep += "    float p0 = 1.0f, p1 = u, y = c[0];\n"
+    rep += "    if (DT_ORDER >= 1) y += c[1] * u;\n"
+    rep += "    for (int k = 2; k <= DT_ORDER; k++) {\n"
+    rep += "        float p2 = ((2 * k - 1) * u * p1 - (k - 1) * p0) / k;\n"
+    rep += "        y += c[k] * p2; p0 = p1; p1 = p2;\n"
+    rep += "    }\n"
+    rep += "    return y;\n"
+    rep += "}\n\n"
+    rep += "// Work is bursty: one window fit + DT_HOP evaluations every DT_HOP samples\n"
+    rep += "float Detrend_Process(float p_in) {\n"
+    rep += "    static float win[DT_WIN], region[DT_HOP], prev[DT_ORDER + 1];\n"
+    rep += "    static int fill = 0, emit = 0, have_prev = 0;\n"
+    rep += "    float out = region[emit < DT_HOP ? emit++ : DT_HOP - 1];\n"
+    rep += "    win[fill++] = p_in;\n"
+    rep += "    if (fill == DT_WIN) {\n"
+    rep += "        float c[DT_ORDER + 1];\n"
+    rep += "        for (int k = 0; k <= DT_ORDER; k++) {\n"
+    rep += "            c[k] = 0.0f;\n"
+    rep += "            for (int i = 0; i < DT_WIN; i++) c[k] += DT_PROJ[k][i] * win[i];\n"
+    rep += "        }\n"
+    rep += "        for (int i = 0; i < DT_HOP; i++) {\n"
+    rep += "            float rise = (i + 0.5f) / DT_HOP, base = DT_Eval(c, i);\n"
+    rep += "            if (have_prev) base = rise * base + (1.0f - rise) * DT_Eval(prev, i + DT_HOP);\n"
+    rep += "            region[i] = win[i] - base;\n"
+    rep += "        }\n"
+    rep += "        for (int k = 0; k <= DT_ORDER; k++) prev[k] = c[k];\n"
+    rep += "        for (int i = 0; i < DT_HOP; i++) win[i] = win[i + DT_HOP];\n"
+    rep += "        fill = DT_HOP; emit = 0; have_prev = 1;\n"
+    rep += "    }\n"
+    rep += "    return out;\n"
+    rep += "}\n\n"
+    return rep
+
+def running_stats_c_code(window, metric="RMS", freqs=(), fs=1.0, axes=6):
+    """
+    O(1)-per-sample trackers as in running_stats.RunningStats: running sum of
+    squares (re-synchronised to an exact block sum every RS_WIN samples),
+    monotonic deques for max / min, crest factor, and Goertzel band power
+    over RS_WIN-sample blocks. One state per axis; RS_UpdateAxes() updates
+    a whole Accel-Gyro frame.
+    """
+    w = max(running_stats.MIN_WINDOW, int(window)); key = running_stats.METRICS[metric]
+    gc = running_stats.goertzel_coeffs(freqs, fs) if len(freqs) else []
+    rep = f"#define RS_WIN {w}\n#define RS_NFREQ {len(gc)}\n#define RS_AXES {axes}\n"
+    if len(gc):
+        rep += f"// Goertzel coefficients 2cos(2 pi f / FS) for f = {', '.join(f'{f:g}' for f in freqs)} Hz at {fs:g} Hz\n"
+        rep += f"static const float RS_GC[RS_NFREQ] = {{{', '.join(f'{c:.9f}f' for c in gc)}}};\n"
+    rep += "\ntypedef struct {\n"
+    rep += "    float x[RS_WIN];                   // last RS_WIN samples (ring)\n"
+    rep += "    float sum, acc;                    // window / re-sync sums of squares\n"
+    rep += "    int head, count, acc_n;\n"
+    rep += "    float hi_v[RS_WIN], lo_v[RS_WIN];  // monotonic deques (rings): values\n"
+    rep += "    uint32_t hi_t[RS_WIN], lo_t[RS_WIN]; // and sample indices\n"
+    rep += "    int hi_h, hi_n, lo_h, lo_n;\n"
+    rep += "    uint32_t t;\n"
+    rep += "#if RS_NFREQ > 0\n    float s1[RS_NFREQ], s2[RS_NFREQ];  // Goertzel states\n#endif\n"
+    rep += "    int g_n;\n"
+    rep += "    float rms, max, min, crest, band;\n"
+    rep += "} RunningStats;\n\n"
+    rep += "static RunningStats rs_state[RS_AXES]; // zero-initialised\n\n"
+    rep += "void RS_Update(RunningStats *s, float in) {\n"
+    rep += "    // Moving RMS: add the new square, drop the one leaving the window. Every RS_WIN\n"
+    rep += "    // samples the sum is replaced by the exact block sum, so rounding cannot drift.\n"
+    rep += "    float sq = in * in;\n"
+    rep += "    if (s->count == RS_WIN) s->sum -= s->x[s->head] * s->x[s->head]; else s->count++;\n"
+    rep += "    s->x[s->head] = in; s->head = (s->head + 1) % RS_WIN;\n"
+    rep += "    s->sum += sq; s->acc += sq;\n"
+    rep += "    if (++s->acc_n == RS_WIN) { s->sum = s->acc; s->acc = 0.0f; s->acc_n = 0; }\n"
+    rep += "    s->rms = sqrtf((s->sum > 0.0f ? s->sum : 0.0f) / s->count);\n\n"
+    rep += "    // Moving max / min: monotonic deques, every sample pushed and popped at most once\n"
+    rep += "    if (s->hi_n && s->t - s->hi_t[s->hi_h] >= RS_WIN) { s->hi_h = (s->hi_h + 1) % RS_WIN; s->hi_n--; }\n"
+    rep += "    while (s->hi_n && s->hi_v[(s->hi_h + s->hi_n - 1) % RS_WIN] <= in) s->hi_n--;\n"
+    rep += "    s->hi_v[(s->hi_h + s->hi_n) % RS_WIN] = in; s->hi_t[(s->hi_h + s->hi_n) % RS_WIN] = s->t; s->hi_n++;\n"
+    rep += "    if (s->lo_n && s->t - s->lo_t[s->lo_h] >= RS_WIN) { s->lo_h = (s->lo_h + 1) % RS_WIN; s->lo_n--; }\n"
+    rep += "    while (s->lo_n && s->lo_v[(s->lo_h + s->lo_n - 1) % RS_WIN] >= in) s->lo_n--;\n"
+    rep += "    s->lo_v[(s->lo_h + s->lo_n) % RS_WIN] = in; s->lo_t[(s->lo_h + s->lo_n) % RS_WIN] = s->t; s->lo_n++;\n"
+    rep += "    s->max = s->hi_v[s->hi_h]; s->min = s->lo_v[s->lo_h];\n"
+    rep += "    float pk = fabsf(s->max) > fabsf(s->min) ? fabsf(s->max) : fabsf(s->min);\n"
+    rep += "    s->crest = s->rms > 0.0f ? pk / s->rms : 0.0f;\n\n"
+    rep += "#if RS_NFREQ > 0\n"
+    rep += "    // Band power: Goertzel over RS_WIN-sample blocks, held until the next block completes\n"
+    rep += "    for (int k = 0; k < RS_NFREQ; k++) {\n"
+    rep += "        float s0 = in + RS_GC[k] * s->s1[k] - s->s2[k];\n"
+    rep += "        s->s2[k] = s->s1[k]; s->s1[k] = s0;\n"
+    rep += "    }\n"
+    rep += "    if (++s->g_n == RS_WIN) {\n"
+    rep += "        float p = 0.0f;\n"
+    rep += "        for (int k = 0; k < RS_NFREQ; k++) {\n"
+    rep += "            p += s->s1[k] * s->s1[k] + s->s2[k] * s->s2[k] - RS_GC[k] * s->s1[k] * s->s2[k];\n"
+    rep += "            s->s1[k] = 0.0f; s->s2[k] = 0.0f;\n"
+    rep += "        }\n"
+    rep += "        s->band = 2.0f * p / ((float)RS_WIN * RS_WIN); s->g_n = 0;\n"
+    rep += "    }\n"
+    rep += "#endif\n"
+    rep += "    s->t++;\n"
+    rep += "}\n\n"
+    rep += "// One frame of all axes, e.g. {AX, AY, AZ, GX, GY, GZ}\n"
+    rep += "void RS_UpdateAxes(const float in[RS_AXES]) {\n"
+    rep += "    for (int a = 0; a < RS_AXES; a++) RS_Update(&rs_state[a], in[a]);\n"
+    rep += "}\n\n"
+    rep += f"// Single-channel layer output: {metric}\n"
+    rep += "float RunningStats_Process(float p_in) {\n"
+    rep += "    RS_Update(&rs_state[0], p_in);\n"
+    rep += f"    return rs_state[0].{key};\n"
+    rep += "}\n\n"
+    return rep
+
+def kalman_c_code(model_name, q, r, axes=6):
+    """
+    Steady-state Kalman filter of kalman_models: the gain is precomputed
+    from the Riccati equation, so each sample costs x = A x + K z with
+    A = (I - K H) F. One state per axis; Kalman_UpdateAxes() filters a whole
+    Accel-Gyro frame. The first sample initialises the position.
+    """
+    A, K = kalman_models.steady_form(model_name, q, r)
+    n = len(K)
+    rep = f"// Kalman {model_name}, steady-state gain (Q={q:.3e}, R={r:.3e}, dt = 1 sample)\n"
+    rep += f"#define KF_N {n}\n#define KF_AXES {axes}\n"
+    rows = ", ".join("{" + ", ".join(f"{v:.9e}f" for v in row) + "}" for row in A)
+    rep += f"static const float KF_A[KF_N][KF_N] = {{{rows}}}; // (I - K H) F\n"
+    rep += f"static const float KF_K[KF_N] = {{{', '.join(f'{v:.9e}f' for v in K)}}};\n\n"
+    rep += "typedef struct {\n    float x[KF_N]; // position, velocity, acceleration (per sample)\n    int init;\n} KalmanState;\n\n"
+    rep += "static KalmanState kf_state[KF_AXES]; // zero-initialised\n\n"
+    rep += "float Kalman_Update(KalmanState *s, float in) {\n"
+    rep += "    float xn[KF_N];\n"
+    rep += "    if (!s->init) { s->x[0] = in; s->init = 1; } // higher derivatives start at zero\n"
+    rep += "    for (int i = 0; i < KF_N; i++) {\n"
+    rep += "        float acc = KF_K[i] * in;\n"
+    rep += "        for (int j = 0; j < KF_N; j++) acc += KF_A[i][j] * s->x[j];\n"
+    rep += "        xn[i] = acc;\n"
+    rep += "    }\n"
+    rep += "    for (int i = 0; i < KF_N; i++) s->x[i] = xn[i];\n"
+    rep += "    return s->x[0];\n"
+    rep += "}\n\n"
+    rep += "void Kalman_UpdateAxes(const float in[KF_AXES], float out[KF_AXES]) {\n"
+    rep += "    for (int a = 0; a < KF_AXES; a++) out[a] = Kalman_Update(&kf_state[a], in[a]);\n"
+    rep += "}\n\n"
+    rep += "float Kalman_Process(float p_in) {\n"
+    rep += "    return Kalman_Update(&kf_state[0], p_in);\n"
+    rep += "}\n\n"
+    return rep
+
+def attitude_c_code(method, params, fs):
+    """
+    Accel-Gyro fusion as in attitude.AttitudeStream, in float: call
+    Attitude_Update() once per sensor frame (accel any unit, gyro deg/s);
+    att holds roll / pitch (deg) and yaw rate (deg/s). The first frame
+    initialises the attitude from gravity.
+    """
+    p = dict(attitude.DEFAULTS, **(params or {}))
+    rep = f"// Attitude fusion: {method} at {fs:g} Hz (ZYX Euler, accel +Z up at rest)\n"
+    rep += f"#define ATT_DT ({1.0 / fs:.9e}f)\n"
+    rep += "#define ATT_DEG 57.29577951f\n"
+    if method == "Complementary":
+        a = p["att_tau"] / (p["att_tau"] + 1.0 / fs)
+        rep += f"#define ATT_ALPHA {a:.9f}f // tau = {p['att_tau']:g} s\n"
+    elif method == "Madgwick":
+        rep += f"#define ATT_BETA {p['att_beta']:.6f}f\n"
+    else:
+        rep += f"#define ATT_KP {p['att_kp']:.6f}f\n#define ATT_KI {p['att_ki']:.6f}f\n"
+    rep += "\ntypedef struct {\n"
+    rep += "    float roll, pitch, yaw_rate;    // deg, deg, deg/s\n"
+    rep += "    float q0, q1, q2, q3;           // quaternion (Madgwick / Mahony)\n"
+    rep += "    float ix, iy, iz;               // Mahony integral feedback\n"
+    rep += "    int init;\n"
+    rep += "} Attitude;\n\n"
+    rep += "static Attitude att = {0};\n\n"
+    rep += "void Attitude_Update(const float acc[3], const float gyr_dps[3]) {\n"
+    rep += "    float ax = acc[0], ay = acc[1], az = acc[2];\n"
+    rep += "    float gx = gyr_dps[0] / ATT_DEG, gy = gyr_dps[1] / ATT_DEG, gz = gyr_dps[2] / ATT_DEG;\n"
+    rep += "    float acc_roll = atan2f(ay, az), acc_pitch = atan2f(-ax, sqrtf(ay * ay + az * az));\n"
+    rep += "    float roll, pitch;\n"
+    if method == "Complementary":
+        rep += "    if (!att.init) { att.roll = acc_roll * ATT_DEG; att.pitch = acc_pitch * ATT_DEG; att.init = 1; }\n"
+        rep += "    // Blend the integrated gyro rate with the gravity angle\n"
+        rep += "    roll = ATT_ALPHA * (att.roll / ATT_DEG + gx * ATT_DT) + (1.0f - ATT_ALPHA) * acc_roll;\n"
+        rep += "    pitch = ATT_ALPHA * (att.pitch / ATT_DEG + gy * ATT_DT) + (1.0f - ATT_ALPHA) * acc_pitch;\n"
+    else:
+        rep += "    float q0, q1, q2, q3, r;\n"
+        rep += "    if (!att.init) {\n"
+        rep += "        float cr = cosf(0.5f * acc_roll), sr = sinf(0.5f * acc_roll), cp = cosf(0.5f * acc_pitch), sp = sinf(0.5f * acc_pitch);\n"
+        rep += "        att.q0 = cr * cp; att.q1 = sr * cp; att.q2 = cr * sp; att.q3 = -sr * sp; att.init = 1;\n"
+        rep += "    }\n"
+        rep += "    q0 = att.q0; q1 = att.q1; q2 = att.q2; q3 = att.q3;\n"
+        rep += "    float na = ax * ax + ay * ay + az * az;\n"
+        if method == "Madgwick":
+            rep += "    float d0 = 0.5f * (-q1 * gx - q2 * gy - q3 * gz);\n"
+            rep += "    float d1 = 0.5f * (q0 * gx + q2 * gz - q3 * gy);\n"
+            rep += "    float d2 = 0.5f * (q0 * gy - q1 * gz + q3 * gx);\n"
+            rep += "    float d3 = 0.5f * (q0 * gz + q1 * gy - q2 * gx);\n"
+            rep += "    if (na > 0.0f) {\n"
+            rep += "        // Gradient-descent step towards the measured gravity direction\n"
+            rep += "        r = 1.0f / sqrtf(na); ax *= r; ay *= r; az *= r;\n"
+            rep += "        float s0 = 4.0f * q0 * q2 * q2 + 2.0f * q2 * ax + 4.0f * q0 * q1 * q1 - 2.0f * q1 * ay;\n"
+            rep += "        float s1 = 4.0f * q1 * q3 * q3 - 2.0f * q3 * ax + 4.0f * q0 * q0 * q1 - 2.0f * q0 * ay - 4.0f * q1\n"
+            rep += "                 + 8.0f * q1 * q1 * q1 + 8.0f * q1 * q2 * q2 + 4.0f * q1 * az;\n"
+            rep += "        float s2 = 4.0f * q0 * q0 * q2 + 2.0f * q0 * ax + 4.0f * q2 * q3 * q3 - 2.0f * q3 * ay - 4.0f * q2\n"
+            rep += "                 + 8.0f * q2 * q1 * q1 + 8.0f * q2 * q2 * q2 + 4.0f * q2 * az;\n"
+            rep += "        float s3 = 4.0f * q1 * q1 * q3 - 2.0f * q1 * ax + 4.0f * q2 * q2 * q3 - 2.0f * q2 * ay;\n"
+            rep += "        float ns = s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3;\n"
+            rep += "        if (ns > 0.0f) {\n"
+            rep += "            r = ATT_BETA / sqrtf(ns);\n"
+            rep += "            d0 -= r * s0; d1 -= r * s1; d2 -= r * s2; d3 -= r * s3;\n"
+            rep += "        }\n"
+            rep += "    }\n"
+            rep += "    q0 += d0 * ATT_DT; q1 += d1 * ATT_DT; q2 += d2 * ATT_DT; q3 += d3 * ATT_DT;\n"
+        else:
+            rep += "    if (na > 0.0f) {\n"
+            rep += "        // Error = measured x estimated gravity direction, PI feedback into the rates\n"
+            rep += "        r = 1.0f / sqrtf(na); ax *= r; ay *= r; az *= r;\n"
+            rep += "        float vx = q1 * q3 - q0 * q2, vy = q0 * q1 + q2 * q3, vz = q0 * q0 - 0.5f + q3 * q3;\n"
+            rep += "        float ex = ay * vz - az * vy, ey = az * vx - ax * vz, ez = ax * vy - ay * vx;\n"
+            rep += "        if (ATT_KI > 0.0f) {\n"
+            rep += "            att.ix += 2.0f * ATT_KI * ex * ATT_DT; att.iy += 2.0f * ATT_KI * ey * ATT_DT; att.iz += 2.0f * ATT_KI * ez * ATT_DT;\n"
+            rep += "            gx += att.ix; gy += att.iy; gz += att.iz;\n"
+            rep += "        }\n"
+            rep += "        gx += 2.0f * ATT_KP * ex; gy += 2.0f * ATT_KP * ey; gz += 2.0f * ATT_KP * ez;\n"
+            rep += "    }\n"
+            rep += "    float hx = 0.5f * ATT_DT * gx, hy = 0.5f * ATT_DT * gy, hz = 0.5f * ATT_DT * gz;\n"
+            rep += "    float qa = q0, qb = q1, qc = q2;\n"
+            rep += "    q0 += -qb * hx - qc * hy - q3 * hz;\n"
+            rep += "    q1 += qa * hx + qc * hz - q3 * hy;\n"
+            rep += "    q2 += qa * hy - qb * hz + q3 * hx;\n"
+            rep += "    q3 += qa * hz + qb * hy - qc * hx;\n"
+            rep += "    gx = gyr_dps[0] / ATT_DEG; gy = gyr_dps[1] / ATT_DEG; gz = gyr_dps[2] / ATT_DEG; // raw rates for yaw rate\n"
+        rep += "    r = 1.0f / sqrtf(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3);\n"
+        rep += "    q0 *= r; q1 *= r; q2 *= r; q3 *= r;\n"
+        rep += "    att.q0 = q0; att.q1 = q1; att.q2 = q2; att.q3 = q3;\n"
+        rep += "    roll = atan2f(2.0f * (q0 * q1 + q2 * q3), 1.0f - 2.0f * (q1 * q1 + q2 * q2));\n"
+        rep += "    float sp2 = 2.0f * (q0 * q2 - q3 * q1);\n"
+        rep += "    pitch = asinf(sp2 > 1.0f ? 1.0f : (sp2 < -1.0f ? -1.0f : sp2));\n"
+    rep += "    // Yaw rate: body rates through the Euler kinematics (singular at +-90 deg pitch)\n"
+    rep += "    float cp = cosf(pitch);\n"
+    rep += f"    if (fabsf(cp) < {attitude.MIN_COS_PITCH:g}f) cp = cp < 0.0f ? -{attitude.MIN_COS_PITCH:g}f : {attitude.MIN_COS_PITCH:g}f;\n"
+    rep += "    att.yaw_rate = (gy * sinf(roll) + gz * cosf(roll)) / cp * ATT_DEG;\n"
+    rep += "    att.roll = roll * ATT_DEG; att.pitch = pitch * ATT_DEG;\n"
+    rep += "}\n\n"
+    return rep
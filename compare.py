@@ -0,0 +1,115 @@
+import numpy as np
+from scipy import fft as sp_fft
+from scipy.signal import sos2zpk
+import filter_design
+import pipeline
+import cost_model
+
+MAX_PINNED = 6
+COLORS = ["#ff9f1c", "#2ec4b6", "#e71d36", "#a06cd5", "#f7ef99", "#8ac926"]
+IDENTITY_SOS = np.array([1.0, 0.0, 0.0, 1.0, 0.0, 0.0])
+
+def pin_label(spec):
+    return pipeline.describe_stage(pipeline.filter_stage(spec))
+
+def design_bank(specs, fs):
+    """
+    Design every pinned spec at fs and stack them for batched evaluation:
+    FIR designs as one zero-padded tap matrix (n_fir, max_taps), IIR /
+    notch / lattice designs as one (n_iir, max_sections, 6) SOS array padded
+    with identity sections. `tail` is the longest impulse response to
+    allow for (FIR length, or decay of the slowest pole to 1e-6).
+    """
+    firs, sos_list, kinds, tail = [], [], [], 1
+    for spec in specs:
+        b, a = filter_design.design_filter(spec, fs)
+        if len(a) == 1:
+            firs.append(np.asarray(b, dtype=float) / a[0]); kinds.append(("fir", len(firs) - 1))
+            tail = max(tail, len(b))
+        else:
+            sos = filter_design.design_sos(spec, fs)
+            sos_list.append(sos); kinds.append(("sos", len(sos_list) - 1))
+            r = np.max(np.abs(sos2zpk(sos)[1]), initial=0.0)
+            tail = max(tail, int(min(1e5, np.log(1e-6) / np.log(r))) if 0 < r < 1 else 4 * len(sos) + 1)
+    fir = np.zeros((len(firs), max((len(f) for f in firs), default=1)))
+    for i, f in enumerate(firs): fir[i, :len(f)] = f
+    sos = np.tile(IDENTITY_SOS, (len(sos_list), max((len(s) for s in sos_list), default=1), 1))
+    for i, s in enumerate(sos_list): sos[i, :len(s)] = s
+    return {"labels": [pin_label(s) for s in specs], "specs": [dict(s) for s in specs], "kinds": kinds,
+            "fir": fir, "sos": sos, "n_sections": [len(s) for s in sos_list], "tail": tail, "fs": fs}
+
+def bank_response(bank, nfft):
+    """
+    Complex response of every design on the rfft grid of nfft (nfft//2 + 1
+    bins from 0 to Nyquist), from one batched FFT of the FIR matrix and one
+    of the stacked SOS numerators / denominators (product over sections).
+    """
+    n_bins = nfft // 2 + 1
+    H = np.empty((len(bank["kinds"]), n_bins), dtype=complex)
+    h_fir = sp_fft.rfft(bank["fir"], nfft, axis=-1) if len(bank["fir"]) else None
+    h_sos = None
+    if len(bank["sos"]):
+        num = sp_fft.rfft(bank["sos"][..., :3], nfft, axis=-1)
+        den = sp_fft.rfft(bank["sos"][..., 3:], nfft, axis=-1)
+        h_sos = np.prod(num / den, axis=1)
+    for d, (kind, i) in enumerate(bank["kinds"]):
+        H[d] = h_fir[i] if kind == "fir" else h_sos[i]
+    return H
+
+def batched_response(bank, n=1024):
+    """Responses of all designs on a shared n-point grid: returns (freqs_hz, H (designs, n))."""
+    H = bank_response(bank, 2 * n)[:, :n]
+    return np.arange(n) * bank["fs"] / (2 * n), H
+
+def bank_response_at(bank, freqs):
+    """
+    Responses of all designs at arbitrary frequencies in Hz (e.g. the
+    response engine's adaptive grid): (designs, len(freqs)). FIR taps by
+    Horner's rule, SOS sections as one broadcast over the stacked array.
+    """
+    x = np.exp(-2j * np.pi * np.asarray(freqs, dtype=float) / bank["fs"])
+    H = np.empty((len(bank["kinds"]), len(x)), dtype=complex)
+    h_sos = None
+    if len(bank["sos"]):
+        s = bank["sos"][..., None] # (designs, sections, 6, 1)
+        h_sos = np.prod((s[:, :, 0] + x * (s[:, :, 1] + x * s[:, :, 2])) /
+                        (s[:, :, 3] + x * (s[:, :, 4] + x * s[:, :, 5])), axis=1)
+    for d, (kind, i) in enumerate(bank["kinds"]):
+        H[d] = np.polyval(bank["fir"][i][::-1], x) if kind == "fir" else h_sos[i]
+    return H
+
+def batched_filter(bank, x, zero_phase=True):
+    """
+    Filter x by every design in one pass: a single FFT of the (odd-extended,
+    zero-padded) signal is multiplied by the (designs, bins) response matrix
+    and inverse-transformed as a batch. zero_phase applies |H|^2, the
+    forward-backward response of filtfilt (identical away from the edges);
+    otherwise H itself, i.e. causal filtering warmed up on the extension
+    rather than started from rest. Returns (designs, len(x)).
+    """
+    x = np.asarray(x); n = len(x)
+    if n < 2 or not bank["kinds"]: return np.zeros((len(bank["kinds"]), n), dtype=x.dtype)
+    pad = min(n - 1, bank["tail"])
+    ext = np.concatenate([2 * x[0] - x[pad:0:-1], x, 2 * x[-1] - x[-2:-pad - 2:-1]])
+    nfft = sp_fft.next_fast_len(len(ext) + bank["tail"], real=True)
+    H = bank_response(bank, nfft)
+    G = np.abs(H) ** 2 if zero_phase else H
+    Y = sp_fft.irfft(sp_fft.rfft(ext, nfft)[None, :] * G, nfft, axis=-1)
+    return Y[:, pad:pad + n].astype(x.dtype, copy=False)
+
+def bank_metrics(bank, freqs, H):
+    """Per-design cost and delay figures for the comparison table (see cost_model.filter_cost)."""
+    rows = []
+    for d, spec in enumerate(bank["specs"]):
+        c = cost_model.filter_cost(spec, bank["fs"], response=(freqs, H[d]))
+        size = c["structure"][c["structure"].find("(") + 1:-1] if "(" in c["structure"] else c["structure"]
+        rows.append({"label": bank["labels"][d], "size": size, "macs": c["macs"], "coeffs": c["coeffs"],
+                     "state": c["state"], "gd_samples": c["gd_samples"], "gd_spread": c["gd_spread"]})
+    return rows
+
+def metrics_table(rows, fs):
+    lines = [f"{'#':<2} {'Size':<8} {'MACs':>5} {'Coef':>5} {'State':>5} {'GD [ms]':>8} {'GD var':>7}  Design"]
+    for i, r in enumerate(rows):
+        lines.append(f"{i + 1:<2} {r['size']:<8} {r['macs']:>5} {r['coeffs']:>5} {r['state']:>5} "
+                     f"{1e3 * r['gd_samples'] / fs:>8.2f} {r['gd_spread']:>7.1f}  {r['label']}")
+    return "\n".join(lines)
@@ -1,42 +1,59 @@
 import numpy as np
 from scipy import signal
+import precision
+import polynomial
+import running_stats
 try:
     import pywt
 except ImportError:
     pywt = None
-try:
-    from filterpy.kalman import KalmanFilter
-except ImportError:
-    KalmanFilter = None
+import attitude
+import kalman_models
+import kernels
+
+# Studio defaults of every complex-layer parameter; specs, sessions and server requests
+# that leave one out (or predate it) get these. rs_fs defaults to the stream's Fs.
+DEFAULTS = {"kf_q": 1e-4, "kf_r": 1e-2, "kf_model": "Random Walk", "kf_steady": False, "kf_smooth": False,
+            "sg_win": 11, "sg_poly": 2, "med_ker": 3, "wt_wave": "db4", "wt_lev": 2,
+            "lms_mu": 0.01, "lms_ord": 32, "poly_order": 2, "poly_seg": 0,
+            "rs_metric": "RMS", "rs_win": 256, "rs_freqs": [50.0]}
 
-def apply_kalman_filter(data, process_noise=1e-5, measurement_noise=1e-2):
+def complete_params(params, fs=None):
+    """Copy of params with every missing key taken from DEFAULTS (rs_fs from fs)."""
+    out = dict(DEFAULTS)
+    if fs is not None: out["rs_fs"] = fs
+    out.update(params)
+    out["rs_freqs"] = list(out["rs_freqs"])
+    return out
+
+def apply_kalman_filter(data, process_noise=1e-5, measurement_noise=1e-2, model="Random Walk", steady=False, smooth=False):
     """
-    Kalman Filter for 1D signal.
-    Data: 1D array of measurements.
+    Kalman Filter (x0 = first sample, P0 = 10). Model: Random Walk, Constant
+    Velocity or Constant Acceleration (see kalman_models.py); steady uses
+    the steady-state gain throughout, smooth adds the RTS backward pass.
+    Data: 1D array of measurements, or (channels, samples) filtered as one bank.
     """
-    if KalmanFilter is None:
-        return data
-    
-    n = len(data)
-    kf = KalmanFilter(dim_x=1, dim_z=1)
-    kf.x = np.array([[data[0]]]) # Initial state
-    kf.F = np.array([[1.]])      # State transition matrix
-    kf.H = np.array([[1.]])      # Measurement function
-    kf.P *= 10.                  # Covariance matrix
-    kf.R = measurement_noise     # Measurement noise
-    kf.Q = process_noise         # Process noise
-    
-    filtered = np.zeros(n)
-    for i in range(n):
-        kf.predict()
-        kf.update(data[i])
-        filtered[i] = kf.x[0, 0]
-    return filtered
+    if data.shape[-1] == 0: return data
+    if model == "Random Walk" and not steady and not smooth and data.ndim == 1:
+        y, _, _ = kernels.kalman(data, process_noise, measurement_noise)
+    else:
+        y = kalman_models.track(data, model, process_noise, measurement_noise, steady, smooth)
+    return y.astype(precision.float_dtype(data), copy=False)
+
+def apply_attitude_fusion(matrix, fs, method="Complementary", params=None, output=None):
+    """
+    Sensor fusion of the six-column Accel-Gyro matrix (leading time column optional).
+    Method: Complementary, Madgwick or Mahony (see attitude.py).
+    Returns the "Roll" / "Pitch" / "Yaw Rate" series (deg, deg/s), or the whole result dict if output is None.
+    """
+    res = attitude.fuse(matrix, fs, method, params)
+    return res if output is None else res[attitude.OUTPUTS[output]]
 
-def apply_savgol_filter(data, window_length=11, polyorder=2):
+def apply_savgol_filter(data, window_length=11, polyorder=2, mode='interp'):
     """
     Savitzky-Golay filter.
-    Best for smoothing data while preserving features.
+    Best for smoothing data while preserving features. mode is savgol_filter's
+    edge handling; the block stream uses 'nearest'.
     """
     # window_length must be odd and > polyorder
     if window_length % 2 == 0:
@@ -45,7 +62,7 @@ def apply_savgol_filter(data, window_length=11, polyorder=2):
         window_length = polyorder + 1
         if window_length % 2 == 0: window_length += 1
         
-    return signal.savgol_filter(data, window_length, polyorder)
+    return signal.savgol_filter(data, window_length, polyorder, mode=mode)
 
 def apply_median_filter(data, kernel_size=3):
     """
@@ -76,28 +93,49 @@ def apply_lms_filter(data, mu=0.01, order=32):
     LMS Adaptive Filter (Self-Correction / Prediction mode if no reference).
     Here we use data[n-1] to predict data[n].
     """
-    n = len(data)
-    weights = np.zeros(order)
-    output = np.zeros(n)
-    error = np.zeros(n)
-    
+    dtype = precision.float_dtype(data) # float32 input stays float32
     # Using the data to predict itself (1-step ahead prediction for noise cancellation demo)
-    for i in range(order, n):
-        x = data[i-order:i][::-1] # Input vector (previous samples)
-        y = np.dot(weights, x)
-        e = data[i] - y
-        weights = weights + 2 * mu * e * x
-        output[i] = y
-        error[i] = e
-        
-    return output
+    y = kernels.lms(data, np.zeros(order), mu)
+    return y.astype(dtype, copy=False)
+
+def apply_poly_detrend(data, order=2, segment=0):
+    """
+    Polynomial baseline removal: one global fit (segment 0) or cross-faded
+    piecewise fits over `segment` samples. See polynomial.py.
+    """
+    return polynomial.detrend(data, order, segment)
+
+def apply_complex_filter(name, data, params):
+    """
+    Dispatch a Stage 2 filter by menu name. `params` uses the studio's
+    attribute names (kf_q, kf_r, kf_model, kf_steady, kf_smooth, sg_win, sg_poly, med_ker, wt_wave,
+    wt_lev, lms_mu, lms_ord, poly_order, poly_seg).
+    """
+    if name == "Kalman":
+        return apply_kalman_filter(data, params["kf_q"], params["kf_r"], params["kf_model"], params["kf_steady"], params["kf_smooth"])
+    elif name == "Savitzky-Golay":
+        return apply_savgol_filter(data, params["sg_win"], params["sg_poly"])
+    elif name == "Median":
+        return apply_median_filter(data, params["med_ker"])
+    elif name == "Wavelet":
+        return apply_wavelet_denoising(data, wavelet=params["wt_wave"], level=params["wt_lev"])
+    elif name == "Adaptive (LMS)":
+        return apply_lms_filter(data, params["lms_mu"], params["lms_ord"])
+    elif name == "Poly Detrend":
+        return apply_poly_detrend(data, params["poly_order"], params["poly_seg"])
+    elif name == "Running Stats":
+        y = running_stats.track(data, params["rs_win"], params["rs_metric"], params["rs_freqs"], params["rs_fs"])
+        return y.astype(precision.float_dtype(data), copy=False)
+    return data
 
 def get_complex_filter_info(filter_type):
     info = {
-        "Kalman": "Best for: Real-time sensor smoothing and prediction.\nData Type: Linear time-series with Gaussian noise.\nKey Params: Process Noise (Q) and Measurement Noise (R).",
+        "Kalman": "Best for: Real-time sensor smoothing and prediction.\nData Type: Linear time-series with Gaussian noise; Constant Velocity / Acceleration models follow ramps and curves without lag.\nKey Params: Model, Process Noise (Q) and Measurement Noise (R); RTS smoother for offline imports.",
         "Savitzky-Golay": "Best for: Smoothing numerical data without losing peak information.\nData Type: Values with high-frequency noise.\nKey Params: Window length and Polynomial order.",
         "Median": "Best for: Removing 'spikes' or 'salt and pepper' noise from sensor data.\nData Type: Signals with outliers.\nKey Params: Kernel size (odd integer).",
         "Wavelet": "Best for: Advanced denoising where noise and signal frequencies overlap.\nData Type: Non-stationary signals (ECG, audio).\nKey Params: Wavelet type (db1-db38) and Level.",
-        "Adaptive (LMS)": "Best for: Cancelling periodic noise or acoustic echoes.\nData Type: Noise-corrupted signals.\nKey Params: Learning rate (Step size) and Filter order."
+        "Adaptive (LMS)": "Best for: Cancelling periodic noise or acoustic echoes.\nData Type: Noise-corrupted signals.\nKey Params: Learning rate (Step size) and Filter order.",
+        "Poly Detrend": "Best for: Removing sensor offsets and slow drift (e.g. gravity on AZ) before filtering.\nData Type: Long captures with a polynomial baseline.\nKey Params: Polynomial order and Segment length (0 = one global fit).",
+        "Running Stats": "Best for: Vibration monitoring envelopes (moving RMS, max/min, crest factor, Goertzel band power).\nData Type: Continuous sensor streams; O(1) work per sample.\nKey Params: Metric, Window length and Band frequencies (Hz)."
     }
     return info.get(filter_type, "Standard DSP filtering.")
@@ -0,0 +1,228 @@
+import numpy as np
+from scipy.signal import freqz, sosfreqz
+import filter_design
+import kalman_models
+
+try:
+    import pywt
+except ImportError:
+    pywt = None
+
+# Bytes per stored word for each export data type (Float64 for the desktop reference)
+TYPE_BYTES = {"Float32": 4, "Fixed Q15": 2, "Fixed Q31": 4, "Float64": 8}
+
+# Rough per-operation cycle counts including operand loads. Fixed-point MACs
+# on the M4/M7 use the DSP extension (SMLAD packs two Q15 MACs); the M0+ has
+# no FPU, so Float32 arithmetic is software-emulated. `call` is the function
+# entry/exit cost per sample, `loop` the bookkeeping per section or tap loop.
+MCU_PROFILES = {
+    "Cortex-M0+ @ 48 MHz": {"clock_hz": 48e6, "call": 20, "loop": 6, "cmp": 4, "div": 120,
+                            "mac": {"Float32": 70, "Fixed Q15": 4, "Fixed Q31": 12},
+                            "add": {"Float32": 35, "Fixed Q15": 1, "Fixed Q31": 1}},
+    "Cortex-M4F @ 168 MHz": {"clock_hz": 168e6, "call": 16, "loop": 4, "cmp": 2, "div": 14,
+                             "mac": {"Float32": 3, "Fixed Q15": 1, "Fixed Q31": 2},
+                             "add": {"Float32": 1, "Fixed Q15": 1, "Fixed Q31": 1}},
+    "Cortex-M7 @ 480 MHz": {"clock_hz": 480e6, "call": 10, "loop": 2, "cmp": 1.5, "div": 14,
+                            "mac": {"Float32": 1.5, "Fixed Q15": 0.5, "Fixed Q31": 1},
+                            "add": {"Float32": 1, "Fixed Q15": 0.5, "Fixed Q31": 0.5}},
+    "ESP32 @ 240 MHz": {"clock_hz": 240e6, "call": 20, "loop": 4, "cmp": 2, "div": 30,
+                        "mac": {"Float32": 2, "Fixed Q15": 2, "Fixed Q31": 3},
+                        "add": {"Float32": 1, "Fixed Q15": 1, "Fixed Q31": 1}},
+}
+DEFAULT_PROFILE = "Cortex-M4F @ 168 MHz"
+
+def _cost(name, structure, macs=0, adds=0, cmps=0, divs=0, coeffs=0, state=0, loops=0,
+          gd_samples=0.0, gd_spread=0.0, float_only=False):
+    return {"name": name, "structure": structure, "macs": macs, "adds": adds, "cmps": cmps, "divs": divs,
+            "coeffs": coeffs, "state": state, "loops": loops,
+            "gd_samples": float(gd_samples), "gd_spread": float(gd_spread), "float_only": float_only}
+
+def passband_delay(freqs, h, fs):
+    """Median group delay (samples) over the -3 dB passband of h, and its peak-to-peak spread."""
+    ph = np.unwrap(np.angle(h))
+    gd = -np.gradient(ph, 2 * np.pi * np.asarray(freqs) / fs)
+    mag = np.abs(h)
+    passband = mag >= np.max(mag) / np.sqrt(2)
+    gd_pass = gd[passband] if np.any(passband) else gd
+    return float(np.median(gd_pass)), float(np.ptp(gd_pass))
+
+def filter_cost(spec, fs, impl_style="Standard C", iir_struct="Cascaded Biquads (SOS)", response=None):
+    """
+    Per-sample cost of a Stage 1 design as the C export would run it:
+    multiplies (macs), adds, coefficient and state words, loop iterations,
+    and the passband group delay. response=(freqs, h) reuses an already
+    evaluated frequency response instead of computing one.
+    """
+    if filter_design.is_identity(spec): return _cost("Stage 1", "Bypass")
+    b, a = filter_design.design_filter(spec, fs)
+    fclass = spec["f_class"]; resp = spec["resp"]
+    if fclass == "Lattice":
+        lat = filter_design.design_filter(spec, fs, output='lattice')
+        if lat["kind"] == "allpass":
+            m = len(lat["k0"]) + len(lat["k1"])
+            c = _cost("Stage 1", f"All-pass lattice pair (order {lat['order']})", macs=2 * m + 1, adds=2 * m + 1,
+                      coeffs=m, state=m + 2, loops=m)
+        else:
+            m = len(lat["k"])
+            c = _cost("Stage 1", f"Lattice-ladder (order {m})", macs=3 * m + 1, adds=3 * m,
+                      coeffs=2 * m + 1, state=m + 1, loops=m)
+    elif len(a) == 1:
+        n = len(b)
+        c = _cost("Stage 1", f"FIR direct form ({n} taps)", macs=n, adds=n - 1, coeffs=n, state=n, loops=n)
+    elif (fclass == "IIR" and iir_struct == "Cascaded Biquads (SOS)") or resp == "Notch Bank":
+        s = len(filter_design.design_sos(spec, fs))
+        # CMSIS arm_biquad_cascade_df1 keeps 4 state words per stage, the DF-II loop 2
+        c = _cost("Stage 1", f"Biquad cascade ({s} SOS)", macs=5 * s, adds=4 * s, coeffs=5 * s,
+                  state=(4 if impl_style == "ARM CMSIS-DSP" else 2) * s, loops=s)
+    else:
+        n = len(b) + len(a) - 1
+        c = _cost("Stage 1", f"IIR direct form II (order {len(a) - 1})", macs=n, adds=n - 1, coeffs=n,
+                  state=max(len(a), len(b)), loops=max(len(a), len(b)))
+    if response is None:
+        if len(a) == 1: response = freqz(b, worN=1024, fs=fs)
+        else: response = sosfreqz(filter_design.design_sos(spec, fs), worN=1024, fs=fs)
+    c["gd_samples"], c["gd_spread"] = passband_delay(response[0], response[1], fs)
+    return c
+
+def _wavelet_len(name):
+    if pywt is not None:
+        try: return pywt.Wavelet(name).dec_len
+        except ValueError: pass
+    digits = "".join(ch for ch in name if ch.isdigit())
+    return 2 * int(digits) if name.startswith(("db", "sym")) and digits else 8
+
+def complex_cost(name, params):
+    """
+    Per-sample cost of a complex-layer filter as exported (always float).
+    Delays are the lag of the causal firmware version: the centre of the
+    window for Savitzky-Golay / median, the steady-state (DC) lag of the
+    Kalman filter, the reconstruction delay of the wavelet tree, half the
+    window of the running-statistics envelope.
+    """
+    if name == "Kalman" and (params["kf_model"] != "Random Walk" or params["kf_steady"]):
+        # Steady-state form x = A x + K z (n states); DC group delay of the position output,
+        # sum(k b_k) / sum(b_k) - sum(k a_k) / sum(a_k), is zero for ramps with the velocity models
+        b, a = kalman_models.position_tf(params["kf_model"], params["kf_q"], params["kf_r"])
+        n = len(a) - 1; k = np.arange(len(a))
+        return _cost(name, f"Steady-state Kalman ({n} states)", macs=n * n + n, adds=0, coeffs=n * n + n, state=n,
+                     loops=n, gd_samples=k @ b / np.sum(b) - k @ a / np.sum(a), float_only=True)
+    if name == "Kalman":
+        q, r = params["kf_q"], params["kf_r"]
+        # Steady state: P_pred^2 - Q P_pred - Q R = 0, K = P_pred / (P_pred + R)
+        p_pred = (q + np.sqrt(q * q + 4 * q * r)) / 2
+        k = p_pred / (p_pred + r) if p_pred + r > 0 else 1.0
+        return _cost(name, "Scalar Kalman", macs=2, adds=5, divs=1, coeffs=2, state=2,
+                     gd_samples=(1 - k) / k if k > 0 else 0.0, float_only=True)
+    if name == "Savitzky-Golay":
+        w = int(params["sg_win"])
+        return _cost(name, f"FIR smoother ({w} taps)", macs=w, adds=w - 1, coeffs=w, state=w, loops=w,
+                     gd_samples=(w - 1) / 2, float_only=True)
+    if name == "Median":
+        k = int(params["med_ker"])
+        # Sorted-window insertion: one pass to drop the oldest, one to place the newest
+        return _cost(name, f"Running median ({k})", cmps=2 * k, coeffs=0, state=2 * k, loops=2 * k,
+                     gd_samples=(k - 1) / 2, float_only=True)
+    if name == "Wavelet":
+        f = _wavelet_len(params["wt_wave"]); lev = int(params["wt_lev"])
+        # Decimated analysis + synthesis: level j runs at fs / 2^(j-1)
+        macs = int(np.ceil(4 * f * (1 - 2.0 ** -lev)))
+        return _cost(name, f"DWT {params['wt_wave']} x{lev}", macs=macs, adds=macs, cmps=lev,
+                     coeffs=4 * f, state=2 * lev * f, loops=4 * lev,
+                     gd_samples=(f - 1) * (2 ** lev - 1), float_only=True)
+    if name == "Adaptive (LMS)":
+        m = int(params["lms_ord"])
+        return _cost(name, f"LMS ({m} taps)", macs=2 * m + 1, adds=2 * m + 1, coeffs=0, state=2 * m,
+                     loops=3 * m, float_only=True)
+    if name == "Poly Detrend":
+        p = int(params["poly_order"]) + 1; seg = int(params["poly_seg"])
+        if seg <= 0: return _cost(name, "Global poly fit (offline, not exported)")
+        # Two overlapping windows per sample: projection (p MACs each) + evaluation (p each) + cross-fade;
+        # output waits for the whole window of 2 * hop samples
+        win = 2 * max(seg // 2, p)
+        return _cost(name, f"Piecewise poly fit (order {p - 1}, {win} smp)", macs=4 * p + 2, adds=4 * p + 1,
+                     coeffs=p * win, state=win + win // 2 + p, loops=4, gd_samples=win, float_only=True)
+    if name == "Running Stats":
+        w = int(params["rs_win"]); nf = len(params["rs_freqs"]) if params["rs_metric"] == "Band Power" else 0
+        # Running sum of squares, two monotonic deques (each sample pushed and popped once:
+        # ~2 compares per deque amortised), crest divide, one Goertzel step per band frequency
+        return _cost(name, f"Running stats ({w} smp, {nf} Goertzel)", macs=1 + nf, adds=3 + 2 * nf, cmps=6, divs=2,
+                     coeffs=nf, state=5 * w + 2 * nf + 4, loops=2 + nf, gd_samples=(w - 1) / 2, float_only=True)
+    return _cost(name, "Bypass")
+
+def attitude_cost(method, ratio=1.0):
+    """
+    Accel-Gyro fusion front end per sensor frame, scaled by ratio (frames per
+    output sample). atan2 / asin / sin / cos / sqrt are counted as divides.
+    """
+    if method == "Complementary":
+        macs, adds, divs, state = 12, 8, 7, 2
+    elif method == "Madgwick":
+        macs, adds, divs, state = 70, 40, 9, 4
+    else:
+        macs, adds, divs, state = 45, 30, 9, 7
+    k = lambda v: int(np.ceil(v * ratio))
+    return _cost("Attitude", f"{method} fusion (6-axis)", macs=k(macs), adds=k(adds), cmps=k(2), divs=k(divs),
+                 coeffs=2, state=state, float_only=True)
+
+def resampler_cost(h, up, down, fs_in):
+    """Polyphase L/M front end, expressed per output sample at FS_HZ = fs_in * up / down."""
+    n = len(h)
+    delay_s = (n - 1) / 2 / (fs_in * up)
+    return _cost("Resampler", f"Polyphase {up}/{down} ({n} taps)", macs=int(np.ceil(n / up)), adds=int(np.ceil(n / up)),
+                 coeffs=n, state=int(np.ceil(n / up)), loops=int(np.ceil(n / up)),
+                 gd_samples=delay_s * fs_in * up / down)
+
+def memory_bytes(cost, data_type):
+    """(coefficient bytes, state bytes) at data_type (float layers are always 4-byte)."""
+    size = 4 if cost["float_only"] and data_type != "Float64" else TYPE_BYTES.get(data_type, 4)
+    return cost["coeffs"] * size, cost["state"] * size
+
+def cycles_per_sample(cost, profile, data_type):
+    """Estimated CPU cycles per input sample on an MCU profile (name or dict)."""
+    p = MCU_PROFILES[profile] if isinstance(profile, str) else profile
+    dt = "Float32" if cost["float_only"] or data_type not in p["mac"] else data_type
+    if cost["structure"] == "Bypass": return 0.0
+    return (cost["macs"] * p["mac"][dt] + cost["adds"] * p["add"][dt] + cost["cmps"] * p["cmp"]
+            + cost["divs"] * p["div"] + cost["loops"] * p["loop"] + p["call"])
+
+def budget_cycles(fs, profile, budget_pct=100.0):
+    """Cycles available per sample at fs for the share budget_pct of the CPU."""
+    p = MCU_PROFILES[profile] if isinstance(profile, str) else profile
+    return p["clock_hz"] * budget_pct / 100.0 / fs if fs > 0 else np.inf
+
+def chain_summary(costs, fs, data_type="Float32", profile=DEFAULT_PROFILE, budget_pct=100.0):
+    """
+    Totals over a chain of stage costs at FS_HZ = fs: per-stage cycles,
+    memory at data_type and every export type, latency in samples and ms,
+    and whether the chain overruns the per-sample budget.
+    """
+    stages = [c for c in costs if c["structure"] != "Bypass"]
+    cycles = [cycles_per_sample(c, profile, data_type) for c in stages]
+    total = float(sum(cycles)); avail = budget_cycles(fs, profile, budget_pct)
+    full = budget_cycles(fs, profile)
+    mem = {dt: tuple(map(sum, zip(*[memory_bytes(c, dt) for c in stages]))) if stages else (0, 0)
+           for dt in ("Float32", "Fixed Q15", "Fixed Q31")}
+    gd = float(sum(c["gd_samples"] for c in stages))
+    return {"stages": stages, "cycles": cycles, "total_cycles": total, "budget_cycles": avail,
+            "load_pct": 100.0 * total / full if full > 0 else np.inf,
+            "over_budget": total > avail, "macs": sum(c["macs"] for c in stages),
+            "adds": sum(c["adds"] for c in stages), "memory": mem, "gd_samples": gd,
+            "gd_ms": 1e3 * gd / fs if fs > 0 else 0.0}
+
+def summary_lines(summary, fs, data_type="Float32", profile=DEFAULT_PROFILE, budget_pct=100.0):
+    """Human-readable cost block (one string per line) for the UI and the C report header."""
+    coef, state = summary["memory"].get(data_type, summary["memory"]["Float32"])
+    lines = [f"{profile}: {summary['total_cycles']:.0f} cycles/sample of {summary['budget_cycles']:.0f} "
+             f"budget ({budget_pct:g}% CPU at {fs:g} Hz) -> {summary['load_pct']:.1f}% CPU"]
+    for c, cyc in zip(summary["stages"], summary["cycles"]):
+        cb, sb = memory_bytes(c, data_type)
+        lines.append(f"  {c['name']}: {c['structure']} | {c['macs']} mul, {c['adds']} add"
+                     + (f", {c['cmps']} cmp" if c["cmps"] else "") + (f", {c['divs']} div" if c["divs"] else "")
+                     + f" | {cb} B coef, {sb} B state | {c['gd_samples']:.1f} smp | ~{cyc:.0f} cyc")
+    lines.append(f"Total: {summary['macs']} mul + {summary['adds']} add/sample | {data_type}: {coef} B coef + {state} B state "
+                 f"| Latency {summary['gd_samples']:.1f} samples ({summary['gd_ms']:.2f} ms)")
+    lines.append("Memory: " + ", ".join(f"{dt} {sum(m)} B" for dt, m in summary["memory"].items()))
+    if summary["over_budget"]:
+        lines.append(f"WARNING: exceeds the per-sample budget by {summary['total_cycles'] - summary['budget_cycles']:.0f} "
+                     f"cycles; lower FS_HZ, the order, or pick a faster profile")
+    return lines
@@ -0,0 +1,335 @@
+"""
+Headless DSP server for local tools that want the studio's designs and
+complex filters without embedding the Tk app.
+
+    python dsp_server.py --port 8765
+
+Requests and responses are framed the same way: a little-endian uint32
+header length, a UTF-8 JSON header, then raw little-endian samples
+(interleaved when "channels" > 1).
+
+    POST /filter    -> filtered samples, float32
+    POST /spectrum  -> float32 frequencies then one magnitude row per channel
+    POST /ccode     -> C source as text/plain (JSON header only)
+    GET  /stats     -> latency percentiles, cache and batching counters
+
+Header keys: "fs"; either "spec" (a filter_design spec, missing keys use the
+defaults) with optional "complex" ({"name", "params"}, missing params use
+complex_filters.DEFAULTS), or a "stages" list as written by
+pipeline.save_spec; "zero_phase" (default true); "dtype" ("<f4" or "<f8",
+default "<f4"); "channels" (default 1); "precision"
+("Float64" or "Float32", default "Float64"). /ccode also takes
+"data_type", "impl_style", "iir_struct", "rate_change" ([up, down]),
+"mcu_profile" (a cost_model.MCU_PROFILES name) and "budget_pct".
+
+Concurrent /filter and /spectrum requests are collected for a short window
+and every group sharing a design, mode and length is filtered as one stacked
+array. All clients share one LRU cache of compiled designs and C exports.
+"""
+import argparse
+import http.client
+import json
+import queue
+import struct
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from scipy import fft as sp_fft
+import c_export
+import complex_filters
+import cost_model
+import filter_design
+import pipeline
+import precision
+
+DTYPES = ("<f4", "<f8")
+
+def pack_frame(header, samples=None):
+    """Frame a JSON header and optional sample array into one request/response body."""
+    head = json.dumps(header).encode("utf-8")
+    payload = b"" if samples is None else np.ascontiguousarray(samples, dtype=header.get("dtype", "<f4")).tobytes()
+    return struct.pack("<I", len(head)) + head + payload
+
+def unpack_frame(body):
+    """Inverse of pack_frame: returns (header, samples) with samples shaped (n, channels) or None."""
+    if len(body) < 4: raise ValueError("frame too short")
+    (n_head,) = struct.unpack_from("<I", body)
+    header = json.loads(body[4:4 + n_head].decode("utf-8"))
+    payload = body[4 + n_head:]
+    if not payload: return header, None
+    dtype = header.get("dtype", "<f4")
+    if dtype not in DTYPES: raise ValueError(f"unsupported dtype {dtype}")
+    ch = int(header.get("channels", 1))
+    x = np.frombuffer(payload, dtype=dtype)
+    if ch < 1 or len(x) % ch: raise ValueError("payload length is not a multiple of channels")
+    return header, x.reshape(-1, ch)
+
+def stages_from_header(header, fs):
+    """Pipeline stage list described by a request header; missing design and complex parameters use the defaults."""
+    if "stages" in header:
+        stages = header["stages"]
+    else:
+        stages = [pipeline.filter_stage(header.get("spec", {}))]
+        if header.get("complex"):
+            stages.append(pipeline.complex_stage(header["complex"]["name"], header["complex"].get("params", {})))
+    for st in stages:
+        if st["type"] == "filter": st["spec"] = filter_design.make_spec(**st["spec"])
+        else: st["params"] = complex_filters.complete_params(st.get("params", {}), fs)
+    return stages
+
+class DesignCache:
+    """
+    Thread-safe LRU of compiled designs / exports keyed by canonical JSON.
+    Misses are computed outside the lock; concurrent requests for a key that
+    is being computed wait for that result instead of computing it again.
+    """
+    def __init__(self, size=128):
+        self.size = size; self.items = OrderedDict(); self.lock = threading.Lock()
+        self.pending = {} # key -> Event set when its computation finishes
+        self.hits = 0; self.misses = 0
+
+    @staticmethod
+    def key(*parts):
+        return json.dumps(parts, sort_keys=True, default=float)
+
+    def get(self, key, factory):
+        while True:
+            with self.lock:
+                if key in self.items:
+                    self.items.move_to_end(key); self.hits += 1
+                    return self.items[key], True
+                done = self.pending.get(key)
+                if done is None:
+                    done = self.pending[key] = threading.Event()
+                    break
+            done.wait() # another request is computing it (if that failed, retry here)
+        try:
+            value = factory()
+            with self.lock:
+                self.items[key] = value; self.misses += 1
+                if len(self.items) > self.size: self.items.popitem(last=False)
+            return value, False
+        finally:
+            with self.lock: del self.pending[key]
+            done.set()
+
+class LatencyStats:
+    """Rolling per-endpoint latencies (seconds) with percentile summaries."""
+    def __init__(self, window=10000):
+        self.window = window; self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.counts = defaultdict(int); self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self.lock:
+            self.samples[endpoint].append(seconds); self.counts[endpoint] += 1
+
+    def summary(self):
+        with self.lock:
+            out = {}
+            for ep, d in self.samples.items():
+                ms = np.array(d) * 1e3
+                p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+                out[ep] = {"count": self.counts[ep], "p50_ms": float(p50), "p90_ms": float(p90),
+                           "p99_ms": float(p99), "max_ms": float(np.max(ms))}
+            return out
+
+class _Job:
+    def __init__(self, kind, key, plan, zero_phase, x, fs):
+        self.kind = kind; self.key = key; self.plan = plan; self.zero_phase = zero_phase
+        self.x = x; self.fs = fs; self.dtype = x.dtype
+        self.done = threading.Event(); self.result = None; self.error = None; self.batch_size = 0
+
+class Batcher:
+    """
+    Single worker thread that drains queued jobs for up to window_s (or
+    max_batch jobs) and filters each (design, zero_phase, length) group as
+    one stacked (signals, samples) array.
+    """
+    def __init__(self, window_s=0.002, max_batch=64):
+        self.window_s = window_s; self.max_batch = max_batch
+        self.jobs = queue.Queue(); self.batches = 0; self.batched_jobs = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, job):
+        self.jobs.put(job); job.done.wait()
+        if job.error: raise job.error
+        return job.result
+
+    def _run(self):
+        while True:
+            batch = [self.jobs.get()]
+            deadline = time.perf_counter() + self.window_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0: break
+                try: batch.append(self.jobs.get(timeout=remaining))
+                except queue.Empty: break
+            groups = defaultdict(list)
+            for job in batch: groups[(job.key, job.zero_phase, job.x.shape[0], job.dtype)].append(job)
+            for jobs in groups.values(): self._run_group(jobs)
+            self.batches += 1; self.batched_jobs += len(batch)
+
+    def _run_group(self, jobs):
+        try:
+            rows = np.vstack([job.x.T for job in jobs])
+            y = pipeline.run_pipeline(jobs[0].plan, rows, jobs[0].zero_phase, dtype=jobs[0].dtype)
+        except Exception as e:
+            for job in jobs: job.error = e; job.done.set()
+            return
+        start = 0
+        for job in jobs:
+            ch = job.x.shape[1]
+            yj = y[start:start + ch]; start += ch
+            job.result = spectrum(yj, job.fs) if job.kind == "spectrum" else yj.T
+            job.batch_size = len(jobs); job.done.set()
+
+def spectrum(rows, fs):
+    """Single-sided magnitude spectrum per row, scaled as the studio's FFT card."""
+    n = rows.shape[1]
+    freqs = np.fft.rfftfreq(n, 1 / fs)[:n // 2]
+    mag = 2.0 / n * np.abs(sp_fft.rfft(rows, axis=1)[:, :n // 2]) # scipy.fft keeps float32
+    return freqs, mag
+
+class DSPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, cache_size=128, window_s=0.002, max_batch=64):
+        super().__init__(address, _Handler)
+        self.cache = DesignCache(cache_size)
+        self.latency = LatencyStats()
+        self.batcher = Batcher(window_s, max_batch)
+
+    def plan_for(self, stages, fs):
+        key = DesignCache.key("plan", stages, fs)
+        plan, hit = self.cache.get(key, lambda: pipeline.build_pipeline(stages, fs))
+        return key, plan, hit
+
+    def stats(self):
+        b = self.batcher
+        return {"latency": self.latency.summary(),
+                "cache": {"entries": len(self.cache.items), "hits": self.cache.hits, "misses": self.cache.misses},
+                "batches": b.batches, "mean_batch": b.batched_jobs / b.batches if b.batches else 0.0}
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args): pass
+
+    def _send(self, code, body, ctype="application/octet-stream"):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, code, msg):
+        self._send(code, json.dumps({"error": msg}).encode("utf-8"), "application/json")
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send(200, json.dumps(self.server.stats()).encode("utf-8"), "application/json")
+        else:
+            self._error(404, f"unknown endpoint {self.path}")
+
+    def do_POST(self):
+        t0 = time.perf_counter()
+        endpoint = self.path.rstrip("/")
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            header, x = unpack_frame(body)
+            fs = float(header.get("fs", 2000))
+            stages = stages_from_header(header, fs)
+            if endpoint == "/ccode":
+                out = self._ccode(header, stages, fs)
+                self._send(200, out.encode("utf-8"), "text/plain; charset=utf-8")
+            elif endpoint in ("/filter", "/spectrum"):
+                if x is None or len(x) == 0: raise ValueError("no samples in request")
+                key, plan, hit = self.server.plan_for(stages, fs)
+                dt = precision.get_dtype(header.get("precision", "Float64"))
+                job = _Job(endpoint[1:], key, plan, bool(header.get("zero_phase", True)), np.asarray(x, dtype=dt), fs)
+                result = self.server.batcher.submit(job)
+                meta = {"dtype": "<f4", "channels": x.shape[1], "cache": "hit" if hit else "miss",
+                        "batch_size": job.batch_size, "server_ms": (time.perf_counter() - t0) * 1e3}
+                if job.kind == "spectrum":
+                    freqs, mag = result
+                    meta["bins"] = len(freqs)
+                    self._send(200, pack_frame(meta, np.concatenate([freqs, mag.ravel()])))
+                else:
+                    self._send(200, pack_frame(meta, result))
+            else:
+                self._error(404, f"unknown endpoint {self.path}"); return
+        except (ValueError, KeyError, TypeError) as e:
+            self._error(400, str(e)); return
+        except Exception as e:
+            self._error(500, str(e)); return
+        self.server.latency.record(endpoint, time.perf_counter() - t0)
+
+    def _ccode(self, header, stages, fs):
+        filt = next((st["spec"] for st in stages if st["type"] == "filter"), filter_design.make_spec())
+        cplx = next(({"name": st["name"], "params": st["params"]} for st in stages if st["type"] == "complex"), None)
+        up, down = header.get("rate_change", (1, 1))
+        args = (header.get("data_type", "Float32"), header.get("impl_style", "Standard C"),
+                header.get("iir_struct", "Cascaded Biquads (SOS)"))
+        mcu = (header.get("mcu_profile", cost_model.DEFAULT_PROFILE), float(header.get("budget_pct", 100.0)))
+        if mcu[0] not in cost_model.MCU_PROFILES: raise ValueError(f"unknown MCU profile {mcu[0]!r}")
+        key = DesignCache.key("ccode", filt, cplx, fs, up, down, args, mcu)
+        fs_proc = fs * up / down
+        code, _ = self.server.cache.get(key, lambda: c_export.generate_c_code(
+            filt, fs_proc, *args, complex_spec=cplx, rate_change=(up, down), fs_in=fs,
+            mcu_profile=mcu[0], budget_pct=mcu[1]))
+        return code
+
+def request(endpoint, header, samples=None, host="127.0.0.1", port=8765, timeout=30):
+    """
+    Minimal client. Returns (meta, array) for /filter and /spectrum (array is
+    (n, channels) filtered data, or (freqs, magnitudes) for a spectrum), the C
+    source for /ccode and the stats dict for /stats.
+    """
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        if endpoint == "/stats":
+            conn.request("GET", endpoint)
+        else:
+            header = dict(header)
+            if samples is not None:
+                samples = np.asarray(samples)
+                header.setdefault("channels", 1 if samples.ndim == 1 else samples.shape[1])
+            conn.request("POST", endpoint, body=pack_frame(header, samples))
+        resp = conn.getresponse(); body = resp.read()
+    finally:
+        conn.close()
+    if resp.status != 200:
+        raise RuntimeError(f"{endpoint}: HTTP {resp.status} {body.decode('utf-8', 'replace')}")
+    if endpoint == "/stats": return json.loads(body)
+    if endpoint == "/ccode": return body.decode("utf-8")
+    meta, data = unpack_frame(body)
+    if endpoint == "/spectrum":
+        flat = data.ravel(); nb = meta["bins"]
+        return meta, (flat[:nb], flat[nb:].reshape(meta["channels"], nb))
+    return meta, data
+
+def serve(host="127.0.0.1", port=8765, cache_size=128, window_ms=2.0, max_batch=64):
+    server = DSPServer((host, port), cache_size, window_ms / 1e3, max_batch)
+    print(f"DSP server listening on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Headless DSP Studio server (local HTTP).")
+    ap.add_argument("--host", default="127.0.0.1", help="Bind address (keep local unless you trust the network)")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--cache", type=int, default=128, help="Design cache entries shared by all clients")
+    ap.add_argument("--window-ms", type=float, default=2.0, help="Batching window for concurrent requests")
+    ap.add_argument("--max-batch", type=int, default=64)
+    args = ap.parse_args(argv)
+    serve(args.host, args.port, args.cache, args.window_ms, args.max_batch)
+
+if __name__ == "__main__":
+    main()
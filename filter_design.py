@@ -0,0 +1,145 @@
+import numpy as np
+from scipy.signal import (butter, cheby1, cheby2, ellip, iirnotch,
+                          firwin, tf2sos, sos2tf)
+import lattice_filters
+
+# Default design parameters (mirrors the studio's startup state)
+DEFAULT_SPEC = {
+    "resp": "Low-Pass", "f_class": "IIR", "proto": "Butterworth",
+    "order": 4, "cutoff_1": 300.0, "cutoff_2": 800.0,
+    "ripple": 1.0, "atten": 40.0, "beta": 5.0, "notch_q": 30.0,
+    "gauss_std": 7.0, "pm_width": 50.0, "min_phase": False,
+    "notch_harmonics": 3
+}
+
+def make_spec(**kwargs):
+    """Return a full design spec, filling missing keys from DEFAULT_SPEC."""
+    spec = dict(DEFAULT_SPEC)
+    spec.update(kwargs)
+    return spec
+
+def is_identity(spec):
+    return spec["resp"] == "None" or spec["f_class"] == "None" or spec["proto"] == "None"
+
+def design_filter(spec, fs, output='ba'):
+    """
+    Design a standard (Stage 1) filter from a spec dict.
+    output: 'ba', 'sos' (IIR / lattice only) or 'lattice' (lattice class only).
+    Returns an identity (b, a) pair if the spec is bypassed or invalid.
+    """
+    res = spec["resp"]; f_class = spec["f_class"]; proto = spec["proto"]; nyq = fs / 2
+    if is_identity(spec): return np.array([1.0]), np.array([1.0])
+    c1 = np.clip(spec["cutoff_1"], 0.1, nyq - 1); c2 = np.clip(spec["cutoff_2"], c1 + 0.1, nyq - 1)
+    order = spec["order"]
+    btype = 'low'
+    if res == "High-Pass": btype = 'high'
+    elif res == "Band-Pass": btype = 'bandpass'
+    elif res == "Band-Stop": btype = 'bandstop'
+    Wn = c1/nyq if res in ["Low-Pass", "High-Pass", "Notch"] else [c1/nyq, c2/nyq]
+    if res == "Notch": return iirnotch(c1/nyq, spec["notch_q"])
+    if res == "Notch Bank":
+        sos = design_notch_bank(spec["cutoff_1"], fs, spec["notch_harmonics"], spec["notch_q"])
+        return sos if output == 'sos' else sos2tf(sos)
+    try:
+        if f_class == "IIR":
+            from scipy.signal import bessel
+            if proto == "Butterworth": return butter(order, Wn, btype=btype, output=output)
+            elif proto == "Chebyshev I": return cheby1(order, spec["ripple"], Wn, btype=btype, output=output)
+            elif proto == "Chebyshev II": return cheby2(order, spec["atten"], Wn, btype=btype, output=output)
+            elif proto == "Elliptic": return ellip(order, spec["ripple"], spec["atten"], Wn, btype=btype, output=output)
+            elif proto == "Bessel": return bessel(order, Wn, btype=btype, output=output)
+            elif proto == "Gaussian":
+                return butter(order, Wn, btype=btype, output=output)
+        elif f_class == "Lattice":
+            lat = lattice_filters.design_lattice(proto, order, Wn, btype)
+            if output == 'lattice': return lat
+            if output == 'sos': return tf2sos(lat["b"], lat["a"])
+            return lat["b"], lat["a"]
+        else:
+            from scipy.signal import remez, minimum_phase
+            numtaps = order * 4 + 1
+            if numtaps % 2 == 0: numtaps += 1 # Ensure odd for simpler PM
+
+            if proto == "Parks-McClellan":
+                bw = spec["pm_width"] / nyq
+                bands = [0, c1/nyq - bw/2, c1/nyq + bw/2, 1]
+                # Clamp bands to valid range [0, 1]
+                bands = np.clip(bands, 0, 1)
+                # Ensure bands are strictly increasing
+                for i in range(1, len(bands)):
+                    if bands[i] <= bands[i-1]: bands[i] = bands[i-1] + 1e-5
+                bands = np.clip(bands, 0, 1)
+                b = remez(numtaps, bands, [1, 0])
+            else:
+                win = proto.lower()
+                if win == "kaiser": win = ('kaiser', spec["beta"])
+                elif win == "gaussian": win = ('gaussian', spec["gauss_std"])
+                elif win == "rectangular": win = "boxcar"
+                elif win == "raised cosine": win = "hann" # Closest standard window
+                b = firwin(numtaps, Wn, pass_zero=(btype in ['low', 'bandstop']), window=win)
+
+            if spec["min_phase"]:
+                b = minimum_phase(b)
+            return b, np.array([1.0])
+    except: return np.array([1.0]), np.array([1.0])
+    return np.array([1.0]), np.array([1.0])
+
+def design_sos(spec, fs):
+    """
+    Design any standard filter as a second-order-section cascade.
+    IIR designs are requested directly in SOS form for numerical robustness;
+    FIR, notch and lattice designs are factored from their (b, a) form.
+    """
+    if spec["resp"] == "Notch Bank" and not is_identity(spec):
+        return design_filter(spec, fs, output='sos')
+    if spec["f_class"] == "IIR" and spec["resp"] != "Notch" and not is_identity(spec):
+        sos = design_filter(spec, fs, output='sos')
+        if isinstance(sos, np.ndarray) and sos.ndim == 2: return sos
+    b, a = design_filter(spec, fs)
+    if len(b) <= 1 and len(a) <= 1:
+        return np.array([[b[0] / a[0], 0.0, 0.0, 1.0, 0.0, 0.0]])
+    return tf2sos(b, a)
+
+def notch_bank_freqs(f0, fs, n_harmonics):
+    """Fundamental plus n_harmonics integer multiples, keeping only those below Nyquist."""
+    if f0 <= 0: return np.zeros(0)
+    freqs = f0 * np.arange(1, int(n_harmonics) + 2)
+    return freqs[freqs < fs / 2 - 1]
+
+def design_notch_bank(f0, fs, n_harmonics=3, q=30.0):
+    """
+    Mains-hum notch bank: one iirnotch biquad per harmonic of f0, stacked into a
+    single SOS cascade so the whole bank runs in one pass. Q is held constant,
+    so the notch width scales with the harmonic (as does any drift of f0).
+    """
+    freqs = notch_bank_freqs(f0, fs, n_harmonics)
+    if len(freqs) == 0:
+        return np.array([[1.0, 0.0, 0.0, 1.0, 0.0, 0.0]])
+    return np.vstack([tf2sos(*iirnotch(f, q, fs=fs)) for f in freqs])
+
+def estimate_fundamental(x, fs, f_nominal, search_hz=2.0, n_harmonics=3):
+    """
+    Estimate a drifting mains fundamental near f_nominal from the spectrum.
+    Each of the first harmonics is located by a zero-padded, windowed FFT peak
+    search within +/- h*search_hz of h*f_nominal, refined by parabolic
+    interpolation; the per-harmonic estimates f_h / h are power-weighted.
+    Returns f_nominal unchanged if no usable peak is found.
+    """
+    x = np.asarray(x, dtype=float)
+    if len(x) < 16 or f_nominal <= 0: return f_nominal
+    nfft = int(2 ** np.ceil(np.log2(max(len(x), fs / 0.05))))
+    nfft = min(nfft, 2 ** 20)
+    spec = np.abs(np.fft.rfft((x - np.mean(x)) * np.hanning(len(x)), nfft)) ** 2
+    df = fs / nfft
+    est, weights = [], []
+    for h in range(1, int(n_harmonics) + 2):
+        lo = int((h * (f_nominal - search_hz)) / df); hi = int(np.ceil(h * (f_nominal + search_hz) / df))
+        if lo < 1 or hi >= len(spec) - 1: break
+        i = lo + int(np.argmax(spec[lo:hi + 1]))
+        a, b, c = np.log(spec[i - 1:i + 2] + 1e-30)
+        denom = a - 2 * b + c
+        shift = 0.5 * (a - c) / denom if denom != 0 else 0.0
+        est.append((i + np.clip(shift, -0.5, 0.5)) * df / h)
+        weights.append(spec[i])
+    if not est or np.sum(weights) <= 0: return f_nominal
+    return float(np.average(est, weights=weights))
@@ -0,0 +1,171 @@
+"""
+Multi-state Kalman trackers for the complex layer, batched across channels.
+
+    Random Walk             x = [position]
+    Constant Velocity       x = [position, velocity]
+    Constant Acceleration   x = [position, velocity, acceleration]
+
+Time is in samples (dt = 1), so Q is the spectral density of white noise
+on the highest derivative per sample and the studio's Q / R sliders keep
+their meaning for every model. Only the position is measured.
+
+The covariance and gain do not depend on the data, so they are propagated
+once (one small n x n recursion) and shared by every channel. The state
+update of all channels runs as one einsum per sample while the gain is
+still settling. Once it is within GAIN_TOL of the steady-state (DARE)
+gain, the filter is linear time-invariant,
+
+    x[t] = A x[t-1] + K z[t],   A = (I - K H) F
+
+and the rest of the record runs as lfilter calls over all channels, with
+the carried state added as the zero-input response. steady=True starts
+from the steady-state covariance, so the whole record takes the fast path
+(this is the form exported to C). The RTS smoother reuses the same split
+for its backward pass.
+"""
+import math
+import numpy as np
+from scipy.linalg import solve_discrete_are
+from scipy.signal import lfilter, ss2tf
+
+MODELS = {"Random Walk": 1, "Constant Velocity": 2, "Constant Acceleration": 3}
+GAIN_TOL = 1e-9 # relative gain change at which the transient loop hands over to the LTI path
+MAX_TRANSIENT = 1 << 14 # the hand-over happens here at the latest (gain frozen at steady state)
+FREE_DECAY = 1e-40 # carried-state response is dropped once the slowest mode has decayed by this factor
+
+def model(name, q, dt=1.0):
+    """F, H, Q of a polynomial model driven by continuous white noise (density q) on its top derivative."""
+    n = MODELS[name]
+    F = np.eye(n)
+    for k in range(1, n): F += np.diag(np.full(n - k, dt ** k / math.factorial(k)), k)
+    H = np.zeros((1, n)); H[0, 0] = 1.0
+    d = n - 1 - np.arange(n) # derivative order below the top one
+    e = d[:, None] + d[None, :] + 1
+    fact = np.array([math.factorial(int(v)) for v in d], dtype=float)
+    Q = q * dt ** e / (e * fact[:, None] * fact[None, :])
+    return F, H, Q
+
+def steady_state(F, H, Q, r):
+    """Steady-state prior covariance, gain and posterior covariance from the discrete Riccati equation."""
+    P = solve_discrete_are(F.T, H.T, Q, np.array([[r]]))
+    K = P @ H[0] / (H[0] @ P @ H[0] + r)
+    return P, K, P - np.outer(K, H[0] @ P)
+
+def steady_form(model_name, q, r):
+    """A = (I - K H) F and K of the steady-state filter x[t] = A x[t-1] + K z[t]."""
+    F, H, Q = model(model_name, q)
+    _, K, _ = steady_state(F, H, Q, r)
+    return (np.eye(len(K)) - np.outer(K, H[0])) @ F, K
+
+def position_tf(model_name, q, r):
+    """(b, a) from measurement to position estimate of the steady-state filter."""
+    A, K = steady_form(model_name, q, r)
+    num, den = ss2tf(A, K[:, None], A[:1], K[:1, None])
+    return num[0], den
+
+def _lti(A, B, u, x0=None):
+    # States of x[t] = A x[t-1] + B u[t] for t = 0..L-1, u (channels, L, inputs), x0 (channels, n) or None.
+    # Zero-state part: one transfer function per (state, input). Zero-input part: every component of
+    # A^t x0 obeys the characteristic recursion of A, so it is lfilter on zeros seeded with its first n values.
+    n = A.shape[0]; C, L, m = u.shape
+    x = np.zeros((C, L, n))
+    for j in range(m):
+        num, den = ss2tf(A, B[:, j:j + 1], A, B[:, j:j + 1])
+        for i in range(n): x[:, :, i] += lfilter(num[i], den, u[:, :, j], axis=-1)
+    if x0 is None or not np.any(x0) or L == 0: return x
+    seed = [x0]
+    for _ in range(min(n, L)): seed.append(seed[-1] @ A.T)
+    seed = np.stack(seed[1:], axis=1) # (C, k, n): A^1 x0 .. A^k x0
+    k = seed.shape[1]
+    x[:, :k] += seed
+    # The decaying tail is stopped at FREE_DECAY relative: beyond it lfilter only produces denormals,
+    # which run an order of magnitude slower than normal arithmetic
+    rho = np.max(np.abs(np.linalg.eigvals(A)))
+    end = L if rho >= 1 else min(L, k + int(np.log(FREE_DECAY) / np.log(max(rho, 1e-300))) + 1)
+    if end > k:
+        den = np.poly(A)
+        # lfiltic for b = [1] and zero input: zi[i] = -sum_{p > i} den[p] y[i - p]
+        zi = np.zeros((C, n, n))
+        for i in range(n):
+            for p in range(i + 1, n + 1): zi[:, i] -= den[p] * seed[:, k - 1 - (p - i - 1)]
+        for i in range(n):
+            x[:, k:end, i] += lfilter([1.0], den, np.zeros((C, end - k)), axis=-1, zi=zi[:, :, i])[0]
+    return x
+
+class KalmanTracker:
+    """
+    Forward filter with carried state for a bank of channels. process(z)
+    takes (samples,) or (channels, samples) and returns the states
+    (channels, samples, n); column 0 is the position estimate. The first
+    sample initialises position, with zero velocity / acceleration.
+    """
+    def __init__(self, model_name="Constant Velocity", q=1e-5, r=1e-2, steady=False, p0=10.0):
+        self.F, self.H, self.Q = model(model_name, q)
+        self.n = n = self.F.shape[0]
+        self.Pp_ss, self.K_ss, self.Pf_ss = steady_state(self.F, self.H, self.Q, r)
+        self.A = (np.eye(n) - np.outer(self.K_ss, self.H[0])) @ self.F
+        # Transient gain schedule: prior / posterior covariances and gains until converged
+        Ks, Pp, Pf = [], [], []
+        P = self.Pf_ss if steady else p0 * np.eye(n)
+        while not steady and len(Ks) < MAX_TRANSIENT:
+            Pr = self.F @ P @ self.F.T + self.Q
+            K = Pr[:, 0] / (Pr[0, 0] + r)
+            if np.max(np.abs(K - self.K_ss)) <= GAIN_TOL * np.max(np.abs(self.K_ss)): break
+            P = Pr - np.outer(K, Pr[0])
+            Ks.append(K); Pp.append(Pr); Pf.append(P)
+        self.Ks = np.array(Ks).reshape(-1, n); self.Pp = np.array(Pp).reshape(-1, n, n); self.Pf = np.array(Pf).reshape(-1, n, n)
+        self.t = 0; self.x = None
+
+    def process(self, z):
+        z = np.asarray(z, dtype=float)
+        z = z[None, :] if z.ndim == 1 else z
+        C, L = z.shape
+        xs = np.zeros((C, L, self.n))
+        if L == 0: return xs
+        if self.x is None:
+            self.x = np.zeros((C, self.n)); self.x[:, 0] = z[:, 0]
+        m = min(max(len(self.Ks) - self.t, 0), L)
+        x = self.x
+        for i in range(m):
+            xp = np.einsum("ij,cj->ci", self.F, x)
+            x = xp + np.einsum("c,i->ci", z[:, i] - xp[:, 0], self.Ks[self.t + i])
+            xs[:, i] = x
+        if m < L:
+            xs[:, m:] = _lti(self.A, self.K_ss[:, None], z[:, m:, None], x)
+            x = xs[:, -1]
+        self.x = x.copy(); self.t += L
+        return xs
+
+    def smooth(self, xs):
+        """Rauch-Tung-Striebel backward pass over the states of one process() call made from t = 0."""
+        C, L, n = xs.shape
+        if L < 2: return xs.copy()
+        G_ss = self.Pf_ss @ self.F.T @ np.linalg.inv(self.Pp_ss)
+        m = min(len(self.Ks), L - 1) # x_s[t] for t >= m uses the steady-state smoother gain
+        # Backward in time: w[k] = x_s[L-1-k] = G w[k-1] + u[k], u[0] = x_f[L-1], u[k] = (I - G F) x_f[L-1-k]
+        rev = xs[:, m:][:, ::-1]
+        u = np.einsum("ij,ckj->cki", np.eye(n) - G_ss @ self.F, rev)
+        u[:, 0] = rev[:, 0]
+        out = np.empty_like(xs)
+        out[:, m:] = _lti(G_ss, np.eye(n), u)[:, ::-1]
+        for t in range(m - 1, -1, -1):
+            Pp = self.Pp[t + 1] if t + 1 < len(self.Pp) else self.Pp_ss
+            G = self.Pf[t] @ self.F.T @ np.linalg.inv(Pp)
+            out[:, t] = xs[:, t] + np.einsum("ij,cj->ci", G, out[:, t + 1] - np.einsum("ij,cj->ci", self.F, xs[:, t]))
+        return out
+
+def track(z, model_name="Constant Velocity", q=1e-5, r=1e-2, steady=False, smooth=False, p0=10.0):
+    """Position estimates of a whole record, 1D or (channels, samples); smooth=True adds the RTS pass."""
+    z = np.asarray(z)
+    kf = KalmanTracker(model_name, q, r, steady, p0)
+    xs = kf.process(z)
+    if smooth: xs = kf.smooth(xs)
+    return xs[0, :, 0] if z.ndim == 1 else xs[:, :, 0]
+
+class KalmanStream:
+    """Pipeline stream form of track() (forward filter only; the smoother needs the whole record)."""
+    def __init__(self, model_name, q, r, steady=False):
+        self.kf = KalmanTracker(model_name, q, r, steady)
+    def process(self, z):
+        return self.kf.process(z)[0, :, 0].astype(z.dtype, copy=False)
+    def flush(self): return np.zeros(0)
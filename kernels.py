@@ -0,0 +1,491 @@
+"""
+Backend registry for the per-sample recursive kernels (scalar Kalman, LMS
+predictor, lattice-ladder, biquad cascade, Madgwick and Mahony attitude updates).
+
+Each kernel has a reference implementation ("numpy": plain loops run on
+Python lists) and optional accelerated ones:
+
+    numba  the same loops JIT-compiled, when numba is installed
+    c      the loops in C, compiled on first use with the system compiler
+           ($CC, default cc) into ~/.cache/dsp_studio and loaded via ctypes;
+           `python kernels.py build` does this at install time, the GUI does
+           it on a background thread at start-up (warm_up())
+
+All backends compute in float64 and update their state arrays in place,
+so blocks can be chained. The fastest available backend for each kernel
+is picked by a short timing run the first time it is used. Set
+DSP_KERNEL_BACKEND=numpy|numba|c (or call force()) to pin one, e.g. for
+benchmarking.
+
+    python kernels.py build    # compile the C library into the cache
+    python kernels.py bench    # throughput per kernel and backend
+
+test_kernels.py checks every backend against the reference.
+"""
+import argparse
+import ctypes
+import hashlib
+import math
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BACKENDS = ["numpy", "numba", "c"]
+ENV_VAR = "DSP_KERNEL_BACKEND"
+SELECT_SAMPLES = 4096 # samples timed per backend when choosing the fastest
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "dsp_studio")
+
+# --- Reference loops (also the numba sources: scalar indexing only) ---
+
+def _kalman_core(z, y, s):
+    # s = [x, p, q, r]: random-walk state estimate and covariance
+    x = s[0]; p = s[1]; q = s[2]; r = s[3]
+    for i in range(len(z)):
+        p = p + q
+        k = p / (p + r)
+        x = x + k * (z[i] - x)
+        p = (1.0 - k) * p
+        y[i] = x
+    s[0] = x; s[1] = p
+
+def _lms_core(data, y, w, mu, start):
+    # One-step-ahead predictor: y[i - start] = w . data[i-1 .. i-m]
+    m = len(w)
+    for i in range(max(start, m), len(data)):
+        acc = 0.0
+        for j in range(m): acc += w[j] * data[i - 1 - j]
+        g = 2.0 * mu * (data[i] - acc)
+        for j in range(m): w[j] += g * data[i - 1 - j]
+        y[i - start] = acc
+
+def _lattice_core(k, v, x, g, y):
+    # Gray-Markel lattice-ladder; g holds the delayed backward states
+    n_taps = len(k)
+    for n in range(len(x)):
+        f = x[n]
+        acc = 0.0
+        for m in range(n_taps, 0, -1):
+            f = f - k[m - 1] * g[m - 1]
+            g[m] = k[m - 1] * f + g[m - 1]
+            acc += v[m] * g[m]
+        g[0] = f
+        y[n] = acc + v[0] * f
+
+def _biquad_core(c, x, st, y):
+    # c: flat [b0 b1 b2 a1 a2] per section, st: flat [w1 w2] per section
+    n_sec = len(c) // 5
+    for i in range(len(x)):
+        v = x[i]
+        for s in range(n_sec):
+            w = v - c[5 * s + 3] * st[2 * s] - c[5 * s + 4] * st[2 * s + 1]
+            v = c[5 * s] * w + c[5 * s + 1] * st[2 * s] + c[5 * s + 2] * st[2 * s + 1]
+            st[2 * s + 1] = st[2 * s]; st[2 * s] = w
+        y[i] = v
+
+def _madgwick_core(a, g, q, y, beta, dt):
+    # Madgwick IMU update (gradient-descent correction towards gravity). a, g: flat
+    # (ax, ay, az, gx, gy, gz in rad/s per sample), q: [q0..q3] carried, y: flat quaternions
+    q0 = q[0]; q1 = q[1]; q2 = q[2]; q3 = q[3]
+    for i in range(len(a) // 3):
+        ax = a[3 * i]; ay = a[3 * i + 1]; az = a[3 * i + 2]
+        gx = g[3 * i]; gy = g[3 * i + 1]; gz = g[3 * i + 2]
+        d0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz)
+        d1 = 0.5 * (q0 * gx + q2 * gz - q3 * gy)
+        d2 = 0.5 * (q0 * gy - q1 * gz + q3 * gx)
+        d3 = 0.5 * (q0 * gz + q1 * gy - q2 * gx)
+        na = ax * ax + ay * ay + az * az
+        if na > 0.0:
+            r = 1.0 / math.sqrt(na); ax *= r; ay *= r; az *= r
+            s0 = 4.0 * q0 * q2 * q2 + 2.0 * q2 * ax + 4.0 * q0 * q1 * q1 - 2.0 * q1 * ay
+            s1 = (4.0 * q1 * q3 * q3 - 2.0 * q3 * ax + 4.0 * q0 * q0 * q1 - 2.0 * q0 * ay - 4.0 * q1
+                  + 8.0 * q1 * q1 * q1 + 8.0 * q1 * q2 * q2 + 4.0 * q1 * az)
+            s2 = (4.0 * q0 * q0 * q2 + 2.0 * q0 * ax + 4.0 * q2 * q3 * q3 - 2.0 * q3 * ay - 4.0 * q2
+                  + 8.0 * q2 * q1 * q1 + 8.0 * q2 * q2 * q2 + 4.0 * q2 * az)
+            s3 = 4.0 * q1 * q1 * q3 - 2.0 * q1 * ax + 4.0 * q2 * q2 * q3 - 2.0 * q2 * ay
+            ns = s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3
+            if ns > 0.0:
+                r = beta / math.sqrt(ns)
+                d0 -= r * s0; d1 -= r * s1; d2 -= r * s2; d3 -= r * s3
+        q0 += d0 * dt; q1 += d1 * dt; q2 += d2 * dt; q3 += d3 * dt
+        r = 1.0 / math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+        q0 *= r; q1 *= r; q2 *= r; q3 *= r
+        y[4 * i] = q0; y[4 * i + 1] = q1; y[4 * i + 2] = q2; y[4 * i + 3] = q3
+    q[0] = q0; q[1] = q1; q[2] = q2; q[3] = q3
+
+def _mahony_core(a, g, s, y, kp, ki, dt):
+    # Mahony IMU update (PI feedback of the accel/gravity cross product).
+    # s: [q0..q3, integral ex, ey, ez] carried
+    q0 = s[0]; q1 = s[1]; q2 = s[2]; q3 = s[3]; ix = s[4]; iy = s[5]; iz = s[6]
+    for i in range(len(a) // 3):
+        ax = a[3 * i]; ay = a[3 * i + 1]; az = a[3 * i + 2]
+        gx = g[3 * i]; gy = g[3 * i + 1]; gz = g[3 * i + 2]
+        na = ax * ax + ay * ay + az * az
+        if na > 0.0:
+            r = 1.0 / math.sqrt(na); ax *= r; ay *= r; az *= r
+            vx = q1 * q3 - q0 * q2; vy = q0 * q1 + q2 * q3; vz = q0 * q0 - 0.5 + q3 * q3
+            ex = ay * vz - az * vy; ey = az * vx - ax * vz; ez = ax * vy - ay * vx
+            if ki > 0.0:
+                ix += 2.0 * ki * ex * dt; iy += 2.0 * ki * ey * dt; iz += 2.0 * ki * ez * dt
+                gx += ix; gy += iy; gz += iz
+            gx += 2.0 * kp * ex; gy += 2.0 * kp * ey; gz += 2.0 * kp * ez
+        gx *= 0.5 * dt; gy *= 0.5 * dt; gz *= 0.5 * dt
+        qa = q0; qb = q1; qc = q2
+        q0 += -qb * gx - qc * gy - q3 * gz
+        q1 += qa * gx + qc * gz - q3 * gy
+        q2 += qa * gy - qb * gz + q3 * gx
+        q3 += qa * gz + qb * gy - qc * gx
+        r = 1.0 / math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+        q0 *= r; q1 *= r; q2 *= r; q3 *= r
+        y[4 * i] = q0; y[4 * i + 1] = q1; y[4 * i + 2] = q2; y[4 * i + 3] = q3
+    s[0] = q0; s[1] = q1; s[2] = q2; s[3] = q3; s[4] = ix; s[5] = iy; s[6] = iz
+
+C_SOURCE = r"""
+#include <math.h>
+
+void dsp_kalman(const double *z, double *y, long n, double *s) {
+    double x = s[0], p = s[1], q = s[2], r = s[3];
+    for (long i = 0; i < n; i++) {
+        p += q;
+        double k = p / (p + r);
+        x += k * (z[i] - x);
+        p = (1.0 - k) * p;
+        y[i] = x;
+    }
+    s[0] = x; s[1] = p;
+}
+
+void dsp_lms(const double *data, long n, double *y, double *w, long m, double mu, long start) {
+    for (long i = (start > m ? start : m); i < n; i++) {
+        double acc = 0.0;
+        for (long j = 0; j < m; j++) acc += w[j] * data[i - 1 - j];
+        double g = 2.0 * mu * (data[i] - acc);
+        for (long j = 0; j < m; j++) w[j] += g * data[i - 1 - j];
+        y[i - start] = acc;
+    }
+}
+
+void dsp_lattice(const double *k, const double *v, long n_taps, const double *x, long n, double *g, double *y) {
+    for (long i = 0; i < n; i++) {
+        double f = x[i], acc = 0.0;
+        for (long m = n_taps; m > 0; m--) {
+            f -= k[m - 1] * g[m - 1];
+            g[m] = k[m - 1] * f + g[m - 1];
+            acc += v[m] * g[m];
+        }
+        g[0] = f;
+        y[i] = acc + v[0] * f;
+    }
+}
+
+void dsp_biquad(const double *c, long n_sec, const double *x, long n, double *st, double *y) {
+    for (long i = 0; i < n; i++) {
+        double v = x[i];
+        for (long s = 0; s < n_sec; s++) {
+            const double *cs = c + 5 * s; double *ws = st + 2 * s;
+            double w = v - cs[3] * ws[0] - cs[4] * ws[1];
+            v = cs[0] * w + cs[1] * ws[0] + cs[2] * ws[1];
+            ws[1] = ws[0]; ws[0] = w;
+        }
+        y[i] = v;
+    }
+}
+
+void dsp_madgwick(const double *a, const double *g, long n, double *q, double *y, double beta, double dt) {
+    double q0 = q[0], q1 = q[1], q2 = q[2], q3 = q[3];
+    for (long i = 0; i < n; i++) {
+        double ax = a[3 * i], ay = a[3 * i + 1], az = a[3 * i + 2];
+        double gx = g[3 * i], gy = g[3 * i + 1], gz = g[3 * i + 2];
+        double d0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz);
+        double d1 = 0.5 * (q0 * gx + q2 * gz - q3 * gy);
+        double d2 = 0.5 * (q0 * gy - q1 * gz + q3 * gx);
+        double d3 = 0.5 * (q0 * gz + q1 * gy - q2 * gx);
+        double na = ax * ax + ay * ay + az * az;
+        if (na > 0.0) {
+            double r = 1.0 / sqrt(na); ax *= r; ay *= r; az *= r;
+            double s0 = 4.0 * q0 * q2 * q2 + 2.0 * q2 * ax + 4.0 * q0 * q1 * q1 - 2.0 * q1 * ay;
+            double s1 = 4.0 * q1 * q3 * q3 - 2.0 * q3 * ax + 4.0 * q0 * q0 * q1 - 2.0 * q0 * ay - 4.0 * q1
+                      + 8.0 * q1 * q1 * q1 + 8.0 * q1 * q2 * q2 + 4.0 * q1 * az;
+            double s2 = 4.0 * q0 * q0 * q2 + 2.0 * q0 * ax + 4.0 * q2 * q3 * q3 - 2.0 * q3 * ay - 4.0 * q2
+                      + 8.0 * q2 * q1 * q1 + 8.0 * q2 * q2 * q2 + 4.0 * q2 * az;
+            double s3 = 4.0 * q1 * q1 * q3 - 2.0 * q1 * ax + 4.0 * q2 * q2 * q3 - 2.0 * q2 * ay;
+            double ns = s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3;
+            if (ns > 0.0) {
+                r = beta / sqrt(ns);
+                d0 -= r * s0; d1 -= r * s1; d2 -= r * s2; d3 -= r * s3;
+            }
+        }
+        q0 += d0 * dt; q1 += d1 * dt; q2 += d2 * dt; q3 += d3 * dt;
+        double r = 1.0 / sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3);
+        q0 *= r; q1 *= r; q2 *= r; q3 *= r;
+        y[4 * i] = q0; y[4 * i + 1] = q1; y[4 * i + 2] = q2; y[4 * i + 3] = q3;
+    }
+    q[0] = q0; q[1] = q1; q[2] = q2; q[3] = q3;
+}
+
+void dsp_mahony(const double *a, const double *g, long n, double *s, double *y, double kp, double ki, double dt) {
+    double q0 = s[0], q1 = s[1], q2 = s[2], q3 = s[3], ix = s[4], iy = s[5], iz = s[6];
+    for (long i = 0; i < n; i++) {
+        double ax = a[3 * i], ay = a[3 * i + 1], az = a[3 * i + 2];
+        double gx = g[3 * i], gy = g[3 * i + 1], gz = g[3 * i + 2];
+        double na = ax * ax + ay * ay + az * az;
+        if (na > 0.0) {
+            double r = 1.0 / sqrt(na); ax *= r; ay *= r; az *= r;
+            double vx = q1 * q3 - q0 * q2, vy = q0 * q1 + q2 * q3, vz = q0 * q0 - 0.5 + q3 * q3;
+            double ex = ay * vz - az * vy, ey = az * vx - ax * vz, ez = ax * vy - ay * vx;
+            if (ki > 0.0) {
+                ix += 2.0 * ki * ex * dt; iy += 2.0 * ki * ey * dt; iz += 2.0 * ki * ez * dt;
+                gx += ix; gy += iy; gz += iz;
+            }
+            gx += 2.0 * kp * ex; gy += 2.0 * kp * ey; gz += 2.0 * kp * ez;
+        }
+        gx *= 0.5 * dt; gy *= 0.5 * dt; gz *= 0.5 * dt;
+        double qa = q0, qb = q1, qc = q2;
+        q0 += -qb * gx - qc * gy - q3 * gz;
+        q1 += qa * gx + qc * gz - q3 * gy;
+        q2 += qa * gy - qb * gz + q3 * gx;
+        q3 += qa * gz + qb * gy - qc * gx;
+        double r = 1.0 / sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3);
+        q0 *= r; q1 *= r; q2 *= r; q3 *= r;
+        y[4 * i] = q0; y[4 * i + 1] = q1; y[4 * i + 2] = q2; y[4 * i + 3] = q3;
+    }
+    s[0] = q0; s[1] = q1; s[2] = q2; s[3] = q3; s[4] = ix; s[5] = iy; s[6] = iz;
+}
+"""
+
+# --- Registry ---
+
+KERNELS = {"kalman": {}, "lms": {}, "lattice": {}, "biquad": {}, "madgwick": {}, "mahony": {}}
+_chosen = {}
+_forced = None
+_c_state = {"tried": False, "error": None, "thread": None}
+_c_lock = threading.Lock()
+
+def _on_lists(core, n_out_args):
+    # Reference backend: run the loop on Python lists (far cheaper than per-element
+    # NumPy indexing) and copy the mutated lists back into the caller's arrays
+    def run(*args):
+        lists = [a.tolist() if isinstance(a, np.ndarray) else a for a in args]
+        core(*lists)
+        for i in n_out_args: args[i][:] = lists[i]
+    return run
+
+KERNELS["kalman"]["numpy"] = _on_lists(_kalman_core, (1, 2))
+KERNELS["lms"]["numpy"] = _on_lists(_lms_core, (1, 2))
+KERNELS["lattice"]["numpy"] = _on_lists(_lattice_core, (3, 4))
+KERNELS["biquad"]["numpy"] = _on_lists(_biquad_core, (2, 3))
+KERNELS["madgwick"]["numpy"] = _on_lists(_madgwick_core, (2, 3))
+KERNELS["mahony"]["numpy"] = _on_lists(_mahony_core, (2, 3))
+
+if numba is not None:
+    for _name, _core in [("kalman", _kalman_core), ("lms", _lms_core), ("lattice", _lattice_core),
+                         ("biquad", _biquad_core), ("madgwick", _madgwick_core), ("mahony", _mahony_core)]:
+        KERNELS[_name]["numba"] = numba.njit(cache=True)(_core)
+
+def build_c(force=False):
+    """Compile and load the C kernels; returns the ctypes library or None (reason in c_error())."""
+    with _c_lock:
+        return _build_c(force)
+
+def _build_c(force):
+    if _c_state["tried"] and not force: return _c_state.get("lib")
+    _c_state["tried"] = True
+    cc = shutil.which(os.environ.get("CC", "cc")) or shutil.which("gcc") or shutil.which("clang")
+    if cc is None:
+        _c_state["error"] = "no C compiler found (set CC)"; return None
+    ext = ".dll" if sys.platform == "win32" else (".dylib" if sys.platform == "darwin" else ".so")
+    tag = hashlib.sha1(C_SOURCE.encode()).hexdigest()[:12]
+    lib_path = os.path.join(CACHE_DIR, f"dsp_kernels_{tag}{ext}")
+    try:
+        if not os.path.exists(lib_path) or force:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            src = os.path.join(CACHE_DIR, f"dsp_kernels_{tag}.c")
+            with open(src, "w") as fh: fh.write(C_SOURCE)
+            tmp = f"{lib_path}.{os.getpid()}.part"
+            subprocess.run([cc, "-O2", "-shared", "-fPIC", "-o", tmp, src, "-lm"], check=True, capture_output=True, text=True)
+            os.replace(tmp, lib_path)
+        lib = ctypes.CDLL(lib_path)
+    except (OSError, subprocess.CalledProcessError) as e:
+        _c_state["error"] = getattr(e, "stderr", None) or str(e); return None
+    D = np.ctypeslib.ndpointer(np.float64, flags="C_CONTIGUOUS"); L = ctypes.c_long; F = ctypes.c_double
+    for fn, args in [("dsp_kalman", [D, D, L, D]), ("dsp_lms", [D, L, D, D, L, F, L]),
+                     ("dsp_lattice", [D, D, L, D, L, D, D]), ("dsp_biquad", [D, L, D, L, D, D]),
+                     ("dsp_madgwick", [D, D, L, D, D, F, F]), ("dsp_mahony", [D, D, L, D, D, F, F, F])]:
+        getattr(lib, fn).argtypes = args; getattr(lib, fn).restype = None
+    KERNELS["kalman"]["c"] = lambda z, y, s: lib.dsp_kalman(z, y, len(z), s)
+    KERNELS["lms"]["c"] = lambda data, y, w, mu, start: lib.dsp_lms(data, len(data), y, w, len(w), mu, start)
+    KERNELS["lattice"]["c"] = lambda k, v, x, g, y: lib.dsp_lattice(k, v, len(k), x, len(x), g, y)
+    KERNELS["biquad"]["c"] = lambda c, x, st, y: lib.dsp_biquad(c, len(c) // 5, x, len(x), st, y)
+    KERNELS["madgwick"]["c"] = lambda a, g, q, y, beta, dt: lib.dsp_madgwick(a, g, len(a) // 3, q, y, beta, dt)
+    KERNELS["mahony"]["c"] = lambda a, g, s, y, kp, ki, dt: lib.dsp_mahony(a, g, len(a) // 3, s, y, kp, ki, dt)
+    _c_state["lib"] = lib; _c_state["error"] = None
+    _chosen.clear() # re-time with the C backend included
+    return lib
+
+def warm_up():
+    """
+    Build the C library and time every kernel on a daemon thread, so the
+    compiler never runs on the caller's (UI) thread. Kernels used meanwhile
+    run on numba / numpy. Returns the thread.
+    """
+    if _c_state["thread"] is None:
+        def work():
+            build_c()
+            for kernel in KERNELS: backend(kernel)
+        _c_state["thread"] = threading.Thread(target=work, daemon=True)
+        _c_state["thread"].start()
+    return _c_state["thread"]
+
+def c_error():
+    return _c_state["error"]
+
+def available(kernel):
+    """Backends that can run `kernel` here (building the C library on first call unless warm_up() is building it)."""
+    if not (_c_state["thread"] and _c_state["thread"].is_alive()): build_c()
+    return [b for b in BACKENDS if b in KERNELS[kernel]]
+
+def force(backend=None):
+    """Pin every kernel to backend (None = back to automatic / $DSP_KERNEL_BACKEND)."""
+    global _forced
+    if backend is not None and backend not in BACKENDS: raise ValueError(f"unknown backend {backend!r}")
+    _forced = backend; _chosen.clear()
+
+def _sample_args(kernel, n, rng):
+    # Representative inputs (and fresh state) for timing and parity runs
+    x = rng.standard_normal(n)
+    if kernel == "kalman": return (x, np.empty(n), np.array([x[0], 10.0, 1e-3, 1e-2]))
+    if kernel == "lms":
+        t = np.arange(n)
+        return (np.sin(0.05 * t) + 0.1 * x, np.zeros(n), np.zeros(32), 0.01, 0)
+    if kernel == "lattice":
+        return (rng.uniform(-0.9, 0.9, 8), rng.standard_normal(9), x, np.zeros(9), np.empty(n))
+    if kernel in ("madgwick", "mahony"):
+        # Gravity plus noise on the accelerometer, slow rotation on the gyro (rad/s)
+        acc = (np.array([0.0, 0.0, 9.81]) + 0.2 * rng.standard_normal((n, 3))).ravel()
+        gyr = (0.3 * np.sin(0.01 * np.arange(n))[:, None] + 0.05 * rng.standard_normal((n, 3))).ravel()
+        if kernel == "madgwick": return (acc, gyr, np.array([1.0, 0, 0, 0]), np.empty(4 * n), 0.1, 0.01)
+        return (acc, gyr, np.array([1.0, 0, 0, 0, 0, 0, 0]), np.empty(4 * n), 1.0, 0.05, 0.01)
+    c = np.tile([0.0675, 0.135, 0.0675, -1.143, 0.4128], 3)
+    return (c, x, np.zeros(6), np.empty(n))
+
+def _copy_args(args):
+    return tuple(a.copy() if isinstance(a, np.ndarray) else a for a in args)
+
+def _time(fn, args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        a = _copy_args(args); t0 = time.perf_counter(); fn(*a); best = min(best, time.perf_counter() - t0)
+    return best
+
+def backend(kernel):
+    """Backend used for kernel: forced (force() or $DSP_KERNEL_BACKEND), else the fastest measured."""
+    pinned = _forced or os.environ.get(ENV_VAR) or None
+    if pinned:
+        if pinned not in available(kernel):
+            raise RuntimeError(f"{ENV_VAR}={pinned}: backend not available for {kernel}"
+                               + (f" ({c_error()})" if pinned == "c" and c_error() else ""))
+        return pinned
+    choice = _chosen.get(kernel)
+    if choice is None:
+        args = _sample_args(kernel, SELECT_SAMPLES, np.random.default_rng(0))
+        times = {}
+        for b in available(kernel):
+            fn = KERNELS[kernel][b]
+            fn(*_copy_args(args)) # warm-up (numba compiles here)
+            times[b] = _time(fn, args)
+        choice = _chosen[kernel] = min(times, key=times.get)
+    return choice
+
+def accelerated(kernel):
+    """True when kernel runs on a compiled backend (numba or C) rather than the Python reference."""
+    return backend(kernel) != "numpy"
+
+def get(kernel, backend_name=None):
+    return KERNELS[kernel][backend_name or backend(kernel)]
+
+def _f64(a):
+    return np.ascontiguousarray(a, dtype=np.float64)
+
+# --- Public wrappers (float64 in, float64 out, state carried by the caller) ---
+
+def kalman(z, q, r, x=None, p=10.0):
+    """Scalar random-walk Kalman filter. x=None starts at z[0]. Returns (estimates, x, p)."""
+    z = _f64(z)
+    if len(z) == 0: return z.copy(), x, p
+    s = np.array([z[0] if x is None else x, p, q, r], dtype=np.float64)
+    y = np.empty(len(z))
+    get("kalman")(z, y, s)
+    return y, float(s[0]), float(s[1])
+
+def lms(data, w, mu, start=0):
+    """LMS one-step predictions for data[start:] (history before start); w is updated in place."""
+    data = _f64(data); y = np.zeros(len(data) - start)
+    get("lms")(data, y, w, float(mu), int(start))
+    return y
+
+def lattice(k, v, x, g):
+    """Lattice-ladder filtering of 1D x; g (len(k) + 1, float64) is the carried backward state."""
+    y = np.empty(len(x))
+    get("lattice")(_f64(k), _f64(v), _f64(x), g, y)
+    return y
+
+def biquad(sos, x, st):
+    """Biquad cascade (scipy sos rows, a0 = 1); st (2 * sections) is the carried state."""
+    sos = np.asarray(sos, dtype=np.float64)
+    c = _f64(sos[:, [0, 1, 2, 4, 5]].ravel())
+    y = np.empty(len(x))
+    get("biquad")(c, _f64(x), st, y)
+    return y
+
+def biquad_zi(sos):
+    """biquad() state in steady state for a unit step (the DF-II counterpart of sosfilt_zi)."""
+    st = np.empty(2 * len(sos)); u = 1.0
+    for s, (b0, b1, b2, _, a1, a2) in enumerate(np.asarray(sos, dtype=np.float64)):
+        st[2 * s] = st[2 * s + 1] = w = u / (1.0 + a1 + a2)
+        u = (b0 + b1 + b2) * w
+    return st
+
+def madgwick(acc, gyr, q, beta, dt):
+    """Madgwick IMU fusion of (n, 3) accel and (n, 3) gyro (rad/s); q (4,) is carried. Returns (n, 4) quaternions."""
+    y = np.empty(4 * len(acc))
+    get("madgwick")(_f64(acc).ravel(), _f64(gyr).ravel(), q, y, float(beta), float(dt))
+    return y.reshape(-1, 4)
+
+def mahony(acc, gyr, state, kp, ki, dt):
+    """Mahony IMU fusion; state (7,) = quaternion + integral feedback, carried. Returns (n, 4) quaternions."""
+    y = np.empty(4 * len(acc))
+    get("mahony")(_f64(acc).ravel(), _f64(gyr).ravel(), state, y, float(kp), float(ki), float(dt))
+    return y.reshape(-1, 4)
+
+def bench(n=5000):
+    """Throughput of every kernel on every available backend: list of {kernel, backend, msps} rows."""
+    rows = []
+    rng = np.random.default_rng(1)
+    for kernel in KERNELS:
+        args = _sample_args(kernel, n, rng)
+        for b in available(kernel):
+            rows.append({"kernel": kernel, "backend": b, "msps": n / max(_time(KERNELS[kernel][b], args), 1e-9) / 1e6})
+    return rows
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build or benchmark the recursive-kernel backends.")
+    ap.add_argument("action", choices=["build", "bench"])
+    ap.add_argument("-n", type=int, default=5000, help="Samples per kernel run")
+    args = ap.parse_args(argv)
+    if build_c(force=args.action == "build") is None: print(f"c backend unavailable: {c_error()}")
+    elif args.action == "build": print(f"c backend built into {CACHE_DIR}")
+    if numba is None: print("numba backend unavailable: numba not installed")
+    if args.action == "bench":
+        for r in bench(args.n): print(f"{r['kernel']:<8} {r['backend']:<6} {r['msps']:9.2f} MS/s")
+        for kernel in KERNELS: print(f"{kernel}: using {backend(kernel)}")
+    return 0 if args.action == "bench" or c_error() is None else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,57 @@
+import numpy as np
+from scipy.signal import correlate, correlation_lags, lfilter, lfilter_zi, sosfilt, sosfilt_zi
+
+# Processing modes of the studio: filtfilt (offline, zero phase), the causal
+# filter the firmware runs, or both side by side
+MODES = ["Zero-Phase", "Causal", "Both"]
+
+def causal_lfilter(b, a, x):
+    """
+    lfilter started in steady state for the first sample (lfilter_zi scaled by
+    x[0]), so a DC offset does not produce a start-up transient. x may be 2D
+    (signals, samples).
+    """
+    x = np.asarray(x)
+    if len(b) <= 1 and len(a) <= 1: return x * (b[0] / a[0])
+    zi = lfilter_zi(b, a).astype(x.dtype) * x[..., :1]
+    return lfilter(b, a, x, zi=zi)[0]
+
+def causal_sosfilt(sos, x):
+    """sosfilt with steady-state initial conditions (see causal_lfilter)."""
+    x = np.asarray(x)
+    zi = sosfilt_zi(sos).astype(x.dtype)
+    zi = zi.reshape((zi.shape[0],) + (1,) * (x.ndim - 1) + (2,)) * x[..., :1][None]
+    return sosfilt(sos, x, zi=zi)[0]
+
+def measure_latency(x, y, fs, max_lag=None):
+    """
+    Delay of y relative to x from the peak of their cross-correlation (FFT
+    based, means removed), refined to a fraction of a sample by a parabola
+    through the peak. max_lag (default len/4) keeps periodic inputs from
+    locking onto a later period. Returns lag in samples and ms (positive =
+    y lags x) and the normalised correlation at the peak.
+    """
+    n = min(len(x), len(y))
+    x = np.asarray(x[:n], dtype=float); y = np.asarray(y[:n], dtype=float)
+    x = x - np.mean(x); y = y - np.mean(y)
+    norm = np.sqrt(np.dot(x, x) * np.dot(y, y))
+    if n < 4 or norm == 0: return {"lag_samples": 0.0, "lag_ms": 0.0, "corr": 0.0}
+    c = correlate(y, x, mode="full", method="fft")
+    lags = correlation_lags(n, n, mode="full")
+    max_lag = n // 4 if max_lag is None else max_lag
+    m = np.abs(lags) <= max_lag
+    c, lags = c[m], lags[m]
+    k = int(np.argmax(c)); lag = float(lags[k])
+    if 0 < k < len(c) - 1:
+        den = c[k - 1] - 2 * c[k] + c[k + 1]
+        if den != 0: lag += 0.5 * (c[k - 1] - c[k + 1]) / den
+    lag = float(lag)
+    return {"lag_samples": lag, "lag_ms": 1e3 * lag / fs, "corr": float(c[k] / norm)}
+
+def latency_summary(design_gd, measured, fs, zero_phase=None):
+    """One-line comparison of the design group delay with the measured delay(s)."""
+    text = (f"Group delay {design_gd:.1f} smp ({1e3 * design_gd / fs:.2f} ms) | causal measured "
+            f"{measured['lag_samples']:.1f} smp ({measured['lag_ms']:.2f} ms, r={measured['corr']:.2f})")
+    if zero_phase is not None:
+        text += f" | zero-phase {zero_phase['lag_samples']:.1f} smp"
+    return text
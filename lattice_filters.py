@@ -0,0 +1,306 @@
+import time
+import numpy as np
+import precision
+from scipy.signal import butter, freqz, sosfilt, tf2sos
+import kernels
+
+def tf2latc(b, a):
+    """
+    Gray-Markel lattice-ladder conversion (step-down recursion).
+    Returns reflection coefficients k[0..N-1] and ladder coefficients v[0..N].
+    Raises ValueError if any |k| >= 1 (unstable denominator).
+    """
+    a = np.atleast_1d(np.asarray(a, dtype=float))
+    b = np.atleast_1d(np.asarray(b, dtype=float))
+    b = b / a[0]; a = a / a[0]
+    n = max(len(a), len(b)) - 1
+    A = np.zeros(n + 1); A[:len(a)] = a
+    B = np.zeros(n + 1); B[:len(b)] = b
+    k = np.zeros(n)
+    v = np.zeros(n + 1)
+    for m in range(n, 0, -1):
+        # Ladder: peel off the reversed (all-pass numerator) polynomial of order m
+        v[m] = B[m]
+        B[:m + 1] -= v[m] * A[m::-1]
+        # Reflection: step-down from order m to m-1
+        k[m - 1] = A[m]
+        if abs(k[m - 1]) >= 1.0:
+            raise ValueError(f"Unstable lattice: |k{m}| = {abs(k[m - 1]):.6f} >= 1")
+        A[:m] = (A[:m] - k[m - 1] * A[m:0:-1]) / (1.0 - k[m - 1] ** 2)
+        A[m] = 0.0
+    v[0] = B[0]
+    return k, v
+
+def latc2tf(k, v):
+    """
+    Inverse of tf2latc (step-up recursion). Returns (b, a).
+    """
+    n = len(k)
+    A = np.array([1.0])
+    b = v[0] * np.array([1.0])
+    for m in range(1, n + 1):
+        A = np.append(A, 0.0)
+        A = A + k[m - 1] * A[::-1]
+        b = np.append(b, 0.0) + v[m] * A[::-1]
+    return b, A
+
+def is_stable(k):
+    """Lattice stability test: every reflection coefficient strictly inside the unit circle."""
+    return bool(np.all(np.abs(k) < 1.0))
+
+def latcfilt(k, v, x, zi=None):
+    """
+    Filter a 1D or (n, channels) array through a lattice-ladder structure.
+    The recursion runs on the fastest kernels backend ("lattice"), in float64;
+    output and state are returned in the input's precision.
+    Returns (y, zf) where zf is the backward state to carry into the next block.
+    """
+    dtype = precision.float_dtype(x)
+    x = np.asarray(x, dtype=dtype)
+    flat = x.ndim == 1
+    x2 = x[:, None] if flat else x
+    n_taps = len(k)
+    zf = np.zeros((n_taps + 1, x2.shape[1]), dtype=dtype) if zi is None else np.array(zi, dtype=dtype).reshape(n_taps + 1, -1)
+    y = np.empty_like(x2)
+    for ch in range(x2.shape[1]):
+        g = np.array(zf[:, ch], dtype=np.float64)
+        y[:, ch] = kernels.lattice(k, v, x2[:, ch], g)
+        zf[:, ch] = g
+    return (y[:, 0] if flat else y), zf
+
+def _allpass_split(p, start):
+    # Alternate the angle-sorted poles between two all-pass branches.
+    up = p[np.imag(p) >= -1e-12]
+    up = up[np.argsort(np.angle(up))]
+    branches = [[], []]; i = start
+    for q in up:
+        if abs(q.imag) < 1e-12: branches[i].append(q.real)
+        else: branches[i] += [q, np.conj(q)]
+        i ^= 1
+    return [np.real(np.poly(br)) if br else np.array([1.0]) for br in branches]
+
+def allpass_decompose(z, p, gain, n_check=512):
+    """
+    Doubly-complementary decomposition H(z) = 0.5 * (A0(z) + sign * A1(z)).
+    Valid for odd-order Butterworth / Chebyshev / Elliptic designs. Returns
+    (d0, d1, sign) where d0, d1 are the branch denominators. Raises ValueError
+    if the design cannot be split into two all-pass sections.
+    """
+    from scipy.signal import zpk2tf
+    b, a = zpk2tf(z, p, gain)
+    _, h = freqz(b, a, n_check)
+    best = None
+    for start in (0, 1):
+        d0, d1 = _allpass_split(np.asarray(p), start)
+        _, h0 = freqz(d0[::-1], d0, n_check)
+        _, h1 = freqz(d1[::-1], d1, n_check)
+        for sign in (1.0, -1.0):
+            err = np.max(np.abs(0.5 * (h0 + sign * h1) - h))
+            if best is None or err < best[0]: best = (err, d0, d1, sign)
+    if best[0] > 1e-6:
+        raise ValueError("Design is not realizable as a parallel all-pass pair")
+    return best[1], best[2], best[3]
+
+def design_lattice(proto, order, Wn, btype):
+    """
+    Design a lattice realization of a Butterworth prototype.
+    proto: "Grey-Markel" (lattice-ladder) or "All-Pass Lattice" (two parallel
+    all-pass lattices, order forced odd). Returns a dict with the lattice
+    coefficients plus the equivalent (b, a) for plotting and analysis.
+    """
+    if proto == "All-Pass Lattice":
+        order = order if order % 2 == 1 else order + 1
+        z, p, gain = butter(order, Wn, btype=btype, output='zpk')
+        d0, d1, sign = allpass_decompose(z, p, gain)
+        k0, _ = tf2latc(d0[::-1], d0)
+        k1, _ = tf2latc(d1[::-1], d1)
+        b = 0.5 * (np.convolve(d0[::-1], d1) + sign * np.convolve(d1[::-1], d0))
+        a = np.convolve(d0, d1)
+        return {"kind": "allpass", "k0": k0, "k1": k1, "sign": sign, "b": b, "a": a, "order": order}
+    b, a = butter(order, Wn, btype=btype)
+    k, v = tf2latc(b, a)
+    return {"kind": "gray-markel", "k": k, "v": v, "b": b, "a": a, "order": len(k)}
+
+def _allpass_v(k):
+    # Ladder taps that read out the all-pass output g_N only
+    v = np.zeros(len(k) + 1); v[-1] = 1.0
+    return v
+
+def _unit_zi(k):
+    # Fixed point of one lattice step for a unit input: g = M g + c  ->  g = (I - M)^-1 c
+    n = len(k) + 1; v = np.zeros(n)
+    M = np.empty((n, n))
+    for j in range(n):
+        g = np.zeros(n); g[j] = 1.0
+        kernels.lattice(k, v, np.zeros(1), g); M[:, j] = g
+    c = np.zeros(n); kernels.lattice(k, v, np.ones(1), c)
+    return np.linalg.solve(np.eye(n) - M, c)
+
+def lattice_zi(lat, x0=1.0):
+    """
+    Initial backward state for apply_lattice that starts the lattice in steady
+    state for a constant input x0 (scalar, or one value per channel), the
+    lattice counterpart of lfilter_zi(b, a) * x[0].
+    """
+    if lat["kind"] == "allpass":
+        return tuple(np.multiply.outer(_unit_zi(lat[name]), x0) for name in ("k0", "k1"))
+    return np.multiply.outer(_unit_zi(lat["k"]), x0)
+
+def apply_lattice(lat, x, zi=None):
+    """
+    Causal lattice filtering of x (1D or (n, channels)) from rest, or from the
+    backward state zi (see lattice_zi; a (zi0, zi1) pair for all-pass designs).
+    """
+    if lat["kind"] == "allpass":
+        zi0, zi1 = (None, None) if zi is None else zi
+        y0, _ = latcfilt(lat["k0"], _allpass_v(lat["k0"]), x, zi0)
+        y1, _ = latcfilt(lat["k1"], _allpass_v(lat["k1"]), x, zi1)
+        return 0.5 * (y0 + lat["sign"] * y1)
+    y, _ = latcfilt(lat["k"], lat["v"], x, zi)
+    return y
+
+def lattice_filtfilt(lat, x):
+    """
+    Zero-phase (forward-backward) lattice filtering with scipy filtfilt's edge
+    handling: odd extension by 3 x (order + 1) samples at both ends, each pass
+    started in steady state for its first sample (lattice_zi), padding trimmed.
+    x is 1D or (n, channels).
+    """
+    x = np.asarray(x)
+    pad = min(3 * max(len(lat["a"]), len(lat["b"])), len(x) - 1)
+    # Odd extension about the end samples keeps the signal and its slope continuous
+    ext = np.concatenate([2 * x[:1] - x[pad:0:-1], x, 2 * x[-1:] - x[-2:-pad - 2:-1]]) if pad > 0 else x
+    y = apply_lattice(lat, ext, lattice_zi(lat, ext[0]))
+    y = y[::-1]
+    y = apply_lattice(lat, y, lattice_zi(lat, y[0]))[::-1]
+    return y[pad:len(y) - pad] if pad > 0 else y
+
+def benchmark_lattice(lat, n=10000):
+    """
+    Measure lattice throughput against an equivalent SOS cascade on white noise.
+    Returns samples/second for both and the lattice/SOS run-time ratio.
+    """
+    x = np.random.normal(size=n)
+    sos = tf2sos(lat["b"], lat["a"])
+    t0 = time.perf_counter(); apply_lattice(lat, x); t_lat = time.perf_counter() - t0
+    t0 = time.perf_counter(); sosfilt(sos, x); t_sos = time.perf_counter() - t0
+    t_lat = max(t_lat, 1e-9); t_sos = max(t_sos, 1e-9)
+    return {"lattice_sps": n / t_lat, "sos_sps": n / t_sos, "ratio": t_lat / t_sos,
+            "kernel": kernels.backend("lattice")}
+
+def _fmt_list(vals, data_type):
+    if data_type == "Fixed Q15":
+        return ", ".join(str(int(np.clip(round(x * 32768), -32768, 32767))) for x in vals)
+    if data_type == "Fixed Q31":
+        return ", ".join(str(int(np.clip(round(x * 2147483648), -2147483648, 2147483647))) for x in vals)
+    return ", ".join(f"{x:.10f}f" for x in vals)
+
+def _ladder_shift(v):
+    # Right-shift applied to ladder taps so they fit in a fractional fixed-point word
+    peak = float(np.max(np.abs(v))) if len(v) else 0.0
+    return int(np.floor(np.log2(peak))) + 1 if peak >= 1.0 else 0
+
+def lattice_c_code(lat, data_type="Float32", impl_style="Standard C"):
+    """
+    C export for a lattice design. Reflection coefficients are always |k| < 1 so
+    they map directly onto Q15/Q31; ladder taps are pre-scaled by 2^-V_SHIFT.
+    """
+    ctype = {"Fixed Q15": "int16_t", "Fixed Q31": "int32_t"}.get(data_type, "float")
+    rep = ""
+    if lat["kind"] == "allpass":
+        fixed = data_type != "Float32"
+        q = 15 if data_type == "Fixed Q15" else 31
+        acc = "int32_t" if q == 15 else "int64_t"
+        for name in ("k0", "k1"):
+            k = lat[name]
+            rep += f"#define AP{name[1]}_ORDER        {len(k)}\n"
+            rep += f"static const {ctype} AP{name[1]}_K[] = {{{_fmt_list(k, data_type) or '0'}}};\n"
+        rep += "// Stability: all |k| < 1\n"
+        rep += "\n// All-pass lattice branch: returns the backward output g[order]\n"
+        rep += f"static {ctype} AllPass_Lattice(const {ctype} *k, {ctype} *g, int order, {ctype} in) {{\n"
+        if fixed:
+            rep += f"    {acc} f = in;\n"
+            rep += "    for(int m=order; m>0; m--) {\n"
+            rep += f"        f -= (({acc})k[m-1] * g[m-1]) >> {q};\n"
+            rep += f"        g[m] = ({ctype})(((({acc})k[m-1] * f) >> {q}) + g[m-1]);\n"
+            rep += "    }\n"
+            rep += f"    g[0] = ({ctype})f;\n"
+        else:
+            rep += "    float f = in;\n"
+            rep += "    for(int m=order; m>0; m--) {\n"
+            rep += "        f -= k[m-1] * g[m-1];\n"
+            rep += "        g[m] = k[m-1] * f + g[m-1];\n"
+            rep += "    }\n"
+            rep += "    g[0] = f;\n"
+        rep += "    return g[order];\n"
+        rep += "}\n\n"
+        op = "+" if lat["sign"] > 0 else "-"
+        rep += f"// y = 0.5 * (A0(x) {op} A1(x))\n"
+        rep += f"{ctype} Filter_Process({ctype} in) {{\n"
+        rep += f"    static {ctype} g0[AP0_ORDER + 1] = {{0}};\n"
+        rep += f"    static {ctype} g1[AP1_ORDER + 1] = {{0}};\n"
+        rep += f"    {ctype} a0 = AllPass_Lattice(AP0_K, g0, AP0_ORDER, in);\n"
+        rep += f"    {ctype} a1 = AllPass_Lattice(AP1_K, g1, AP1_ORDER, in);\n"
+        if fixed:
+            rep += f"    return ({ctype})((({acc})a0 {op} a1) >> 1);\n"
+        else:
+            rep += f"    return 0.5f * (a0 {op} a1);\n"
+        rep += "}\n"
+        return rep
+
+    k, v = lat["k"], lat["v"]
+    rep += f"#define LATTICE_ORDER    {len(k)}\n"
+    if data_type == "Float32":
+        rep += f"static const float LATTICE_K[] = {{{_fmt_list(k, data_type)}}};\n"
+        rep += f"static const float LATTICE_V[] = {{{_fmt_list(v, data_type)}}};\n"
+        rep += "// Stability: all |k| < 1\n\n"
+        if impl_style == "ARM CMSIS-DSP":
+            rep += "// CMSIS-DSP expects k and v in time-reversed order\n"
+            rep += f"static float LATTICE_K_REV[] = {{{_fmt_list(k[::-1], data_type)}}};\n"
+            rep += f"static float LATTICE_V_REV[] = {{{_fmt_list(v[::-1], data_type)}}};\n"
+            rep += "static arm_iir_lattice_instance_f32 S;\n"
+            rep += "static float state[LATTICE_ORDER + 1];\n\n"
+            rep += "void Filter_Init(void) {\n"
+            rep += "    arm_iir_lattice_init_f32(&S, LATTICE_ORDER, LATTICE_K_REV, LATTICE_V_REV, state, 1);\n"
+            rep += "}\n\n"
+            rep += "float Filter_Process(float in) {\n"
+            rep += "    float out;\n"
+            rep += "    arm_iir_lattice_f32(&S, &in, &out, 1);\n"
+            rep += "    return out;\n"
+            rep += "}\n"
+            return rep
+        rep += "float Filter_Process(float in) {\n"
+        rep += "    static float g[LATTICE_ORDER + 1] = {0.0f};\n"
+        rep += "    float f = in, out = 0.0f;\n"
+        rep += "    for(int m=LATTICE_ORDER; m>0; m--) {\n"
+        rep += "        f -= LATTICE_K[m-1] * g[m-1];\n"
+        rep += "        g[m] = LATTICE_K[m-1] * f + g[m-1];\n"
+        rep += "        out += LATTICE_V[m] * g[m];\n"
+        rep += "    }\n"
+        rep += "    g[0] = f;\n"
+        rep += "    return out + LATTICE_V[0] * f;\n"
+        rep += "}\n"
+        return rep
+
+    # Fixed-point lattice
+    q = 15 if data_type == "Fixed Q15" else 31
+    acc = "int32_t" if q == 15 else "int64_t"
+    shift = _ladder_shift(v)
+    rep += f"#define LATTICE_Q        {q}\n"
+    rep += f"#define V_SHIFT          {shift} // ladder taps stored as v / 2^V_SHIFT\n"
+    rep += f"static const {ctype} LATTICE_K[] = {{{_fmt_list(k, data_type)}}};\n"
+    rep += f"static const {ctype} LATTICE_V[] = {{{_fmt_list(v / (2 ** shift), data_type)}}};\n"
+    rep += "// Stability: all |k| < 1, so every k fits the fractional range exactly\n\n"
+    rep += f"{ctype} Filter_Process({ctype} in) {{\n"
+    rep += f"    static {ctype} g[LATTICE_ORDER + 1] = {{0}};\n"
+    rep += f"    {acc} f = in, out = 0;\n"
+    rep += "    for(int m=LATTICE_ORDER; m>0; m--) {\n"
+    rep += f"        f -= (({acc})LATTICE_K[m-1] * g[m-1]) >> LATTICE_Q;\n"
+    rep += f"        g[m] = ({ctype})(((({acc})LATTICE_K[m-1] * f) >> LATTICE_Q) + g[m-1]);\n"
+    rep += f"        out += ({acc})LATTICE_V[m] * g[m];\n"
+    rep += "    }\n"
+    rep += f"    g[0] = ({ctype})f;\n"
+    rep += f"    out += ({acc})LATTICE_V[0] * f;\n"
+    rep += f"    return ({ctype})((out >> LATTICE_Q) << V_SHIFT);\n"
+    rep += "}\n"
+    return rep
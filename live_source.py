@@ -0,0 +1,308 @@
+"""
+Live acquisition: framed binary samples from a UDP socket, a named pipe or
+stdin, read by a background thread into a preallocated ring buffer.
+
+Frame layout (little-endian):
+    magic   4s   b"DSPF"
+    seq     u32  packet counter (gaps are reported as dropped packets)
+    n       u16  samples per axis in this frame
+    axes    u16  1 (single channel) or 6 (AX AY AZ GX GY GZ)
+    t_send  f64  sender wall-clock time (time.time()), for latency
+    data    f32  n * axes samples, interleaved
+
+One frame per UDP datagram; pipes and stdin carry back-to-back frames.
+
+Replay a capture as a stand-in device:
+    python live_source.py replay capture.csv --udp 127.0.0.1:9000 --fs 1000
+    python live_source.py replay --synth --fs 2000 > /tmp/dsp_fifo   (named pipe)
+    python live_source.py replay --synth --axes 6 | python advanced_dsp_studio.py   (stdin)
+"""
+import argparse
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import deque
+import numpy as np
+
+MAGIC = b"DSPF"
+HEADER = struct.Struct("<4sIHHd")
+TRANSPORTS = ["UDP", "Pipe", "Stdin"]
+
+def pack_frame(seq, samples, t_send=None):
+    samples = np.asarray(samples, dtype="<f4")
+    if samples.ndim == 1: samples = samples[:, None]
+    n, axes = samples.shape
+    return HEADER.pack(MAGIC, seq & 0xFFFFFFFF, n, axes, time.time() if t_send is None else t_send) + samples.tobytes()
+
+def parse_header(buf):
+    magic, seq, n, axes, t_send = HEADER.unpack_from(buf)
+    if magic != MAGIC: raise ValueError("bad frame magic")
+    return seq, n, axes, t_send
+
+def parse_frame(buf):
+    """Returns (seq, t_send, samples) with samples shaped (n, axes)."""
+    seq, n, axes, t_send = parse_header(buf)
+    data = np.frombuffer(buf, dtype="<f4", count=n * axes, offset=HEADER.size)
+    return seq, t_send, data.reshape(n, axes)
+
+class RingBuffer:
+    """
+    Preallocated single-producer / single-consumer ring of (capacity, axes)
+    samples. The producer copies a block in and then publishes the new total
+    write count; the consumer only ever advances its own read count, so no
+    lock is needed. If the producer laps the consumer, the oldest samples are
+    skipped and counted as overruns.
+    """
+    def __init__(self, capacity, axes=1, dtype=np.float32):
+        self.capacity = int(capacity); self.axes = axes
+        self.data = np.zeros((self.capacity, axes), dtype=dtype)
+        self.written = 0 # total samples published by the producer
+        self.read = 0    # total samples consumed
+        self.overruns = 0
+
+    def write(self, block):
+        if len(block) > self.capacity:
+            self.overruns += len(block) - self.capacity; block = block[-self.capacity:]
+        n = len(block); start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[start:start + first] = block[:first]
+        if first < n: self.data[:n - first] = block[first:]
+        self.written += n # publish after the copy
+
+    def read_new(self):
+        """Copy of every sample written since the last call."""
+        w = self.written
+        if w - self.read > self.capacity:
+            self.overruns += w - self.read - self.capacity
+            self.read = w - self.capacity
+        out = self._span(self.read, w); self.read = w
+        return out
+
+    def latest(self, n):
+        """Copy of the newest n samples (fewer if not yet available)."""
+        w = self.written
+        return self._span(max(0, w - min(n, self.capacity)), w)
+
+    def _span(self, a, b):
+        i, j = a % self.capacity, b % self.capacity
+        if b - a == 0: return self.data[:0].copy()
+        if i < j: return self.data[i:j].copy()
+        return np.concatenate([self.data[i:], self.data[:j]])
+
+class LiveReader(threading.Thread):
+    """Background reader: parses frames, checks sequence numbers, fills the ring."""
+    def __init__(self, transport="UDP", address="127.0.0.1:9000", axes=1, capacity=1 << 18, dtype=np.float32):
+        super().__init__(daemon=True)
+        self.transport = transport; self.address = address
+        self.ring = RingBuffer(capacity, axes, dtype)
+        self.stop_event = threading.Event()
+        self.packets = 0; self.dropped = 0; self.reordered = 0; self.bad = 0
+        self.expected = None; self.error = None; self.t_start = None
+        self.pending = deque() # (write count after packet, t_send) for latency
+        self._fh = None; self._sock = None
+
+    def stop(self):
+        self.stop_event.set()
+        for h in (self._sock, self._fh):
+            try:
+                if h is not None: h.close()
+            except OSError: pass
+
+    def _on_frame(self, buf):
+        try:
+            seq, t_send, samples = parse_frame(buf)
+        except (ValueError, struct.error):
+            self.bad += 1; return
+        if samples.shape[1] != self.ring.axes:
+            # Accept single-axis data in a multi-axis ring and vice versa by column 0
+            samples = samples[:, :1] if self.ring.axes == 1 else np.repeat(samples[:, :1], self.ring.axes, axis=1)
+        if self.expected is not None:
+            gap = (seq - self.expected) & 0xFFFFFFFF
+            if gap >= 0x80000000: self.reordered += 1
+            else: self.dropped += gap
+        self.expected = (seq + 1) & 0xFFFFFFFF
+        self.ring.write(samples)
+        self.packets += 1
+        self.pending.append((self.ring.written, t_send))
+
+    def run(self):
+        self.t_start = time.time()
+        try:
+            if self.transport == "UDP": self._run_udp()
+            else: self._run_stream()
+        except Exception as e:
+            if not self.stop_event.is_set(): self.error = str(e)
+
+    def _run_udp(self):
+        host, port = self.address.rsplit(":", 1)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+        self._sock.bind((host or "127.0.0.1", int(port)))
+        self._sock.settimeout(0.2)
+        while not self.stop_event.is_set():
+            try: buf = self._sock.recv(65536)
+            except socket.timeout: continue
+            self._on_frame(buf)
+
+    def _read_exact(self, n):
+        buf = b""
+        while len(buf) < n:
+            chunk = self._fh.read(n - len(buf))
+            if not chunk: return None
+            buf += chunk
+        return buf
+
+    def _run_stream(self):
+        self._fh = sys.stdin.buffer if self.transport == "Stdin" else open(self.address, "rb")
+        while not self.stop_event.is_set():
+            head = self._read_exact(HEADER.size)
+            if head is None: break
+            try:
+                _, n, axes, _ = parse_header(head)
+            except ValueError:
+                self.bad += 1; self._resync(head); continue
+            body = self._read_exact(4 * n * axes)
+            if body is None: break
+            self._on_frame(head + body)
+
+    def _resync(self, head):
+        # Drop bytes until the next magic so a corrupted stream recovers
+        window = head[1:]
+        while not self.stop_event.is_set():
+            idx = window.find(MAGIC)
+            if idx >= 0:
+                rest = self._read_exact(HEADER.size - (len(window) - idx))
+                if rest is None: return
+                buf = window[idx:] + rest
+                try:
+                    _, n, axes, _ = parse_header(buf)
+                except ValueError:
+                    window = buf[1:]; continue
+                body = self._read_exact(4 * n * axes)
+                if body is not None: self._on_frame(buf + body)
+                return
+            c = self._read_exact(1)
+            if c is None: return
+            window = window[-3:] + c
+
+class LiveSource:
+    """
+    Studio-side consumer: drains the reader's ring each tick, filters the new
+    samples of one axis through a causal PipelineStream (state carried across
+    ticks) and keeps raw / filtered display rings. Latency is measured from
+    the sender timestamp to the moment a packet's samples leave the filter.
+    """
+    def __init__(self, reader, display=1 << 16):
+        self.reader = reader
+        self.raw = RingBuffer(display, reader.ring.axes, reader.ring.data.dtype)
+        self.out = RingBuffer(display, 1, reader.ring.data.dtype)
+        self.stream = None; self.axis = 0
+        self.last_block = np.zeros((0, reader.ring.axes), dtype=reader.ring.data.dtype)
+        self.latency = deque(maxlen=2000)
+        self.consumed = 0
+
+    def set_stream(self, stream, axis=0):
+        """Install a new filter stream (design or axis changed); state starts fresh."""
+        self.stream = stream; self.axis = axis
+
+    def step(self):
+        """Process everything that arrived since the last call; returns the new filtered samples."""
+        block = self.reader.ring.read_new()
+        self.last_block = block # all axes, for per-axis trackers
+        y = block[:0, 0]
+        if len(block):
+            self.raw.write(block)
+            x = block[:, min(self.axis, block.shape[1] - 1)]
+            y = self.stream.process(x) if self.stream is not None else x
+            if len(y): self.out.write(y[:, None])
+        self.consumed = self.reader.ring.read
+        now = time.time(); pend = self.reader.pending
+        while pend and pend[0][0] <= self.consumed:
+            self.latency.append(now - pend.popleft()[1])
+        return y
+
+    def window(self, n):
+        """Newest n raw samples of the selected axis and the newest n filtered samples."""
+        raw = self.raw.latest(n)
+        raw = raw[:, min(self.axis, raw.shape[1] - 1)] if len(raw) else raw.reshape(0)
+        return raw, self.out.latest(n)[:, 0]
+
+    def stats(self):
+        r = self.reader
+        elapsed = max(time.time() - (r.t_start or time.time()), 1e-9)
+        lat = np.array(self.latency) * 1e3 if self.latency else np.zeros(1)
+        return {"packets": r.packets, "dropped": r.dropped, "reordered": r.reordered, "bad": r.bad,
+                "overruns": r.ring.overruns + self.raw.overruns, "rate": r.ring.written / elapsed,
+                "latency_p50_ms": float(np.percentile(lat, 50)), "latency_p99_ms": float(np.percentile(lat, 99)),
+                "error": r.error}
+
+def stats_summary(st):
+    line = (f"{st['packets']} pkts, {st['rate']:.0f} S/s | dropped {st['dropped']}"
+            f" (+{st['reordered']} reordered, {st['overruns']} overrun)\n"
+            f"latency p50 {st['latency_p50_ms']:.1f} ms / p99 {st['latency_p99_ms']:.1f} ms")
+    return line + (f"\nERROR: {st['error']}" if st["error"] else "")
+
+def replay(data, fs, block=32, udp=None, out=None, loop=False, drop=0.0, seed=0):
+    """
+    Stand-in device: send (n, axes) data as frames of `block` samples paced
+    at fs, to a UDP address "host:port" or a binary stream `out`. `drop`
+    randomly skips that fraction of packets to exercise loss reporting.
+    """
+    rng = np.random.default_rng(seed)
+    sock = None
+    if udp:
+        host, port = udp.rsplit(":", 1); target = (host, int(port))
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    seq = 0; t0 = time.perf_counter(); sent = 0
+    try:
+        while True:
+            for i in range(0, len(data), block):
+                frame = pack_frame(seq, data[i:i + block]); seq += 1
+                if drop <= 0 or rng.random() >= drop:
+                    if sock: sock.sendto(frame, target)
+                    else: out.write(frame); out.flush()
+                sent += len(data[i:i + block])
+                delay = t0 + sent / fs - time.perf_counter()
+                if delay > 0: time.sleep(delay)
+            if not loop: break
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+    finally:
+        if sock: sock.close()
+    return seq
+
+def _synth(fs, seconds, axes):
+    t = np.arange(int(fs * seconds)) / fs
+    cols = [np.sin(2 * np.pi * (10 + 5 * a) * t) + 0.5 * np.sin(2 * np.pi * 0.2 * fs * t) for a in range(axes)]
+    return (np.column_stack(cols) + 0.05 * np.random.normal(size=(len(t), axes))).astype(np.float32)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Live source utilities for DSP Studio.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rp = sub.add_parser("replay", help="Replay a CSV capture (or a synthetic signal) as framed packets")
+    rp.add_argument("file", nargs="?", help="Raw ADC or Accel-Gyro CSV (time column is dropped)")
+    rp.add_argument("--synth", action="store_true", help="Send a synthetic test signal instead of a file")
+    rp.add_argument("--axes", type=int, choices=[1, 6], default=1)
+    rp.add_argument("--fs", type=float, default=1000.0)
+    rp.add_argument("--block", type=int, default=32, help="Samples per packet")
+    rp.add_argument("--udp", default=None, help="host:port to send to (default: stdout)")
+    rp.add_argument("--loop", action="store_true")
+    rp.add_argument("--drop", type=float, default=0.0, help="Fraction of packets to drop on purpose")
+    args = ap.parse_args(argv)
+
+    if args.synth or not args.file:
+        data = _synth(args.fs, 10.0, args.axes)
+    else:
+        import signal_import
+        with open(args.file, "r") as fh: first = fh.readline()
+        has_header = any(c.isalpha() and c not in "eE" for c in first)
+        raw = signal_import.load_csv(args.file, skiprows=1 if has_header else 0, dtype=np.float32)
+        data = raw[:, 1:1 + args.axes] if has_header else raw[:, :args.axes]
+    out = None if args.udp else sys.stdout.buffer
+    n = replay(data, args.fs, args.block, args.udp, out, args.loop, args.drop)
+    print(f"sent {n} packets", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
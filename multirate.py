@@ -0,0 +1,167 @@
+import numpy as np
+from math import gcd
+from scipy.signal import firwin, resample_poly
+import precision
+
+def reduce_factors(up, down):
+    """Reduce an L/M rate change to lowest terms."""
+    up = max(1, int(up)); down = max(1, int(down))
+    g = gcd(up, down)
+    return up // g, down // g
+
+def design_antialias(up, down, half_len_per_rate=10, beta=5.0):
+    """
+    Anti-alias / anti-image low-pass for an L/M polyphase resampler, matching
+    resample_poly's default design (Kaiser, cutoff 1/max(L, M) of Nyquist).
+    Taps are unscaled; resample_poly applies the gain of L itself.
+    """
+    up, down = reduce_factors(up, down)
+    max_rate = max(up, down)
+    if max_rate == 1: return np.array([1.0])
+    return firwin(2 * half_len_per_rate * max_rate + 1, 1.0 / max_rate, window=('kaiser', beta))
+
+def polyphase_components(h, up):
+    """
+    Split a prototype filter into L polyphase branches E_p[k] = h[p + k*L],
+    zero-padded to equal length. Returns an (L, taps_per_phase) array.
+    """
+    taps_per_phase = int(np.ceil(len(h) / up))
+    padded = np.zeros(up * taps_per_phase)
+    padded[:len(h)] = h
+    return padded.reshape(taps_per_phase, up).T
+
+def resample(x, up, down, h=None):
+    """Polyphase L/M resampling (delay-compensated, as scipy.signal.resample_poly)."""
+    up, down = reduce_factors(up, down)
+    if up == down == 1: return np.asarray(x)
+    if h is None: h = design_antialias(up, down)
+    # Taps follow the signal's precision so float32 input stays float32
+    return resample_poly(x, up, down, window=np.asarray(h, dtype=precision.float_dtype(x)))
+
+def restore_rate(y, up, down, n_target, h=None):
+    """Interpolate a reduced-rate signal back by M/L and trim/pad to n_target samples."""
+    back = resample(y, down, up, h)
+    if len(back) >= n_target: return back[:n_target]
+    return np.concatenate([back, np.full(n_target - len(back), back[-1] if len(back) else 0.0, dtype=back.dtype)])
+
+def polyphase_stream(x, h, up, down):
+    """
+    Reference model of the exported C resampler: per input sample, emit every
+    output whose upsampled-grid position falls on this input, using only the
+    polyphase branch that contributes. Equivalent to upfirdn(h * L, x, L, M)
+    (causal, no delay compensation).
+    """
+    up, down = reduce_factors(up, down)
+    phases = polyphase_components(np.asarray(h) * up, up)
+    taps = phases.shape[1]
+    hist = np.zeros(taps)
+    out = []
+    phase = 0
+    for v in np.asarray(x, dtype=float):
+        hist[1:] = hist[:-1]; hist[0] = v
+        while phase < up:
+            out.append(np.dot(phases[phase], hist))
+            phase += down
+        phase -= up
+    return np.array(out)
+
+def compute_savings(fs, up, down, stage_macs, fft_len=None, aa_taps=None, passes=2):
+    """
+    Estimate compute with and without the multirate stage.
+    stage_macs: multiply-accumulates per sample of the processing chain
+    (per pass; `passes`=2 for filtfilt). The polyphase resampler costs
+    len(h)/L MACs per output sample; interpolating back costs the same per
+    full-rate output. FFT cost is counted as N*log2(N) per spectrum and
+    included in the totals. Returns a dict of MAC/s figures and the
+    fractional saving (negative when the resampler costs more than it saves).
+    """
+    up, down = reduce_factors(up, down)
+    fs_eff = fs * up / down
+    if aa_taps is None: aa_taps = len(design_antialias(up, down))
+    full = fs * stage_macs * passes
+    reduced = fs_eff * stage_macs * passes
+    resampler = fs_eff * aa_taps / up if (up, down) != (1, 1) else 0.0
+    out = {"fs_in": fs, "fs_eff": fs_eff, "full_macs": full, "reduced_macs": reduced,
+           "resampler_macs": resampler}
+    fft_full = fft_red = 0.0
+    if fft_len:
+        n_red = max(2, int(fft_len * up / down))
+        fft_full = float(fft_len * np.log2(fft_len))
+        fft_red = float(n_red * np.log2(n_red))
+    out["fft_full_ops"] = fft_full; out["fft_reduced_ops"] = fft_red
+    out["total_full"] = full + fft_full
+    out["total_reduced"] = reduced + resampler + fft_red
+    out["saving"] = 1.0 - out["total_reduced"] / out["total_full"] if out["total_full"] > 0 else 0.0
+    return out
+
+def polyphase_c_code(h, up, down, data_type="Float32", impl_style="Standard C"):
+    """
+    C export of the L/M polyphase resampler that feeds the filter chain.
+    Integer decimation with CMSIS-DSP maps to arm_fir_decimate_f32.
+    """
+    up, down = reduce_factors(up, down)
+    rep = "// --- POLYPHASE MULTIRATE STAGE ---\n"
+    rep += f"#define MR_UP            {up}\n"
+    rep += f"#define MR_DOWN          {down}\n"
+    if impl_style == "ARM CMSIS-DSP" and up == 1:
+        rep += f"#define MR_NUM_TAPS      {len(h)}\n"
+        rep += "#define MR_BLOCK         (MR_DOWN * 8)\n"
+        rep += f"static const float MR_COEFFS[MR_NUM_TAPS] = {{{', '.join(f'{c:.10f}f' for c in h)}}};\n"
+        rep += "static float mr_state[MR_NUM_TAPS + MR_BLOCK - 1];\n"
+        rep += "static arm_fir_decimate_instance_f32 MR;\n\n"
+        rep += "void Decimator_Init(void) {\n"
+        rep += "    arm_fir_decimate_init_f32(&MR, MR_NUM_TAPS, MR_DOWN, (float *)MR_COEFFS, mr_state, MR_BLOCK);\n"
+        rep += "}\n\n"
+        rep += "// in: MR_BLOCK samples at FS_IN_HZ, out: MR_BLOCK / MR_DOWN samples at FS_HZ\n"
+        rep += "void Decimator_Process(const float *in, float *out) {\n"
+        rep += "    arm_fir_decimate_f32(&MR, (float *)in, out, MR_BLOCK);\n"
+        rep += "}\n"
+        return rep
+
+    phases = polyphase_components(np.asarray(h) * up, up)
+    taps = phases.shape[1]
+    rep += f"#define MR_TAPS_PER_PHASE {taps}\n"
+    if data_type == "Float32":
+        rep += "static const float MR_PHASES[MR_UP][MR_TAPS_PER_PHASE] = {\n"
+        for p, row in enumerate(phases):
+            rep += f"    {{{', '.join(f'{c:.10f}f' for c in row)}}}, // Phase {p}\n"
+    else:
+        q = 15 if data_type == "Fixed Q15" else 31
+        ctype = "int16_t" if q == 15 else "int32_t"
+        # Each branch gain is ~1, so a fractional format fits after dividing by 2
+        rep += "#define MR_SHIFT         1 // branch taps stored as h / 2\n"
+        rep += f"static const {ctype} MR_PHASES[MR_UP][MR_TAPS_PER_PHASE] = {{\n"
+        for p, row in enumerate(phases):
+            vals = np.clip(np.round(row / 2 * (2 ** q)), -(2 ** q), 2 ** q - 1).astype(np.int64)
+            rep += f"    {{{', '.join(str(v) for v in vals)}}}, // Phase {p}\n"
+    rep += "};\n\n"
+    rep += "// Push one input sample at FS_IN_HZ; writes 0..ceil(L/M) outputs at FS_HZ.\n"
+    rep += "// Only the branch aligned with each output is evaluated (taps/L MACs per output).\n"
+    if data_type == "Float32":
+        rep += "int Resampler_Process(float in, float *out) {\n"
+        rep += "    static float hist[MR_TAPS_PER_PHASE] = {0.0f};\n"
+        acc_decl = "        float acc = 0.0f;\n"
+        acc_out = "        out[n_out++] = acc;\n"
+    else:
+        acc_t = "int64_t"
+        ctype = "int16_t" if data_type == "Fixed Q15" else "int32_t"
+        qbits = 15 if data_type == "Fixed Q15" else 31
+        rep += f"int Resampler_Process({ctype} in, {ctype} *out) {{\n"
+        rep += f"    static {ctype} hist[MR_TAPS_PER_PHASE] = {{0}};\n"
+        acc_decl = f"        {acc_t} acc = 0;\n"
+        acc_out = f"        out[n_out++] = ({ctype})((acc >> {qbits}) << MR_SHIFT);\n"
+    rep += "    static int phase = 0;\n"
+    rep += "    int n_out = 0;\n"
+    rep += "    for(int k=MR_TAPS_PER_PHASE-1; k>0; k--) hist[k] = hist[k-1];\n"
+    rep += "    hist[0] = in;\n"
+    rep += "    while(phase < MR_UP) {\n"
+    rep += acc_decl
+    cast = "" if data_type == "Float32" else "(int64_t)"
+    rep += f"        for(int k=0; k<MR_TAPS_PER_PHASE; k++) acc += {cast}MR_PHASES[phase][k] * hist[k];\n"
+    rep += acc_out
+    rep += "        phase += MR_DOWN;\n"
+    rep += "    }\n"
+    rep += "    phase -= MR_UP;\n"
+    rep += "    return n_out;\n"
+    rep += "}\n"
+    return rep
@@ -0,0 +1,257 @@
+import json
+import numpy as np
+from scipy import signal
+import complex_filters
+import filter_design
+import kalman_models
+import kernels
+import latency
+import polynomial
+import running_stats
+
+DEFAULT_BLOCK = 4096
+
+def filter_stage(spec):
+    """Pipeline stage wrapping a standard (Stage 1) design spec."""
+    return {"type": "filter", "spec": dict(spec)}
+
+def complex_stage(name, params):
+    """Pipeline stage wrapping a complex-layer (Stage 2) algorithm."""
+    return {"type": "complex", "name": name, "params": dict(params)}
+
+def describe_stage(stage):
+    if stage["type"] == "filter":
+        s = stage["spec"]
+        if s["resp"] == "Notch":
+            return f"Notch {s['cutoff_1']:.1f} Hz (Q={s['notch_q']:.0f})"
+        fc = f"{s['cutoff_1']:.1f}" if s["resp"] in ("Low-Pass", "High-Pass") else f"{s['cutoff_1']:.1f}-{s['cutoff_2']:.1f}"
+        return f"{s['proto']} {s['f_class']} {s['resp']} {fc} Hz (N={s['order']})"
+    if stage["type"] == "complex" and stage["name"] == "Poly Detrend":
+        p = stage["params"]
+        return f"Poly Detrend order {p['poly_order']} ({'global' if p['poly_seg'] <= 0 else str(p['poly_seg']) + ' smp segments'})"
+    if stage["type"] == "complex" and stage["name"] == "Running Stats":
+        p = stage["params"]
+        bands = f" @ {', '.join(f'{f:g}' for f in p['rs_freqs'])} Hz" if p["rs_metric"] == "Band Power" else ""
+        return f"Running {p['rs_metric']} ({p['rs_win']} smp{bands})"
+    if stage["type"] == "complex" and stage["name"] == "Kalman" and stage["params"].get("kf_model", "Random Walk") != "Random Walk":
+        p = stage["params"]
+        mode = " steady-state" if p["kf_steady"] else ""
+        return f"Kalman {p['kf_model']}{mode}{' + RTS' if p['kf_smooth'] else ''} (Q={p['kf_q']:.1e}, R={p['kf_r']:.1e})"
+    return f"{stage['name']} (non-linear)" if stage["type"] == "complex" else stage["type"]
+
+def build_pipeline(stages, fs):
+    """
+    Compile a stage list into an execution plan. Runs of adjacent LTI stages
+    are fused into one segment: a single convolved FIR when every stage in
+    the run is FIR, otherwise one concatenated SOS cascade. Non-linear
+    stages become their own segments. Bypassed designs are dropped.
+    """
+    plan = []
+    run = []
+
+    def flush():
+        if not run: return
+        if all(len(a) == 1 for _, (b, a) in run):
+            taps = np.array([1.0])
+            for _, (b, a) in run: taps = np.convolve(taps, b / a[0])
+            plan.append({"kind": "fir", "b": taps, "n_fused": len(run)})
+        else:
+            sos = np.vstack([filter_design.design_sos(spec, fs) for spec, _ in run])
+            plan.append({"kind": "sos", "sos": sos, "n_fused": len(run)})
+        run.clear()
+
+    for stage in stages:
+        if stage["type"] == "filter":
+            if filter_design.is_identity(stage["spec"]): continue
+            run.append((stage["spec"], filter_design.design_filter(stage["spec"], fs)))
+        else:
+            flush()
+            # Specs and sessions saved before a parameter existed get its default
+            plan.append({"kind": "complex", "name": stage["name"], "params": complex_filters.complete_params(stage["params"], fs)})
+    flush()
+    return plan
+
+def run_pipeline(plan, x, zero_phase=True, dtype=None):
+    """
+    Whole-array execution of a plan. zero_phase=True matches the studio's
+    filtfilt convention (sosfiltfilt / filtfilt on each fused segment).
+    x may also be 2D (signals, samples): LTI segments then filter every row
+    in one call, non-linear segments run row by row (the Kalman layer runs
+    all rows as one bank).
+    dtype (default float64) is the processing precision; coefficients are
+    cast to it so float32 signals are never silently upcast. Causal runs
+    start in steady state for the first sample, like PipelineStream.
+    """
+    y = np.asarray(x, dtype=float if dtype is None else dtype)
+    dt = y.dtype
+    for seg in plan:
+        if seg["kind"] == "sos":
+            sos = seg["sos"].astype(dt, copy=False)
+            y = signal.sosfiltfilt(sos, y) if zero_phase else latency.causal_sosfilt(sos, y)
+        elif seg["kind"] == "fir":
+            b = seg["b"].astype(dt, copy=False); a = np.ones(1, dtype=dt)
+            y = signal.filtfilt(b, a, y) if zero_phase else latency.causal_lfilter(b, a, y)
+        elif y.ndim == 2 and seg["name"] != "Kalman": # the Kalman layer filters all rows as one bank
+            y = np.vstack([complex_filters.apply_complex_filter(seg["name"], row, seg["params"]) for row in y])
+        else:
+            y = complex_filters.apply_complex_filter(seg["name"], y, seg["params"])
+        y = y.astype(dt, copy=False)
+    return y
+
+class _SosStream:
+    # Cascade started in steady state. Runs on the "biquad" kernel when it is compiled;
+    # the kernels compute in float64 and their Python reference is slower than
+    # sosfilt, so reduced precision or no numba / C keeps scipy
+    def __init__(self, sos):
+        self.sos = sos; self.zi = None
+        self.fast = sos.dtype == np.float64 and kernels.accelerated("biquad")
+    def process(self, x):
+        if len(x) == 0: return x
+        if self.fast:
+            if self.zi is None: self.zi = kernels.biquad_zi(self.sos) * x[0]
+            return kernels.biquad(self.sos, x, self.zi)
+        if self.zi is None: self.zi = (signal.sosfilt_zi(self.sos) * x[0]).astype(x.dtype)
+        y, self.zi = signal.sosfilt(self.sos, x, zi=self.zi)
+        return y
+    def flush(self): return np.zeros(0)
+
+class _FirStream:
+    # No recursion here, so lfilter's vectorised loop beats a per-sample kernel
+    def __init__(self, b):
+        self.b = b; self.a = np.ones(1, dtype=b.dtype); self.zi = None
+    def process(self, x):
+        if len(x) == 0: return x
+        if self.zi is None: self.zi = (signal.lfilter_zi(self.b, self.a) * x[0]).astype(x.dtype)
+        y, self.zi = signal.lfilter(self.b, self.a, x, zi=self.zi)
+        return y
+    def flush(self): return np.zeros(0)
+
+class _WindowedStream:
+    """
+    Centered sliding-window stage streamed with a (2*half)-sample halo.
+    Output lags input by `half` samples and is released in flush().
+    pad: 'zero' reproduces medfilt's zero padding exactly, 'edge' repeats the
+    first/last sample, so streamed Savitzky-Golay matches savgol mode='nearest'.
+    The offline filter keeps the default mode='interp' (polynomial fit at the
+    edges), so the first and last win//2 samples of the two differ.
+    """
+    def __init__(self, func, half, pad='zero'):
+        self.func = func; self.half = half; self.pad = pad; self.buf = None
+    def _padding(self, value, dtype):
+        return np.full(self.half, value if self.pad == 'edge' else 0.0, dtype=dtype)
+    def process(self, x):
+        if self.buf is None:
+            if len(x) == 0: return np.zeros(0)
+            self.buf = self._padding(x[0], x.dtype)
+        self.buf = np.concatenate([self.buf, x])
+        if len(self.buf) < 2 * self.half + 1: return np.zeros(0)
+        y = self.func(self.buf)[self.half:len(self.buf) - self.half]
+        self.buf = self.buf[len(self.buf) - 2 * self.half:]
+        return y
+    def flush(self):
+        if self.buf is None: return np.zeros(0)
+        self.buf = np.concatenate([self.buf, self._padding(self.buf[-1], self.buf.dtype)])
+        y = self.func(self.buf)[self.half:len(self.buf) - self.half]
+        self.buf = None
+        return y
+
+class _KalmanStream:
+    # Scalar random-walk Kalman filter with carried (x, P); same model as apply_kalman_filter
+    def __init__(self, q, r):
+        self.q = q; self.r = r; self.x = None; self.p = 10.0
+    def process(self, z):
+        if len(z) == 0: return np.zeros(0, dtype=z.dtype)
+        y, self.x, self.p = kernels.kalman(z, self.q, self.r, self.x, self.p)
+        return y.astype(z.dtype, copy=False)
+    def flush(self): return np.zeros(0)
+
+class _LmsStream:
+    # One-step-ahead LMS predictor with carried weights and input history
+    def __init__(self, mu, order):
+        self.mu = mu; self.order = order
+        self.w = np.zeros(order); self.hist = None
+    def process(self, x):
+        if self.hist is None: self.hist = np.zeros(0, dtype=x.dtype)
+        data = np.concatenate([self.hist, x])
+        y = kernels.lms(data, self.w, self.mu, start=len(self.hist))
+        self.hist = data[-self.order:]
+        return y.astype(x.dtype, copy=False)
+    def flush(self): return np.zeros(0)
+
+def _make_stream(seg, dtype):
+    if seg["kind"] == "sos": return _SosStream(seg["sos"].astype(dtype))
+    if seg["kind"] == "fir": return _FirStream(seg["b"].astype(dtype))
+    name, p = seg["name"], seg["params"]
+    if name == "Kalman":
+        # The RTS smoother needs the whole record, so streams run the forward filter
+        if p["kf_model"] == "Random Walk" and not p["kf_steady"]: return _KalmanStream(p["kf_q"], p["kf_r"])
+        return kalman_models.KalmanStream(p["kf_model"], p["kf_q"], p["kf_r"], p["kf_steady"])
+    if name == "Adaptive (LMS)": return _LmsStream(p["lms_mu"], p["lms_ord"])
+    if name == "Poly Detrend":
+        # Piecewise fits stream with one segment of lag; a global fit needs the whole
+        # record, so streaming uses the running fit of everything seen so far
+        if p["poly_seg"] > 0: return polynomial.DetrendStream(p["poly_order"], p["poly_seg"])
+        return polynomial.RunningDetrendStream(p["poly_order"])
+    if name == "Running Stats": return running_stats.RunningStatsStream(p["rs_win"], p["rs_metric"], p["rs_freqs"], p["rs_fs"])
+    if name == "Median":
+        k = p["med_ker"] + (1 - p["med_ker"] % 2)
+        return _WindowedStream(lambda b: signal.medfilt(b, k), k // 2, pad='zero')
+    if name == "Savitzky-Golay":
+        win = p["sg_win"] + (1 - p["sg_win"] % 2)
+        return _WindowedStream(lambda b: complex_filters.apply_savgol_filter(b, win, p["sg_poly"], mode='nearest'), win // 2, pad='edge')
+    if name == "Wavelet":
+        # Approximate: denoise overlapping windows; threshold is estimated per window
+        half = 16 * (2 ** p["wt_lev"])
+        return _WindowedStream(lambda b: complex_filters.apply_wavelet_denoising(b, p["wt_wave"], p["wt_lev"])[:len(b)], half, pad='edge')
+    return None
+
+class PipelineStream:
+    """
+    Causal block-by-block execution of a plan. Each block passes through every
+    segment while it is still cache-resident; LTI segments carry filter state,
+    windowed non-linear stages carry a halo and emit with a fixed lag.
+    """
+    def __init__(self, plan, dtype=None):
+        self.dtype = np.dtype(float if dtype is None else dtype)
+        self.streams = [s for s in (_make_stream(seg, self.dtype) for seg in plan) if s is not None]
+
+    def process(self, block):
+        y = np.asarray(block, dtype=self.dtype)
+        for st in self.streams:
+            y = st.process(y).astype(self.dtype, copy=False)
+        return y
+
+    def flush(self):
+        # Drain stages in order; each stage's tail is pushed through the ones after it
+        pending = np.zeros(0, dtype=self.dtype)
+        for st in self.streams:
+            pending = np.concatenate([st.process(pending), st.flush()]).astype(self.dtype, copy=False)
+        return pending
+
+def iter_pipeline(plan, x, block_size=DEFAULT_BLOCK, dtype=None):
+    """Yield output blocks for x streamed through the plan (causal mode)."""
+    stream = PipelineStream(plan, dtype)
+    for i in range(0, len(x), block_size):
+        y = stream.process(x[i:i + block_size])
+        if len(y): yield y
+    y = stream.flush()
+    if len(y): yield y
+
+def stream_pipeline(plan, x, block_size=DEFAULT_BLOCK, dtype=None):
+    """Causal block-streamed execution collected into one array."""
+    blocks = list(iter_pipeline(plan, x, block_size, dtype))
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=float if dtype is None else dtype)
+
+def save_spec(path, stages, fs, zero_phase=False):
+    """Write a pipeline spec (JSON) for headless use, e.g. by batch_process.py."""
+    with open(path, "w") as fh:
+        json.dump({"version": 1, "fs": fs, "zero_phase": zero_phase, "stages": stages}, fh, indent=2)
+
+def load_spec(path):
+    """Read a pipeline spec; design specs are completed with filter_design defaults."""
+    with open(path, "r") as fh:
+        spec = json.load(fh)
+    for st in spec.get("stages", []):
+        if st["type"] == "filter": st["spec"] = filter_design.make_spec(**st["spec"])
+    spec.setdefault("zero_phase", False)
+    return spec
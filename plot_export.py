@@ -0,0 +1,306 @@
+"""
+Off-screen rendering of the studio's analysis plots and a documentation bundle.
+
+    python plot_export.py spec.json -o report/ --input capture.csv -j 4
+
+Plots are drawn on plain matplotlib Figures with the Agg canvas, so no
+display (and no Tk) is needed. Each plot is rendered by its own worker
+process; the bundle is one directory holding every plot as PNG and/or SVG,
+the generated C source (filter.c) and metrics.json (design, cost and signal
+figures). The draw_* functions are shared with the studio's dashboard cards.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from scipy.fft import rfft, rfftfreq
+from scipy.signal import sos2zpk, tf2zpk
+import c_export
+import complex_filters
+import cost_model
+import filter_design
+import pipeline
+import response
+import shared_buffers
+import signal_import
+
+PLOTS = {"time": "Oscilloscope: Raw vs Filtered", "fft": "FFT Spectrum", "resp": "Magnitude Response (dB)",
+         "impulse": "Impulse Response", "pz": "Pole-Zero Map", "phase": "Phase Response",
+         "gain_lin": "Linear Gain Profile", "gd": "Group Delay", "step": "Step Response"}
+FORMATS = ("png", "svg")
+STEM_MAX = 200 # longer impulse responses are drawn as a line
+
+def style_axes(fig, ax):
+    """Dark dashboard styling used by every card."""
+    fig.set_facecolor('#242424'); ax.set_facecolor('#1a1a1a')
+    ax.tick_params(colors='white'); ax.xaxis.label.set_color('white'); ax.yaxis.label.set_color('white')
+    ax.grid(True, color='#444444', linestyle='--')
+    fig.subplots_adjust(left=0.06, right=0.98, top=0.94, bottom=0.12)
+
+def _labels(ax, xlabel, ylabel):
+    ax.set_xlabel(xlabel, color='white', fontsize=9)
+    ax.set_ylabel(ylabel, color='white', fontsize=9)
+
+def _legend(ax, loc):
+    ax.legend(loc=loc, fontsize=8, facecolor='#242424', labelcolor='white')
+
+def draw_time(ax, raw, filtered, overlays=None, ylim=None, causal=None):
+    """
+    Raw vs filtered; overlays is (colors, signals), causal an optional causal
+    output drawn next to the zero-phase one. ylim=None applies the smart
+    scaling for offset sensor data.
+    """
+    ax.clear()
+    ax.plot(raw, color='#555', alpha=0.4, label="Raw")
+    ax.plot(filtered, color='#00d1ff', label="Filtered")
+    if causal is not None:
+        ax.plot(causal, color='#ff7b00', linewidth=1, label="Causal")
+    if overlays is not None:
+        for i, (c, y) in enumerate(zip(*overlays)):
+            ax.plot(y, color=c, linewidth=1, alpha=0.8, label=f"#{i+1}")
+    if overlays is not None or causal is not None:
+        _legend(ax, "upper right")
+    if ylim is None:
+        data_min = min(np.min(raw), np.min(filtered))
+        data_max = max(np.max(raw), np.max(filtered))
+        padding = max(0.5, (data_max - data_min) * 0.15)
+        ylim = [data_min - padding, data_max + padding]
+    ax.set_ylim(ylim)
+    _labels(ax, "Sample Index n", "Amplitude")
+
+def draw_fft(ax, xf, mag, fs):
+    ax.clear()
+    ax.fill_between(xf, mag, color='#fc0', alpha=0.3)
+    ax.plot(xf, mag, color='#fc0')
+    ax.set_xlim([0, fs/2])
+    _labels(ax, "Frequency [Hz]", "Magnitude")
+
+def _freq_axis(ax, w, fs, log):
+    # Log axes start at the first grid point above 0 Hz
+    if log:
+        ax.set_xscale('log'); ax.set_xlim([w[w > 0][0] if np.any(w > 0) else fs / 2e4, fs/2])
+    else:
+        ax.set_xlim([0, fs/2])
+
+def draw_resp(ax, w, h, fs, overlays=None, log=False):
+    ax.clear()
+    ax.plot(w, 20*np.log10(np.maximum(abs(h), 1e-4)), color='#f0f', linewidth=2)
+    if overlays is not None:
+        colors, w_ab, h_ab = overlays
+        for i, (c, hi) in enumerate(zip(colors, h_ab)):
+            ax.plot(w_ab, 20*np.log10(np.maximum(abs(hi), 1e-4)), color=c, linewidth=1, label=f"#{i+1}")
+        _legend(ax, "lower left")
+    ax.set_ylim([-80, 5]); _freq_axis(ax, w, fs, log)
+    _labels(ax, "Frequency [Hz]", "Gain [dB]")
+
+def draw_impulse(ax, imp_resp):
+    ax.clear()
+    if len(imp_resp) <= STEM_MAX:
+        ax.stem(np.arange(len(imp_resp)), imp_resp, linefmt='#00ff88', markerfmt='D', basefmt=" ")
+    else:
+        ax.plot(imp_resp, color='#00ff88')
+    _labels(ax, "Sample n", "h[n]")
+
+def draw_step(ax, step, settle=None):
+    """Step response; settle (samples) marks where it stays inside the settling band."""
+    ax.clear()
+    ax.plot(step, color='#00d1ff')
+    if settle:
+        ax.axvline(settle, color='#ff9f1c', linestyle='--', linewidth=1, label=f"settled @ n={int(settle)}")
+        _legend(ax, "lower right")
+    _labels(ax, "Sample n", "Step Response")
+
+def draw_group_delay(ax, w, gd, fs, log=False):
+    ax.clear()
+    ax.plot(w, gd, color='#a06cd5')
+    # Singular spikes at zeros on the circle would flatten everything else
+    lo, hi = np.percentile(gd, [1, 99]) if len(gd) else (0.0, 1.0)
+    pad = max(0.1 * (hi - lo), 0.5)
+    ax.set_ylim([lo - pad, hi + pad]); _freq_axis(ax, w, fs, log)
+    _labels(ax, "Frequency [Hz]", "Group Delay [Samples]")
+
+def draw_phase(ax, w, h, fs, overlays=None, log=False):
+    ax.clear()
+    ax.plot(w, np.angle(h), color='#ff4444')
+    if overlays is not None:
+        colors, w_ab, h_ab = overlays
+        for c, hi in zip(colors, h_ab):
+            ax.plot(w_ab, np.angle(hi), color=c, linewidth=1, alpha=0.8)
+    _freq_axis(ax, w, fs, log)
+    _labels(ax, "Frequency [Hz]", "Phase [Radians]")
+
+def draw_gain(ax, w, h, fs, log=False):
+    ax.clear()
+    ax.plot(w, np.abs(h), color='#00ff88')
+    ax.set_ylim([0, 1.2]); _freq_axis(ax, w, fs, log)
+    _labels(ax, "Frequency [Hz]", "Gain [Linear]")
+
+def draw_pz(ax, z, p):
+    ax.clear()
+    ut = np.linspace(0, 2*np.pi, 100)
+    ax.plot(np.cos(ut), np.sin(ut), 'w--', alpha=0.3)
+    ax.scatter(np.real(z), np.imag(z), marker='o', edgecolors='#0f0', facecolors='none')
+    ax.scatter(np.real(p), np.imag(p), marker='x', color='#f00')
+    ax.set_aspect('equal')
+    _labels(ax, "Real Part", "Imaginary Part")
+
+def draw(ax, key, data):
+    """Draw plot `key` from an analysis() dict."""
+    fs = data["fs"]
+    if key == "time": draw_time(ax, data["raw"], data["filtered"])
+    elif key == "fft": draw_fft(ax, data["xf"], data["mag"], fs)
+    elif key == "resp": draw_resp(ax, data["w"], data["h"], fs)
+    elif key == "impulse": draw_impulse(ax, data["imp"])
+    elif key == "pz": draw_pz(ax, data["z"], data["p"])
+    elif key == "phase": draw_phase(ax, data["w"], data["h"], fs)
+    elif key == "gain_lin": draw_gain(ax, data["w"], data["h"], fs)
+    elif key == "gd": draw_group_delay(ax, data["w"], data["gd"], fs)
+    elif key == "step": draw_step(ax, data["step"], data["settle"])
+    else: raise ValueError(f"unknown plot {key!r}")
+
+def design_response(stages, fs, n=response.N_BASE, log=False):
+    """
+    Combined response of the LTI stages of a pipeline (complex stages are
+    skipped) from the response engine: w, h, gd, imp, step, settle plus the
+    zeros z and poles p. Fused FIR runs are analysed in tf form, IIR runs
+    section-wise, as on the dashboard.
+    """
+    sections, zs, ps = [], [], []
+    for seg in pipeline.build_pipeline(stages, fs):
+        if seg["kind"] == "fir":
+            sections += response.as_sections(seg["b"], [1.0]); z, p, _ = tf2zpk(seg["b"], [1.0])
+        elif seg["kind"] == "sos":
+            sections += response.as_sections(None, None, seg["sos"]); z, p, _ = sos2zpk(seg["sos"])
+        else: continue
+        zs.append(z); ps.append(p)
+    z = np.concatenate(zs) if zs else np.zeros(0); p = np.concatenate(ps) if ps else np.zeros(0)
+    d = response.analyse(sections or [(np.ones(1), np.ones(1))], fs, z, p, n, log)
+    d.update(z=z, p=p)
+    return d
+
+def test_signal(fs, n=2000, seed=0):
+    """Documentation input when no capture is given: tones at 5% and 35% of Fs plus white noise."""
+    t = np.arange(n) / fs
+    rng = np.random.default_rng(seed)
+    return np.sin(2*np.pi*0.05*fs*t) + 0.5*np.sin(2*np.pi*0.35*fs*t) + 0.2*rng.standard_normal(n)
+
+def analysis(stages, fs, raw=None, filtered=None, zero_phase=True):
+    """Everything the nine plots need, as plain arrays (cheap to send to worker processes)."""
+    raw = test_signal(fs) if raw is None else np.asarray(raw, dtype=float)
+    if filtered is None:
+        filtered = pipeline.run_pipeline(pipeline.build_pipeline(stages, fs), raw, zero_phase=zero_phase)
+    N = len(filtered)
+    return dict(design_response(stages, fs), fs=fs, raw=raw, filtered=np.asarray(filtered, dtype=float),
+                xf=rfftfreq(N, 1/fs)[:N//2], mag=2.0/N * np.abs(rfft(filtered)[:N//2]))
+
+def render(key, data, path_base, formats=FORMATS, size=(14, 6), dpi=100):
+    """Render one plot off-screen to path_base.<fmt> for every format; returns the written paths."""
+    data = shared_buffers.resolve(data) # large arrays arrive as shared-memory handles
+    fig = Figure(figsize=size)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    style_axes(fig, ax)
+    draw(ax, key, data)
+    ax.set_title(PLOTS[key], color='#00d1ff', fontsize=12)
+    paths = []
+    for fmt in formats:
+        path = f"{path_base}.{fmt}"
+        fig.savefig(path, format=fmt, dpi=dpi, facecolor=fig.get_facecolor())
+        paths.append(path)
+    return paths
+
+def _metrics(stages, fs, data, summary):
+    raw, filt = data["raw"], data["filtered"]
+    rms = lambda y: float(np.sqrt(np.mean(np.square(y)))) if len(y) else 0.0
+    p = data["p"]
+    return {
+        "fs": fs, "stages": [pipeline.describe_stage(st) for st in stages],
+        "design": {"order_zeros": len(data["z"]), "order_poles": len(p),
+                   "max_pole_radius": float(np.max(np.abs(p))) if len(p) else 0.0,
+                   "stable": bool(np.all(np.abs(p) < 1.0)),
+                   "dc_gain_db": float(20*np.log10(max(abs(data["h"][0]), 1e-12))),
+                   "peak_gain_db": float(20*np.log10(max(np.max(np.abs(data["h"])), 1e-12))),
+                   "settle_samples": int(data["settle"])},
+        "cost": dict({k: summary[k] for k in ("macs", "adds", "total_cycles", "budget_cycles", "load_pct",
+                                              "over_budget", "gd_samples", "gd_ms")},
+                     memory_bytes={dt: int(sum(m)) for dt, m in summary["memory"].items()}),
+        "signal": {"samples": len(raw), "raw_rms": rms(raw), "filtered_rms": rms(filt),
+                   "raw_peak": float(np.max(np.abs(raw))) if len(raw) else 0.0,
+                   "filtered_peak": float(np.max(np.abs(filt))) if len(filt) else 0.0},
+    }
+
+def export_bundle(out_dir, stages, fs, raw=None, filtered=None, zero_phase=True, formats=FORMATS, workers=None,
+                  plots=tuple(PLOTS), data_type="Float32", impl_style="Standard C",
+                  iir_struct="Cascaded Biquads (SOS)", mcu_profile=cost_model.DEFAULT_PROFILE, budget_pct=100.0,
+                  start_method=None):
+    """
+    Write the documentation bundle for a stage list into out_dir: every plot
+    in every format, filter.c (first filter stage + first complex stage, as
+    the server's /ccode) and metrics.json. workers=0 renders in-process
+    (for callers that already run inside a worker pool); start_method
+    "spawn" is safe from a threaded GUI process. Returns the
+    metrics dict, which also lists the written files.
+    """
+    t0 = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    data = analysis(stages, fs, raw, filtered, zero_phase)
+    filt = next((st["spec"] for st in stages if st["type"] == "filter"), filter_design.make_spec(resp="None"))
+    cplx = next(({"name": st["name"], "params": complex_filters.complete_params(st["params"], fs)} for st in stages if st["type"] == "complex"), None)
+    opts = dict(mcu_profile=mcu_profile, budget_pct=budget_pct)
+    code = c_export.generate_c_code(filt, fs, data_type, impl_style, iir_struct, complex_spec=cplx, **opts)
+    summary = c_export.chain_cost(filt, fs, data_type, impl_style, iir_struct, complex_spec=cplx, **opts)
+
+    bases = [os.path.join(out_dir, key) for key in plots]
+    if workers == 0:
+        files = [render(key, data, base, formats) for key, base in zip(plots, bases)]
+    else:
+        ctx = multiprocessing.get_context(start_method) if start_method else None
+        with shared_buffers.SharedBufferPool() as buffers, \
+             ProcessPoolExecutor(max_workers=workers or min(len(plots), os.cpu_count() or 1), mp_context=ctx) as pool:
+            shared = buffers.share(data)
+            files = list(pool.map(render, plots, [shared] * len(plots), bases, [formats] * len(plots)))
+    c_path = os.path.join(out_dir, "filter.c")
+    with open(c_path, "w") as fh: fh.write(code)
+
+    metrics = _metrics(stages, fs, data, summary)
+    metrics["files"] = [os.path.basename(f) for fs_ in files for f in fs_] + ["filter.c", "metrics.json"]
+    metrics["render_seconds"] = time.perf_counter() - t0
+    with open(os.path.join(out_dir, "metrics.json"), "w") as fh: json.dump(metrics, fh, indent=2)
+    return metrics
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render DSP Studio plots, C export and metrics without a display.")
+    ap.add_argument("spec", help="Pipeline spec JSON (File > Save Pipeline Spec in the studio)")
+    ap.add_argument("-o", "--out-dir", required=True, help="Bundle directory")
+    ap.add_argument("--input", default=None, help="Capture to plot (CSV/TXT; first data column, or AX for Accel-Gyro)")
+    ap.add_argument("--fs", type=float, default=None, help="Sampling rate (default: the spec's)")
+    ap.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    ap.add_argument("-j", "--workers", type=int, default=None, help="Render processes (0 = in-process)")
+    ap.add_argument("--data-type", default="Float32", choices=list(cost_model.TYPE_BYTES)[:3])
+    ap.add_argument("--mcu", default=cost_model.DEFAULT_PROFILE, choices=list(cost_model.MCU_PROFILES))
+    ap.add_argument("--budget", type=float, default=100.0, help="CPU share available to the filter [%%]")
+    args = ap.parse_args(argv)
+    spec = pipeline.load_spec(args.spec)
+    fs = args.fs or spec.get("fs") or 1000.0
+    raw = None
+    if args.input:
+        with open(args.input, "r") as fh: first = fh.readline()
+        try:
+            [float(v) for v in first.strip().split(",")]; accel = False
+        except ValueError:
+            accel = True
+        data = signal_import.load_csv(args.input, skiprows=1 if accel else 0)
+        raw = data[:, 1] if accel else data[:, 0]
+    m = export_bundle(args.out_dir, spec["stages"], fs, raw, zero_phase=spec.get("zero_phase", True),
+                      formats=args.formats, workers=args.workers, data_type=args.data_type,
+                      mcu_profile=args.mcu, budget_pct=args.budget)
+    print(f"{len(m['files'])} files in {args.out_dir} ({m['render_seconds']:.2f} s)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
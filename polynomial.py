@@ -0,0 +1,199 @@
+"""
+Polynomial baseline removal (detrending) for offset / drifting sensor channels.
+
+Global mode fits one polynomial to the whole record; the least-squares
+problem is accumulated chunk by chunk with QR updates (R and Q^T y only), so
+memory is bounded by the chunk size whatever the record length, and every
+channel of a (signals, samples) array is solved in the same pass.
+
+Piecewise mode fits a polynomial to windows of `segment` samples spaced
+segment/2 apart and cross-fades neighbouring fits with complementary
+ramps, giving a smooth baseline that follows slow drift. All complete
+windows share one basis, so each batch of windows is fitted with a single
+matrix product. DetrendStream produces the identical result block by block
+with a lag of one segment.
+
+Polynomials are evaluated in a Legendre basis on [-1, 1] for conditioning.
+"""
+import numpy as np
+from scipy.linalg import solve_triangular
+
+CHUNK = 65536
+MAX_ORDER = 5
+STREAM_SPAN = 1 << 20 # basis span (samples) of the running fit used by streaming Global mode
+MODES = ["Global", "Piecewise"]
+
+def legendre_basis(u, order):
+    """(len(u), order + 1) Legendre polynomials P0..P_order at u (three-term recurrence)."""
+    u = np.asarray(u, dtype=float)
+    V = np.empty((len(u), order + 1))
+    V[:, 0] = 1.0
+    if order >= 1: V[:, 1] = u
+    for k in range(2, order + 1):
+        V[:, k] = ((2 * k - 1) * u * V[:, k - 1] - (k - 1) * V[:, k - 2]) / k
+    return V
+
+class PolyFit:
+    """
+    Incremental least-squares polynomial fit over sample indices. add()
+    folds each chunk into the triangular factor R and Q^T y with one small
+    QR, so the state is (order+1)^2 + (order+1)*channels numbers.
+    Samples i map to u = (i - center) / half_span.
+    """
+    def __init__(self, order, center, half_span):
+        self.order = order; self.center = center; self.half_span = max(half_span, 1e-12)
+        self.R = None; self.qty = None; self.n = 0
+
+    def basis(self, idx):
+        return legendre_basis((np.asarray(idx, dtype=float) - self.center) / self.half_span, self.order)
+
+    def add(self, idx, y):
+        """idx: sample indices of the chunk; y: (len,) or (len, channels)."""
+        A = self.basis(idx); Y = np.asarray(y, dtype=float).reshape(len(A), -1)
+        if self.R is not None:
+            A = np.vstack([self.R, A]); Y = np.vstack([self.qty, Y])
+        Q, self.R = np.linalg.qr(A)
+        self.qty = Q.T @ Y
+        self.n += len(idx)
+
+    def coef(self):
+        """Basis coefficients (order+1, channels); orders beyond the data are dropped to zero."""
+        p = self.order + 1
+        c = np.zeros((p, self.qty.shape[1] if self.qty is not None else 1))
+        m = min(p, self.n)
+        if m: c[:m] = solve_triangular(self.R[:m, :m], self.qty[:m], check_finite=False)
+        return c
+
+    def evaluate(self, idx, coef=None):
+        return self.basis(idx) @ (self.coef() if coef is None else coef)
+
+def _rows(x):
+    # (samples, channels) view of a 1D signal or a (signals, samples) array
+    return x[:, None] if x.ndim == 1 else x.T
+
+def detrend_global(x, order=2, chunk=CHUNK):
+    """Subtract one least-squares polynomial from the whole record (two chunked passes)."""
+    x = np.asarray(x); n = x.shape[-1]
+    if n == 0: return x.copy()
+    fit = PolyFit(order, (n - 1) / 2, (n - 1) / 2)
+    X = _rows(x)
+    for i in range(0, n, chunk):
+        fit.add(np.arange(i, min(n, i + chunk)), X[i:i + chunk])
+    coef = fit.coef()
+    out = np.empty_like(x)
+    O = _rows(out)
+    for i in range(0, n, chunk):
+        idx = np.arange(i, min(n, i + chunk))
+        O[i:i + chunk] = X[i:i + chunk] - fit.evaluate(idx, coef).astype(x.dtype, copy=False)
+    return out
+
+def baseline(x, order=2, segment=0):
+    """Baseline estimate of a 1D signal (global fit when segment <= 0)."""
+    x = np.asarray(x)
+    return x - detrend(x, order, segment)
+
+def detrend(x, order=2, segment=0):
+    """Detrended x: global fit when segment <= 0 (or longer than x), else piecewise (1D or row-wise 2D)."""
+    x = np.asarray(x)
+    order = int(np.clip(order, 0, MAX_ORDER))
+    if segment <= 0 or segment >= x.shape[-1]: return detrend_global(x, order)
+    if x.ndim == 2: return np.vstack([detrend(row, order, segment) for row in x])
+    st = DetrendStream(order, segment)
+    out = [st.process(x[i:i + CHUNK]) for i in range(0, len(x), CHUNK)]
+    return np.concatenate(out + [st.flush()]).astype(x.dtype, copy=False)
+
+class DetrendStream:
+    """
+    Piecewise detrend streamed block by block. Window k covers samples
+    [k*H, k*H + 2H) (H = segment // 2); region j = [j*H, (j+1)*H) blends the
+    fits of windows j-1 and j with ramps that sum to one, so it is final
+    once window j is complete. Output lags input by up to one segment;
+    flush() fits the samples still held and fades them in.
+    """
+    def __init__(self, order, segment):
+        self.order = int(np.clip(order, 0, MAX_ORDER))
+        self.H = max(int(segment) // 2, self.order + 1); self.L = 2 * self.H
+        u = (np.arange(self.L) - (self.L - 1) / 2) / ((self.L - 1) / 2)
+        self.A = legendre_basis(u, self.order)
+        self.P = np.linalg.pinv(self.A) # (p, L): window samples -> coefficients
+        self.rise = (np.arange(self.H) + 0.5) / self.H
+        self.buf = None # samples from the start of the next unfinished region
+        self.prev = None # fit of the last complete window over that region
+
+    def process(self, x):
+        x = np.asarray(x)
+        if self.buf is None:
+            if len(x) == 0: return x
+            self.buf = x[:0]
+        self.buf = np.concatenate([self.buf, x])
+        K = (len(self.buf) - self.L) // self.H + 1 if len(self.buf) >= self.L else 0
+        if K <= 0: return self.buf[:0]
+        # All complete windows at once: (K, L) strided view -> (L, K) fitted values
+        win = np.lib.stride_tricks.sliding_window_view(self.buf[:(K + 1) * self.H], self.L)[::self.H][:K]
+        fits = self.A @ (self.P @ win.T.astype(float))
+        first, second = fits[:self.H], fits[self.H:]
+        prev = np.concatenate([self.prev[:, None], second[:, :-1]], axis=1) if self.prev is not None else None
+        if prev is None:
+            base = np.concatenate([first[:, :1], first[:, 1:] * self.rise[:, None] + second[:, :-1] * (1 - self.rise[:, None])], axis=1)
+        else:
+            base = first * self.rise[:, None] + prev * (1 - self.rise[:, None])
+        self.prev = second[:, -1]
+        n_out = K * self.H
+        y = self.buf[:n_out] - base.T.ravel().astype(self.buf.dtype, copy=False)
+        self.buf = self.buf[n_out:]
+        return y
+
+    def flush(self):
+        if self.buf is None: return np.zeros(0)
+        rest = self.buf; self.buf = None
+        if self.prev is None:
+            # Never completed a window: the record is shorter than one segment
+            return detrend_global(rest, self.order) if len(rest) else rest
+        # rest = second half of the last window + a tail shorter than H. The
+        # tail gets a fit over everything still held, cross-faded into the
+        # last window's fit over the second half.
+        base = self.prev
+        if len(rest) > self.H:
+            fit = PolyFit(self.order, (len(rest) - 1) / 2, (len(rest) - 1) / 2)
+            fit.add(np.arange(len(rest)), rest)
+            end = fit.evaluate(np.arange(len(rest)))[:, 0]
+            base = np.concatenate([self.prev * (1 - self.rise) + end[:self.H] * self.rise, end[self.H:]])
+        self.prev = None
+        return rest - base.astype(rest.dtype, copy=False)
+
+class RunningDetrendStream:
+    """
+    Causal stand-in for Global mode in streaming: each block has the fit to
+    everything seen so far (including itself) subtracted. Converges to the
+    global detrend as the record grows; state is one PolyFit.
+    """
+    def __init__(self, order):
+        self.fit = PolyFit(int(np.clip(order, 0, MAX_ORDER)), STREAM_SPAN / 2, STREAM_SPAN / 2)
+        self.i = 0
+
+    def process(self, x):
+        x = np.asarray(x)
+        if len(x) == 0: return x
+        idx = np.arange(self.i, self.i + len(x)); self.i += len(x)
+        self.fit.add(idx, x)
+        return x - self.fit.evaluate(idx)[:, 0].astype(x.dtype, copy=False)
+
+    def flush(self): return np.zeros(0)
+
+def fit_report(x, fs, order=2):
+    """Global fit in physical terms: value and derivatives at the record centre, residual RMS."""
+    x = np.asarray(x, dtype=float); n = len(x)
+    if n < 2: return "Not enough samples for a polynomial fit."
+    fit = PolyFit(order, (n - 1) / 2, (n - 1) / 2)
+    for i in range(0, n, CHUNK): fit.add(np.arange(i, min(n, i + CHUNK)), x[i:i + CHUNK])
+    coef = fit.coef()[:, 0]
+    # Power-series coefficients in seconds from the record centre
+    half_s = (n - 1) / 2 / fs
+    power = np.polynomial.legendre.leg2poly(coef) / half_s ** np.arange(len(coef))
+    names = ["offset", "drift", "curvature"] + [f"t^{k} term" for k in range(3, len(coef))]
+    units = ["", "/s", "/s^2"] + [f"/s^{k}" for k in range(3, len(coef))]
+    resid = x - fit.evaluate(np.arange(n), coef[:, None])[:, 0]
+    lines = [f"Global polynomial fit (order {order}, {n} samples, {n / fs:.2f} s, t = 0 at the record centre)"]
+    lines += [f"  {nm:<12} {c: .6g} {u}" for nm, c, u in zip(names, power, units)]
+    lines.append(f"  residual RMS {np.sqrt(np.mean(resid ** 2)):.6g} | trend span {np.ptp(x - resid):.6g} (peak-to-peak)")
+    return "\n".join(lines)
@@ -0,0 +1,41 @@
+import numpy as np
+
+# Processing precision modes. Float32 matches the firmware's arithmetic and
+# halves the memory (and bandwidth) of every signal buffer.
+PRECISIONS = {"Float64": np.float64, "Float32": np.float32}
+
+def get_dtype(name):
+    return np.dtype(PRECISIONS.get(name, np.float64))
+
+def as_signal(x, dtype):
+    """Cast a signal to the processing dtype (no copy when it already matches)."""
+    return np.asarray(x).astype(dtype, copy=False)
+
+def float_dtype(x):
+    """dtype that processing of x should keep: its own if floating, else float64."""
+    dt = np.asarray(x).dtype
+    return dt if np.issubdtype(dt, np.floating) else np.dtype(np.float64)
+
+def compare(y, y_ref):
+    """
+    Numeric difference of a reduced-precision result against its float64
+    reference: max/RMS absolute error, error relative to the reference peak
+    and the signal-to-error ratio in dB.
+    """
+    y_ref = np.asarray(y_ref, dtype=np.float64)
+    n = min(len(y), len(y_ref))
+    err = np.asarray(y[:n], dtype=np.float64) - y_ref[:n]
+    ref_rms = np.sqrt(np.mean(y_ref[:n] ** 2)) if n else 0.0
+    err_rms = np.sqrt(np.mean(err ** 2)) if n else 0.0
+    peak = np.max(np.abs(y_ref[:n])) if n else 0.0
+    max_abs = float(np.max(np.abs(err))) if n else 0.0
+    return {"max_abs": max_abs, "rms": float(err_rms),
+            "rel_max": max_abs / peak if peak > 0 else 0.0,
+            "snr_db": float(20 * np.log10(ref_rms / err_rms)) if err_rms > 0 and ref_rms > 0 else np.inf}
+
+def compare_summary(diff, dtype, n_samples):
+    """One-line report of a comparison plus the per-buffer memory at dtype."""
+    mb = n_samples * np.dtype(dtype).itemsize / 1e6
+    snr = "exact" if np.isinf(diff["snr_db"]) else f"SNR {diff['snr_db']:.1f} dB"
+    return (f"{np.dtype(dtype).name}: {mb:.2f} MB/buffer | vs float64: max err {diff['max_abs']:.2e} "
+            f"({100 * diff['rel_max']:.4f}% of peak), {snr}")
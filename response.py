@@ -0,0 +1,124 @@
+"""
+Response engine for the design cards: magnitude / phase on an adaptive
+frequency grid, group delay, and impulse / step responses run to their
+settling length.
+
+    grid        N_BASE points, linear from 0 Hz or log-spaced over
+                LOG_DECADES below Nyquist, plus a cluster around every
+                pole / zero whose distance to the unit circle is finer than
+                the local grid spacing (a Q=100 notch, or a low cutoff at
+                high fs), then up to REFINE_PASSES bisections wherever
+                neighbouring points above DB_FLOOR differ by more than
+                MAX_DB_STEP
+    group delay analytic, summed over sections
+    time        long enough for the slowest pole to decay by DECAY_TOL
+                (the whole FIR), shown up to past the point where the step
+                response stays within SETTLE_BAND of its final value
+
+Designs are given as a list of (b, a) sections (SOS rows, a single
+transfer function, or the fused segments of a pipeline) and evaluated
+section by section, so high-order cascades keep their precision.
+"""
+import warnings
+import numpy as np
+from scipy.signal import freqz, group_delay, lfilter
+
+N_BASE = 1024
+LOG_DECADES = 4
+CLUSTER = 2.0 ** np.arange(-3, 7) # offsets around a root, in units of its distance to the circle
+MIN_DIST = 1e-7 # rad/sample; roots on the circle (notch zeros) use this distance
+MAX_DB_STEP = 1.0
+DB_FLOOR = -80.0 # bottom of the magnitude card; stopband ripple below it does not drive refinement
+REFINE_PASSES = 6
+MAX_POINTS = 16384
+DECAY_TOL = 1e-6
+SETTLE_BAND = 0.02 # of the final step value, or of the peak when the final value is ~0 (high-pass)
+MIN_SAMPLES = 32
+MAX_SAMPLES = 1 << 18
+UNSTABLE_SAMPLES = 1024 # shown for poles on or outside the circle
+
+def as_sections(b, a, sos=None):
+    """Section list of a design: SOS rows if given, else the single (b, a)."""
+    if sos is not None: return [(s[:3], s[3:]) for s in np.asarray(sos)]
+    return [(np.atleast_1d(b), np.atleast_1d(a))]
+
+def _evaluate(sections, w):
+    h = np.ones(len(w), dtype=complex)
+    for b, a in sections: h *= freqz(b, a, worN=w)[1]
+    return h
+
+def _base_grid(n, log):
+    if not log: return np.linspace(0.0, np.pi, n)
+    return np.concatenate([[0.0], np.pi * np.logspace(-LOG_DECADES, 0, n - 1)])
+
+def grid(roots, n=N_BASE, log=False):
+    """Frequencies (rad/sample, sorted, 0..pi) of the base grid plus clusters around sharp roots."""
+    w = _base_grid(n, log)
+    spacing = np.gradient(w)
+    pts = [w]
+    roots = np.asarray(roots)
+    if len(roots):
+        theta = np.abs(np.angle(roots)); d = np.maximum(np.abs(1.0 - np.abs(roots)), MIN_DIST)
+        local = np.interp(theta, w, spacing)
+        for t, dist, sp in zip(theta, d, local):
+            off = dist * CLUSTER
+            off = off[off < sp] # coarser features are resolved by the base grid
+            if len(off): pts.append(np.concatenate([[t], t - off, t + off]))
+    w = np.unique(np.clip(np.concatenate(pts), 0.0, np.pi))
+    return w
+
+def _refine(sections, w, h):
+    # Bisect intervals across which the magnitude moves too far between neighbours. Phase is
+    # left out: a long linear-phase FIR turns by more than any fixed step per grid point.
+    for _ in range(REFINE_PASSES):
+        db = np.maximum(20 * np.log10(np.maximum(np.abs(h), 1e-300)), DB_FLOOR)
+        coarse = (np.abs(np.diff(db)) > MAX_DB_STEP) & (np.diff(w) > 2 * MIN_DIST)
+        idx = np.nonzero(coarse)[0][:max(MAX_POINTS - len(w), 0)]
+        if len(idx) == 0: break
+        wm = 0.5 * (w[idx] + w[idx + 1])
+        w = np.concatenate([w, wm]); h = np.concatenate([h, _evaluate(sections, wm)])
+        order = np.argsort(w, kind="stable"); w, h = w[order], h[order]
+    return w, h
+
+def _group_delay(sections, w):
+    gd = np.zeros(len(w))
+    with warnings.catch_warnings():
+        # Singular at zeros on the circle; scipy returns 0 there
+        warnings.simplefilter("ignore")
+        for b, a in sections: gd += group_delay((b, a), w=w)[1]
+    return gd
+
+def time_length(poles, sections):
+    """Samples needed for the impulse response to decay by DECAY_TOL (at least the FIR length)."""
+    n = sum(len(b) - 1 for b, _ in sections) + 1
+    r = np.max(np.abs(poles), initial=0.0)
+    if r >= 1.0: return UNSTABLE_SAMPLES
+    if r > 0: n = max(n, int(np.ceil(np.log(DECAY_TOL) / np.log(r))))
+    return int(min(max(n, MIN_SAMPLES), MAX_SAMPLES))
+
+def settling(step, final=None):
+    """First sample after which the step response stays within SETTLE_BAND of its final value (default: last sample)."""
+    final = step[-1] if final is None else final
+    peak = np.max(np.abs(step))
+    ref = abs(final) if abs(final) > 1e-3 * peak else peak
+    out = np.nonzero(np.abs(step - final) > SETTLE_BAND * ref)[0]
+    return int(out[-1] + 1) if len(out) else 0
+
+def analyse(sections, fs, zeros=(), poles=(), n=N_BASE, log=False):
+    """
+    Everything the design cards draw, as arrays: w (Hz), h, gd (samples),
+    imp and step (cut at 1.5x the settling length, at least MIN_SAMPLES),
+    settle (samples).
+    """
+    w = grid(np.concatenate([np.asarray(zeros, dtype=complex), np.asarray(poles, dtype=complex)]), n, log)
+    w, h = _refine(sections, w, _evaluate(sections, w))
+    x = np.zeros(time_length(poles, sections)); x[0] = 1.0
+    for b, a in sections: x = lfilter(b, a, x)
+    step = np.cumsum(x)
+    settle = settling(step, h[0].real) # grid starts at 0 Hz: h[0] is the DC gain
+    # Shown length: past the settling point, and long enough to hold 99.99% of the impulse energy
+    energy = np.cumsum(x * x)
+    tail = int(np.searchsorted(energy, (1 - 1e-4) * energy[-1])) + 1 if energy[-1] > 0 else 0
+    show = min(len(x), max(MIN_SAMPLES, int(1.5 * max(settle, tail)) + 1))
+    return {"w": w * fs / (2 * np.pi), "h": h, "gd": _group_delay(sections, w),
+            "imp": x[:show], "step": step[:show], "settle": settle}
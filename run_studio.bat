@@ -33,6 +33,9 @@ if %errorlevel% neq 0 (
     echo [OK] All dependencies are ready.
 )
 
+:: Compile the C kernels once (skipped quietly when no C compiler is installed)
+python kernels.py build >nul 2>&1
+
 :: 3. Launch the Application
 echo [STEP 2/2] Launching Advanced DSP Studio...
 echo.
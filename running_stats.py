@@ -0,0 +1,131 @@
+"""
+Streaming envelope trackers for vibration monitoring: moving RMS, moving
+max / min, crest factor and Goertzel band power over a window of W samples.
+
+Every tracker costs O(1) per sample and carries its state across blocks,
+and a block of (samples, channels) updates all channels (e.g. the six
+Accel-Gyro axes) in the same vectorised pass:
+
+    RMS         running sum of squares, taken as differences of a block
+                cumulative sum over the last W-1 samples plus the new block
+    max / min   van Herk / Gil-Werman: prefix and suffix maxima inside
+                W-sample blocks, three comparisons per sample. The C export
+                runs the equivalent monotonic deques sample by sample.
+    crest       max(|max|, |min|) / RMS over the same window
+    band power  Goertzel over consecutive W-sample blocks at each chosen
+                frequency, summed and held until the next block completes
+
+Until W samples have been seen the window is everything seen so far.
+"""
+import numpy as np
+from scipy.signal import lfilter
+
+METRICS = {"RMS": "rms", "Max": "max", "Min": "min", "Crest": "crest", "Band Power": "band"}
+MIN_WINDOW = 2
+
+def parse_freqs(text):
+    """'50, 100 120' -> [50.0, 100.0, 120.0]; entries that are not numbers are skipped."""
+    out = []
+    for tok in str(text).replace(",", " ").split():
+        try: out.append(float(tok))
+        except ValueError: pass
+    return out
+
+def goertzel_coeffs(freqs, fs):
+    """2 cos(2 pi f / fs) for each frequency (the Goertzel feedback coefficient)."""
+    return 2.0 * np.cos(2.0 * np.pi * np.asarray(freqs, dtype=float) / fs)
+
+def _sliding_max(y, w):
+    # Maxima of every length-w window of y (rows >= w, channels): the window [i, i+w-1]
+    # spans at most two w-blocks, so it is max(suffix max at i, prefix max at i+w-1)
+    n = y.shape[0] - w + 1
+    nb = -(-y.shape[0] // w)
+    blk = np.concatenate([y, np.full((nb * w - y.shape[0], y.shape[1]), -np.inf)]).reshape(nb, w, -1)
+    pre = np.maximum.accumulate(blk, axis=1).reshape(nb * w, -1)
+    suf = np.maximum.accumulate(blk[:, ::-1], axis=1)[:, ::-1].reshape(nb * w, -1)
+    return np.maximum(suf[:n], pre[w - 1:w - 1 + n])
+
+class RunningStats:
+    """
+    Trackers for `channels` signals over a window of `window` samples.
+    update(block) takes (samples,) or (samples, channels) and returns a dict
+    of (samples, channels) arrays: rms, max, min, crest, band (band power of
+    freqs in Hz at fs, as mean square, 0 before the first full window).
+    latest holds the last row of each.
+    """
+    def __init__(self, channels=1, window=256, freqs=(), fs=1.0):
+        self.channels = channels; self.window = w = max(MIN_WINDOW, int(window))
+        self.freqs = list(freqs); self.fs = fs
+        self.gc = goertzel_coeffs(self.freqs, fs) if self.freqs else np.zeros(0)
+        self.hist = np.full((w - 1, channels), np.nan) # last w-1 samples, NaN = not seen yet
+        self.pend = np.zeros((0, channels)) # samples of the Goertzel block in progress
+        self.band = np.zeros(channels)
+        self.seen = 0
+        self.latest = {k: np.zeros(channels) for k in METRICS.values()}
+
+    def update(self, block):
+        x = np.asarray(block, dtype=float)
+        x = x.reshape(-1, 1) if x.ndim == 1 else x
+        n, w = x.shape[0], self.window
+        if n == 0: return {k: np.zeros((0, self.channels)) for k in METRICS.values()}
+        ext = np.concatenate([self.hist, x])
+        valid = ~np.isnan(ext)
+        sq = np.where(valid, ext, 0.0) ** 2
+        cs = np.concatenate([np.zeros((1, self.channels)), np.cumsum(sq, axis=0)])
+        count = np.minimum(self.seen + np.arange(1, n + 1), w)[:, None]
+        rms = np.sqrt(np.maximum(cs[w:] - cs[:-w], 0.0) / count)
+        hi = _sliding_max(np.where(valid, ext, -np.inf), w)
+        lo = -_sliding_max(np.where(valid, -ext, -np.inf), w)
+        peak = np.maximum(np.abs(hi), np.abs(lo))
+        crest = np.divide(peak, rms, out=np.zeros_like(rms), where=rms > 0)
+        out = {"rms": rms, "max": hi, "min": lo, "crest": crest, "band": self._band(x)}
+        self.hist = ext[len(ext) - (w - 1):]
+        self.seen += n
+        self.latest = {k: v[-1].copy() for k, v in out.items()}
+        return out
+
+    def _band(self, x):
+        # Goertzel on every W-sample block completed by x; each output sample holds the
+        # power of the last completed block (table[0] = value before this call)
+        w = self.window; p = len(self.pend)
+        buf = np.concatenate([self.pend, x])
+        nb = len(buf) // w
+        table = np.empty((nb + 1, self.channels)); table[0] = self.band
+        if nb and len(self.gc):
+            blk = buf[:nb * w].reshape(nb, w, -1)
+            power = np.zeros((nb, self.channels))
+            for c in self.gc:
+                s = lfilter([1.0], [1.0, -c, 1.0], blk, axis=1)
+                s1, s2 = s[:, -1], s[:, -2]
+                power += 2.0 * (s1 * s1 + s2 * s2 - c * s1 * s2) / (w * w)
+            table[1:] = power
+        elif nb:
+            table[1:] = 0.0
+        self.band = table[-1]
+        self.pend = buf[nb * w:]
+        return table[(p + np.arange(1, len(x) + 1)) // w]
+
+def track(x, window=256, metric="RMS", freqs=(), fs=1.0):
+    """One tracker over a whole signal (1D, or (samples, channels)); same shape as x."""
+    x = np.asarray(x)
+    y = RunningStats(1 if x.ndim == 1 else x.shape[1], window, freqs, fs).update(x)[METRICS[metric]]
+    return y[:, 0] if x.ndim == 1 else y
+
+class RunningStatsStream:
+    """Pipeline stream form of track(): the trackers are causal, so blocks match the offline result."""
+    def __init__(self, window, metric, freqs, fs):
+        self.key = METRICS[metric]; self.args = (window, freqs, fs); self.st = None
+    def process(self, x):
+        if self.st is None: self.st = RunningStats(1, *self.args)
+        return self.st.update(x)[self.key][:, 0].astype(x.dtype, copy=False)
+    def flush(self): return np.zeros(0)
+
+def summary(latest, names, freqs=()):
+    """Per-channel readout lines of RunningStats.latest."""
+    lines = []
+    for i, nm in enumerate(names):
+        line = (f"{nm}: rms {latest['rms'][i]:.4g}  max {latest['max'][i]:.4g}  min {latest['min'][i]:.4g}"
+                f"  crest {latest['crest'][i]:.2f}")
+        if freqs: line += f"  band {latest['band'][i]:.3g}"
+        lines.append(line)
+    return "\n".join(lines)
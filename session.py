@@ -0,0 +1,161 @@
+"""
+Project sessions: studio state plus cached results in one binary file.
+
+A session (.dsps) is an uncompressed NumPy .npz archive:
+
+    meta               JSON (as uint8): version, studio state, capture reference, cache index
+    cache/<key>/<name> arrays of cached results (coefficients, responses, spectra, ...)
+
+Results are keyed by content_key() of everything they depend on (design
+spec, Fs, a hash of the input signal), so a reopened session only
+recomputes what is no longer valid and stale entries simply miss.
+
+Imported captures are not embedded. They are written once to a capture
+cache directory as <hash>.npy and memory-mapped on load, so reopening a
+large import neither re-parses the CSV nor reads the samples eagerly.
+"""
+import hashlib
+import io
+import json
+import os
+import zipfile
+from collections import OrderedDict
+import numpy as np
+
+VERSION = 1
+SUFFIX = ".dsps"
+CACHE_MAX_BYTES = 256 << 20
+HASH_CHUNK = 1 << 24 # bytes hashed per step, keeps memmapped captures paged in gradually
+
+def array_hash(a):
+    """Content hash of an array (shape, dtype and bytes), hashed in chunks."""
+    a = np.asarray(a)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((a.shape, a.dtype.str)).encode())
+    flat = a.reshape(-1) if a.flags.c_contiguous else np.ascontiguousarray(a).reshape(-1)
+    step = max(1, HASH_CHUNK // max(a.itemsize, 1))
+    for i in range(0, flat.size, step):
+        h.update(flat[i:i + step].tobytes())
+    return h.hexdigest()
+
+def _json_default(obj):
+    # NumPy scalars / arrays that end up in specs and stage lists
+    if isinstance(obj, np.generic): return obj.item()
+    if isinstance(obj, np.ndarray): return obj.tolist()
+    raise TypeError(f"{type(obj).__name__} is not JSON serialisable")
+
+def content_key(*parts):
+    """Cache key for a result: arrays are hashed by content, everything else by repr."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"v{VERSION}".encode())
+    for p in parts:
+        h.update(array_hash(p).encode() if isinstance(p, np.ndarray) else repr(p).encode())
+    return h.hexdigest()
+
+class ResultCache:
+    """
+    Least-recently-used store of computed results. An entry is a dict of
+    arrays (scalars and strings are stored as 0-d arrays); the oldest
+    entries are dropped once the total exceeds max_bytes.
+    """
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.hits = 0; self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key); self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        entry = {k: np.asarray(v) for k, v in entry.items() if v is not None}
+        self.entries[key] = entry; self.entries.move_to_end(key)
+        while len(self.entries) > 1 and self.nbytes() > self.max_bytes:
+            self.entries.popitem(last=False)
+        return entry
+
+    def get_or(self, key, compute):
+        """Cached entry for key, or compute() (a dict) stored under it."""
+        entry = self.get(key)
+        return entry if entry is not None else self.put(key, compute())
+
+    def nbytes(self):
+        return sum(a.nbytes for e in self.entries.values() for a in e.values())
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {"entries": len(self.entries), "bytes": self.nbytes(), "hits": self.hits, "misses": self.misses}
+
+def capture_dir(path):
+    """Capture cache directory kept next to a session file."""
+    return os.path.splitext(path)[0] + ".captures"
+
+def store_capture(matrix, directory, digest=None):
+    """Write matrix to directory/<hash>.npy unless it is already there; returns its reference."""
+    matrix = np.asarray(matrix)
+    digest = digest or array_hash(matrix)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, digest + ".npy")
+    if not os.path.exists(path):
+        tmp = os.path.join(directory, digest + ".part.npy")
+        np.save(tmp, matrix)
+        os.replace(tmp, path)
+    return {"hash": digest, "file": os.path.basename(path), "shape": list(matrix.shape), "dtype": matrix.dtype.str}
+
+def open_capture(ref, directory):
+    """Read-only memory map of a stored capture; ValueError if it does not match its reference."""
+    arr = np.load(os.path.join(directory, ref["file"]), mmap_mode="r")
+    if list(arr.shape) != list(ref["shape"]) or arr.dtype.str != ref["dtype"]:
+        raise ValueError(f"capture {ref['file']} does not match the session ({arr.shape}, {arr.dtype})")
+    return arr
+
+def save_session(path, state, capture=None, cache=None, capture_hash=None):
+    """
+    Write state (JSON-serialisable dict), the capture reference (the matrix
+    itself goes to the capture cache) and the cache entries. The file is
+    replaced atomically. Returns the capture reference or None.
+    """
+    ref = store_capture(capture, capture_dir(path), capture_hash) if capture is not None else None
+    arrays, index = {}, {}
+    for key, entry in (cache.entries.items() if cache is not None else ()):
+        index[key] = sorted(entry)
+        for name, a in entry.items(): arrays[f"cache/{key}/{name}"] = a
+    meta = {"version": VERSION, "state": state, "capture": ref, "cache": index}
+    arrays["meta"] = np.frombuffer(json.dumps(meta, default=_json_default).encode(), dtype=np.uint8)
+    tmp = path + ".part"
+    with open(tmp, "wb") as fh: np.savez(fh, **arrays)
+    os.replace(tmp, path)
+    return ref
+
+def load_session(path, cache=None):
+    """
+    Returns (state, capture, cache): capture is the memory-mapped matrix (or
+    None), cache a ResultCache filled from the file (or the one passed in).
+    A missing capture cache raises FileNotFoundError.
+    """
+    with np.load(path, allow_pickle=False) as z:
+        meta = json.loads(z["meta"].tobytes().decode())
+        if meta.get("version", 0) > VERSION:
+            raise ValueError(f"session version {meta['version']} is newer than this studio ({VERSION})")
+        cache = cache if cache is not None else ResultCache()
+        for key, names in meta["cache"].items():
+            cache.put(key, {n: z[f"cache/{key}/{n}"] for n in names})
+    ref = meta.get("capture")
+    capture = open_capture(ref, capture_dir(path)) if ref else None
+    return meta["state"], capture, cache
+
+def describe(path):
+    """One-line summary of a session file without loading its arrays."""
+    with zipfile.ZipFile(path) as zf:
+        meta = json.loads(np.load(io.BytesIO(zf.read("meta.npy"))).tobytes().decode())
+        size = sum(i.file_size for i in zf.infolist())
+    cap = meta.get("capture")
+    text = f"{os.path.basename(path)}: {len(meta['cache'])} cached results, {size / 1e6:.2f} MB"
+    if cap: text += f" | capture {cap['hash'][:8]} {tuple(cap['shape'])}"
+    return text
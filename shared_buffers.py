@@ -0,0 +1,297 @@
+"""
+Shared-memory buffers for large signal arrays exchanged between processes.
+
+The owning process (GUI, batch driver, report exporter) keeps a
+SharedBufferPool of named segments; workers receive only small handle
+dicts ({"kind": "shm", "name", "shape", "dtype", "version"}) and map the
+data instead of unpickling a copy of it.
+
+Every segment starts with a 64-byte header (magic, version, byte count).
+Overwriting a key in place bumps the version, so a worker still holding an
+older handle gets StaleBufferError instead of silently reading new data.
+Segments leased to workers (retain / release, or lease()) are never
+overwritten: a new segment is created and the old one is unlinked once its
+last lease is released.
+
+Segment names encode the owner and creator pids
+(dspbuf_<owner>_<creator>_<n>), so reap_orphans() can unlink segments left
+by a crashed owner, or published by a worker that died before its owner
+adopted them.
+
+    python shared_buffers.py list | reap
+"""
+import argparse
+import itertools
+import os
+import struct
+import sys
+import threading
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+PREFIX = "dspbuf"
+HEADER = struct.Struct("<8sQQ")
+MAGIC = b"DSPSHM01"
+DATA_OFFSET = 64
+SHARE_MIN_BYTES = 1 << 16 # smaller arrays are cheaper to pickle than to map
+SHM_DIR = "/dev/shm"
+
+class StaleBufferError(RuntimeError):
+    """The segment behind a handle has been overwritten with a newer version."""
+
+_counter = itertools.count()
+
+def _segment_name(owner):
+    return f"{PREFIX}_{owner}_{os.getpid()}_{next(_counter)}"
+
+def _parse_name(name):
+    # (owner pid, creator pid) or None for foreign segments
+    parts = name.split("_")
+    if len(parts) != 4 or parts[0] != PREFIX: return None
+    try: return int(parts[1]), int(parts[2])
+    except ValueError: return None
+
+def _pid_alive(pid):
+    try: os.kill(pid, 0)
+    except ProcessLookupError: return False
+    except PermissionError: return True
+    return True
+
+# Held while a SharedMemory is constructed: before 3.13 _attach_untracked swaps out
+# resource_tracker.register for the whole process, and a segment created by another
+# thread during the swap would go untracked
+_shm_lock = threading.Lock()
+
+def _shared_memory(**kwargs):
+    with _shm_lock: return shared_memory.SharedMemory(**kwargs)
+
+def _attach_untracked(name):
+    # Readers must not register the segment with their resource tracker, or it
+    # would be unlinked when the reader exits (track=False exists from 3.13).
+    # Not register-then-unregister: spawned workers share the owner's tracker,
+    # so unregistering there would drop the owner's registration too.
+    if sys.version_info >= (3, 13): return shared_memory.SharedMemory(name=name, track=False)
+    with _shm_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try: return shared_memory.SharedMemory(name=name)
+        finally: resource_tracker.register = register
+
+def _create(array, owner, version=1):
+    a = np.ascontiguousarray(array)
+    shm = _shared_memory(name=_segment_name(owner), create=True, size=DATA_OFFSET + max(a.nbytes, 1))
+    _write(shm, a, version)
+    return shm
+
+def _write(shm, a, version):
+    np.ndarray(a.shape, dtype=a.dtype, buffer=shm.buf, offset=DATA_OFFSET)[...] = a
+    HEADER.pack_into(shm.buf, 0, MAGIC, version, a.nbytes)
+
+def _handle(shm, a, version):
+    return {"kind": "shm", "name": shm.name, "shape": tuple(a.shape), "dtype": a.dtype.str, "version": version}
+
+def is_handle(obj):
+    return isinstance(obj, dict) and obj.get("kind") == "shm"
+
+def _check(shm, handle, check_version):
+    magic, version, _ = HEADER.unpack_from(shm.buf, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{handle['name']} is not a DSP Studio buffer")
+    if check_version and version != handle["version"]:
+        raise StaleBufferError(f"{handle['name']}: handle v{handle['version']}, buffer now v{version}")
+
+@contextmanager
+def open_buffer(handle, check_version=True):
+    """Zero-copy view of a handle's data, valid inside the with-block only."""
+    shm = _attach_untracked(handle["name"])
+    try:
+        _check(shm, handle, check_version)
+        arr = np.ndarray(handle["shape"], dtype=handle["dtype"], buffer=shm.buf, offset=DATA_OFFSET)
+        arr.flags.writeable = False
+        yield arr
+        del arr
+    finally:
+        try: shm.close()
+        except BufferError: pass # caller kept a view; the mapping goes with it
+
+def fetch(handle, check_version=True):
+    """Private copy of a handle's data (one memcpy, no pickling)."""
+    with open_buffer(handle, check_version) as arr:
+        return np.array(arr)
+
+def publish(array, owner):
+    """
+    Worker side: put a result into a new segment for the owner pid to adopt().
+    If the worker dies before the owner adopts it, reap_orphans() removes it.
+    """
+    a = np.ascontiguousarray(array)
+    shm = _create(a, owner)
+    handle = _handle(shm, a, 1)
+    # Ownership passes to the adopting pool; until then only reap_orphans() may unlink it
+    resource_tracker.unregister(shm._name, "shared_memory")
+    shm.close()
+    return handle
+
+def resolve(obj):
+    """Replace every handle in a dict / list / tuple tree with a copy of its data."""
+    if is_handle(obj): return fetch(obj)
+    if isinstance(obj, dict): return {k: resolve(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)): return type(obj)(resolve(v) for v in obj)
+    return obj
+
+def list_segments():
+    """Names of all DSP Studio segments on this machine (POSIX shm only)."""
+    if not os.path.isdir(SHM_DIR): return []
+    return sorted(n for n in os.listdir(SHM_DIR) if _parse_name(n) is not None)
+
+def _unlink(name):
+    try:
+        shm = _shared_memory(name=name)
+    except FileNotFoundError:
+        return False
+    shm.close(); shm.unlink()
+    return True
+
+def reap_orphans(owner=None, keep=()):
+    """
+    Unlink segments whose owner process is gone and, for `owner`, segments
+    published by dead workers that are not in `keep`. Returns the names
+    removed. On platforms without /dev/shm the OS frees segments when their
+    last handle closes, so there is nothing to reap.
+    """
+    removed = []
+    for name in list_segments():
+        own, creator = _parse_name(name)
+        dead_owner = not _pid_alive(own)
+        dead_worker = own == owner and creator != owner and name not in keep and not _pid_alive(creator)
+        if (dead_owner or dead_worker) and _unlink(name): removed.append(name)
+    return removed
+
+class SharedBufferPool:
+    """
+    Owner-side registry of named shared-memory blocks.
+    put(key, array) returns a handle to send to workers; retain / release
+    (or `with pool.lease(key) as handle`) count the workers using a block.
+    close() unlinks everything; the pool is also a context manager.
+    """
+    def __init__(self):
+        self.owner = os.getpid()
+        self.lock = threading.Lock()
+        self.current = {} # key -> handle of the newest version
+        self.segments = {} # segment name -> {"shm", "refs", "retired"}
+
+    def put(self, key, array):
+        a = np.ascontiguousarray(array)
+        with self.lock:
+            old = self.current.get(key)
+            version = old["version"] + 1 if old else 1
+            seg = self.segments.get(old["name"]) if old else None
+            if seg is not None and seg["refs"] == 0 and seg["shm"].size >= DATA_OFFSET + a.nbytes:
+                _write(seg["shm"], a, version) # in place: stale handles see the new version number
+                shm = seg["shm"]
+            else:
+                if seg is not None: self._retire(old["name"])
+                shm = _create(a, self.owner, version)
+                self.segments[shm.name] = {"shm": shm, "refs": 0, "retired": False}
+            self.current[key] = _handle(shm, a, version)
+            return dict(self.current[key])
+
+    def handle(self, key):
+        with self.lock: return dict(self.current[key])
+
+    def array(self, key):
+        """Owner's own (writable) view of the newest version of key."""
+        with self.lock:
+            h = self.current[key]
+            return np.ndarray(h["shape"], dtype=h["dtype"], buffer=self.segments[h["name"]]["shm"].buf, offset=DATA_OFFSET)
+
+    def adopt(self, key, handle):
+        """Take ownership of a segment a worker created with publish()."""
+        shm = _shared_memory(name=handle["name"])
+        _check(shm, handle, True)
+        with self.lock:
+            old = self.current.get(key)
+            if old: self._retire(old["name"])
+            version = old["version"] + 1 if old else 1
+            HEADER.pack_into(shm.buf, 0, MAGIC, version, int(np.prod(handle["shape"])) * np.dtype(handle["dtype"]).itemsize)
+            self.segments[shm.name] = {"shm": shm, "refs": 0, "retired": False}
+            self.current[key] = dict(handle, version=version)
+            return dict(self.current[key])
+
+    def retain(self, handle):
+        with self.lock: self.segments[handle["name"]]["refs"] += 1
+
+    def release(self, handle):
+        with self.lock:
+            seg = self.segments.get(handle["name"])
+            if seg is None: return
+            seg["refs"] -= 1
+            if seg["retired"] and seg["refs"] <= 0: self._unlink(handle["name"])
+
+    @contextmanager
+    def lease(self, key):
+        h = self.handle(key); self.retain(h)
+        try: yield h
+        finally: self.release(h)
+
+    def share(self, obj, prefix=""):
+        """Copy of a dict / list tree with every large ndarray replaced by a handle."""
+        if isinstance(obj, np.ndarray) and obj.nbytes >= SHARE_MIN_BYTES: return self.put(prefix or "_", obj)
+        if isinstance(obj, dict): return {k: self.share(v, f"{prefix}/{k}") for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)): return type(obj)(self.share(v, f"{prefix}/{i}") for i, v in enumerate(obj))
+        return obj
+
+    def drop(self, key):
+        with self.lock:
+            h = self.current.pop(key, None)
+            if h: self._retire(h["name"])
+
+    def _retire(self, name):
+        seg = self.segments.get(name)
+        if seg is None: return
+        seg["retired"] = True
+        if seg["refs"] <= 0: self._unlink(name)
+
+    def _unlink(self, name):
+        seg = self.segments.pop(name)
+        seg["shm"].close()
+        try: seg["shm"].unlink()
+        except FileNotFoundError: pass
+
+    def reap(self):
+        """Remove segments of crashed workers (and of dead owners) that this pool does not hold."""
+        with self.lock: keep = set(self.segments)
+        return reap_orphans(self.owner, keep)
+
+    def stats(self):
+        with self.lock:
+            return {"keys": len(self.current), "segments": len(self.segments),
+                    "bytes": sum(s["shm"].size for s in self.segments.values()),
+                    "leased": sum(s["refs"] > 0 for s in self.segments.values())}
+
+    def close(self):
+        with self.lock:
+            for name in list(self.segments): self._unlink(name)
+            self.current.clear()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Inspect or clean up DSP Studio shared-memory segments.")
+    ap.add_argument("action", choices=["list", "reap"])
+    args = ap.parse_args(argv)
+    if args.action == "list":
+        for name in list_segments():
+            own, creator = _parse_name(name)
+            size = os.path.getsize(os.path.join(SHM_DIR, name))
+            print(f"{name}  {size/1e6:.2f} MB  owner {'alive' if _pid_alive(own) else 'DEAD'}"
+                  f"  creator {'alive' if _pid_alive(creator) else 'dead'}")
+    else:
+        removed = reap_orphans()
+        print(f"removed {len(removed)} orphaned segment(s)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
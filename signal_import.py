@@ -0,0 +1,187 @@
+import numpy as np
+import precision
+
+CHUNK_ROWS = 1_000_000
+RESAMPLE_METHODS = ["None", "Linear", "Cubic", "Nearest"]
+SPLINE_HALO = 32 # input samples either side of a chunk for UniformResampler's local cubic spline
+
+def iter_csv_chunks(path, skiprows=1, chunk_rows=CHUNK_ROWS, dtype=float, usecols=None):
+    """Yield a numeric CSV as successive 2D blocks of at most chunk_rows rows (optionally only usecols)."""
+    with open(path, "r") as fh:
+        for _ in range(skiprows): fh.readline()
+        while True:
+            block = np.loadtxt(fh, delimiter=",", max_rows=chunk_rows, ndmin=2, dtype=dtype, usecols=usecols)
+            if block.size == 0: break
+            yield block
+            if block.shape[0] < chunk_rows: break
+
+def load_csv(path, skiprows=1, chunk_rows=CHUNK_ROWS, dtype=float):
+    """
+    Read a numeric CSV in row chunks so very large captures never need a
+    second full-size temporary. Returns a 2D array of dtype.
+    """
+    blocks = list(iter_csv_chunks(path, skiprows, chunk_rows, dtype))
+    if not blocks: return np.zeros((0, 0), dtype=dtype)
+    return blocks[0] if len(blocks) == 1 else np.vstack(blocks)
+
+def load_timed_csv(path, skiprows=1, chunk_rows=CHUNK_ROWS, dtype=float):
+    """
+    Read a CSV whose first column is a timestamp. Timestamps stay float64
+    (float32 cannot resolve sample intervals of long captures); the data
+    columns are cast to dtype chunk by chunk. Returns (t, data).
+    """
+    ts, cols = [], []
+    for block in iter_csv_chunks(path, skiprows, chunk_rows):
+        ts.append(block[:, 0]); cols.append(block[:, 1:].astype(dtype))
+    if not ts: return np.zeros(0), np.zeros((0, 0), dtype=dtype)
+    return np.concatenate(ts), np.vstack(cols)
+
+def _chunks(n, chunk_rows):
+    for start in range(0, n, chunk_rows):
+        # Overlap by one sample so intervals across chunk boundaries are counted once
+        yield start, min(n, start + chunk_rows + 1)
+
+def analyze_timestamps(t, chunk_rows=CHUNK_ROWS, gap_factor=1.5):
+    """
+    Whole-column timing analysis, vectorized per chunk.
+    Pass 1 takes the median interval of each chunk and uses the median of
+    those as a robust nominal period (immune to gaps and outliers).
+    Pass 2 accumulates gap, duplicate/backwards-step and jitter statistics
+    relative to that period. Returns a dict of stats; fs is 1/period.
+    """
+    t = np.asarray(t, dtype=float)
+    n = len(t)
+    if n < 2:
+        return {"n": n, "fs": 0.0, "period": 0.0, "gaps": 0, "missing": 0, "non_monotonic": 0,
+                "jitter_rms": 0.0, "jitter_peak": 0.0, "duration": 0.0, "uniform": True}
+    medians = []
+    for a, b in _chunks(n, chunk_rows):
+        dt = np.diff(t[a:b]); dt = dt[dt > 0]
+        if len(dt): medians.append(np.median(dt))
+    period = float(np.median(medians)) if medians else 0.0
+    if period <= 0:
+        return {"n": n, "fs": 0.0, "period": 0.0, "gaps": 0, "missing": 0, "non_monotonic": n - 1,
+                "jitter_rms": 0.0, "jitter_peak": 0.0, "duration": float(t[-1] - t[0]), "uniform": False}
+
+    gaps = missing = non_mono = 0
+    sq_sum = 0.0; peak = 0.0; count = 0; largest_gap = 0.0
+    for a, b in _chunks(n, chunk_rows):
+        dt = np.diff(t[a:b])
+        bad = dt <= 0
+        non_mono += int(np.count_nonzero(bad))
+        gap_mask = dt > gap_factor * period
+        gaps += int(np.count_nonzero(gap_mask))
+        if np.any(gap_mask):
+            missing += int(np.sum(np.round(dt[gap_mask] / period) - 1))
+            largest_gap = max(largest_gap, float(np.max(dt[gap_mask])))
+        dev = dt[~(bad | gap_mask)] - period
+        if len(dev):
+            sq_sum += float(np.dot(dev, dev)); count += len(dev)
+            peak = max(peak, float(np.max(np.abs(dev))))
+    jitter_rms = np.sqrt(sq_sum / count) if count else 0.0
+    return {"n": n, "fs": 1.0 / period, "period": period, "gaps": gaps, "missing": missing,
+            "largest_gap": largest_gap, "non_monotonic": non_mono,
+            "jitter_rms": float(jitter_rms), "jitter_peak": peak, "duration": float(t[-1] - t[0]),
+            "uniform": gaps == 0 and non_mono == 0 and jitter_rms < 0.01 * period}
+
+def clean_timestamps(t, data):
+    """Drop backwards / duplicate timestamps (keeps the first sample of each time) and sort."""
+    order = np.argsort(t, kind="stable")
+    t_sorted = t[order]
+    keep = np.concatenate([[True], np.diff(t_sorted) > 0])
+    return t_sorted[keep], data[order][keep]
+
+def resample_uniform(t, data, fs, method="Linear", chunk_rows=CHUNK_ROWS):
+    """
+    Resample (n, channels) data sampled at times t onto a uniform grid at fs.
+    method: "Linear" (np.interp), "Cubic" (CubicSpline, all channels at once)
+    or "Nearest" (searchsorted). The output grid is evaluated in chunks and
+    keeps the floating dtype of data. Returns (t_uniform, data_uniform).
+    """
+    t = np.asarray(t, dtype=float); data = np.asarray(data, dtype=precision.float_dtype(data))
+    flat = data.ndim == 1
+    d2 = data[:, None] if flat else data
+    t, d2 = clean_timestamps(t, d2)
+    n_out = int(np.floor((t[-1] - t[0]) * fs + 1e-9)) + 1
+    grid = t[0] + np.arange(n_out) / fs
+    out = np.empty((n_out, d2.shape[1]), dtype=d2.dtype)
+    spline = None
+    if method == "Cubic":
+        from scipy.interpolate import CubicSpline
+        spline = CubicSpline(t, d2, axis=0)
+    for a in range(0, n_out, chunk_rows):
+        g = grid[a:a + chunk_rows]
+        out[a:a + len(g)] = _interpolate(t, d2, g, method, spline)
+    return grid, (out[:, 0] if flat else out)
+
+def _interpolate(t, d2, g, method, spline=None):
+    if method == "Cubic":
+        return spline(g)
+    if method == "Nearest":
+        idx = np.clip(np.searchsorted(t, g), 1, len(t) - 1)
+        idx -= (g - t[idx - 1]) < (t[idx] - g)
+        return d2[idx]
+    return np.column_stack([np.interp(g, t, d2[:, c]) for c in range(d2.shape[1])])
+
+class UniformResampler:
+    """
+    resample_uniform for files read block by block: process(t, data) takes
+    successive (rows,) / (rows, channels) blocks in file order and returns
+    the grid rows whose neighbours have arrived; flush() returns the rest.
+    Memory is bounded by one block. Timestamps that do not advance past the
+    last kept one are dropped in file order (resample_uniform sorts the
+    whole column instead), and "Cubic" fits a local spline over
+    SPLINE_HALO samples either side of each block, which matches the
+    global spline to rounding away from the file ends.
+    """
+    def __init__(self, fs, method="Linear"):
+        self.fs = fs; self.method = method
+        self.halo = SPLINE_HALO if method == "Cubic" else 1
+        self.t = np.zeros(0); self.d = None; self.t0 = None; self.k = 0
+
+    def process(self, t, data, final=False):
+        t = np.asarray(t, dtype=float); data = np.asarray(data, dtype=precision.float_dtype(data))
+        d2 = data[:, None] if data.ndim == 1 else data
+        if self.d is None: self.d = d2[:0]
+        t = np.concatenate([self.t, t]); d2 = np.concatenate([self.d, d2])
+        keep = t > np.maximum.accumulate(np.concatenate([[-np.inf], t[:-1]]))
+        t, d2 = t[keep], d2[keep]
+        if len(t) == 0: return d2[:0]
+        if self.t0 is None: self.t0 = t[0]
+        limit = t[-1] if final else t[len(t) - 1 - self.halo] if len(t) > self.halo else -np.inf
+        n_end = int(np.floor((limit - self.t0) * self.fs + 1e-9)) + 1 if limit >= self.t0 else 0
+        g = self.t0 + np.arange(self.k, n_end) / self.fs
+        out = d2[:0]
+        if len(g) and len(t) > 1:
+            lo = max(int(np.searchsorted(t, g[0])) - 1 - (self.halo if self.method == "Cubic" else 0), 0)
+            spline = None
+            if self.method == "Cubic":
+                from scipy.interpolate import CubicSpline
+                spline = CubicSpline(t[lo:], d2[lo:], axis=0)
+            out = _interpolate(t[lo:], d2[lo:], g, self.method, spline).astype(d2.dtype, copy=False)
+        elif len(g):
+            out = d2[:1].repeat(len(g), axis=0)
+        self.k = max(self.k, n_end)
+        # Carry the samples the next grid point (and the spline halo) still needs
+        nxt = self.t0 + self.k / self.fs
+        start = max(int(np.searchsorted(t, nxt)) - 1 - (self.halo if self.method == "Cubic" else 0), 0)
+        self.t, self.d = t[start:], d2[start:]
+        return out
+
+    def flush(self):
+        if self.d is None: return np.zeros((0, 0))
+        return self.process(np.zeros(0), self.d[:0], final=True)
+
+def import_summary(stats, method, n_out=None):
+    """Human-readable summary of the timing analysis and what resampling changed."""
+    lines = [f"Fs {stats['fs']:.3f} Hz (median dt {stats['period']*1e3:.4f} ms), {stats['n']} samples, {stats['duration']:.3f} s"]
+    lines.append(f"Jitter RMS {stats['jitter_rms']*1e6:.1f} us / peak {stats['jitter_peak']*1e6:.1f} us")
+    if stats["gaps"]:
+        lines.append(f"Gaps: {stats['gaps']} (~{stats['missing']} dropped samples, largest {stats.get('largest_gap', 0)*1e3:.2f} ms)")
+    if stats["non_monotonic"]:
+        lines.append(f"Non-monotonic timestamps: {stats['non_monotonic']}" + (" (removed)" if method != "None" else ""))
+    if method == "None":
+        lines.append("Resampling off: samples assumed uniform" + ("" if stats["uniform"] else " (WARNING: timing is not uniform)"))
+    elif n_out is not None:
+        lines.append(f"Resampled ({method}) to uniform grid: {stats['n']} -> {n_out} samples")
+    return "\n".join(lines)
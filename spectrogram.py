@@ -0,0 +1,75 @@
+import numpy as np
+from scipy import fft as sp_fft
+from scipy.signal import get_window
+
+DB_FLOOR = 1e-12
+
+def _frames_db(frames, win, scale):
+    # Windowed power spectra of a (n_frames, nfft) block, in dB, one column per frame
+    spec = sp_fft.rfft(frames * win, axis=1)
+    power = (spec.real ** 2 + spec.imag ** 2) * scale
+    return (10 * np.log10(np.maximum(power, DB_FLOOR))).T
+
+class StftRing:
+    """
+    Fixed-size ring buffer of STFT columns for a scrolling waterfall.
+    push() windows and transforms only the frames completed by the new
+    samples; the partial frame tail is carried to the next call. The ring
+    holds n_cols columns of nfft//2 + 1 bins in dB.
+    """
+    def __init__(self, nfft=256, hop=128, n_cols=200, window="hann", dtype=np.float64):
+        self.nfft = nfft; self.hop = hop; self.n_cols = n_cols
+        self.dtype = np.dtype(dtype)
+        self.win = get_window(window, nfft).astype(self.dtype)
+        self.scale = 2.0 / np.sum(self.win) ** 2
+        self.buf = np.full((nfft // 2 + 1, n_cols), 10 * np.log10(DB_FLOOR), dtype=self.dtype)
+        self.head = 0; self.count = 0
+        self.tail = np.zeros(0, dtype=self.dtype)
+
+    def reset(self):
+        self.buf.fill(10 * np.log10(DB_FLOOR)); self.head = 0; self.count = 0
+        self.tail = np.zeros(0, dtype=self.dtype)
+
+    def push(self, x):
+        """Append samples; returns the number of new STFT columns written."""
+        data = np.concatenate([self.tail, np.asarray(x, dtype=self.dtype)])
+        n_new = 0 if len(data) < self.nfft else (len(data) - self.nfft) // self.hop + 1
+        if n_new:
+            frames = np.lib.stride_tricks.sliding_window_view(data, self.nfft)[::self.hop][:n_new]
+            # Only the newest n_cols frames can survive in the ring
+            cols = _frames_db(frames[-self.n_cols:], self.win, self.scale)
+            idx = (self.head + np.arange(cols.shape[1])) % self.n_cols
+            self.buf[:, idx] = cols
+            self.head = (self.head + cols.shape[1]) % self.n_cols
+            self.count = min(self.n_cols, self.count + n_new)
+        self.tail = data[n_new * self.hop:]
+        return n_new
+
+    def image(self):
+        """Ring contents in time order (oldest column first)."""
+        return np.concatenate([self.buf[:, self.head:], self.buf[:, :self.head]], axis=1)
+
+def overview(x, fs, nfft=256, max_cols=400, frames_per_col=4, window="hann"):
+    """
+    Decimated spectrogram of a long signal with at most max_cols columns.
+    Each column covers an equal slice of the record and averages the power
+    of up to frames_per_col evenly spaced frames inside it, so the cost is
+    bounded by max_cols * frames_per_col FFTs regardless of length.
+    Returns (image_db, t_edges) with image_db shaped (nfft//2 + 1, n_cols).
+    """
+    x = np.asarray(x); dtype = x.dtype if np.issubdtype(x.dtype, np.floating) else np.float64
+    nfft = min(nfft, len(x))
+    win = get_window(window, nfft).astype(dtype)
+    scale = 2.0 / np.sum(win) ** 2
+    span = len(x) - nfft
+    n_cols = max(1, min(max_cols, span // max(1, nfft // 2) + 1))
+    edges = np.linspace(0, span, n_cols + 1)
+    k = frames_per_col if span // n_cols >= nfft // 2 else 1
+    # Start offsets: k frames spread across each column's slice
+    starts = (edges[:-1, None] + (edges[1:, None] - edges[:-1, None]) * (np.arange(k) + 0.5) / k).astype(int).ravel()
+    starts = np.clip(starts, 0, span)
+    frames = np.lib.stride_tricks.sliding_window_view(x.astype(dtype, copy=False), nfft)[starts]
+    spec = sp_fft.rfft(frames * win, axis=1)
+    power = ((spec.real ** 2 + spec.imag ** 2) * scale).reshape(n_cols, k, -1).mean(axis=1)
+    img = 10 * np.log10(np.maximum(power, DB_FLOOR)).T
+    return img, (edges + nfft / 2) / fs
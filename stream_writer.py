@@ -0,0 +1,187 @@
+"""
+Chunked export of filtered signals.
+
+StreamWriter appends (rows, channels) blocks to one of:
+
+    npy   NumPy .npy, float32. The header is written first with room for the
+          final shape and patched on close, so rows stream straight to disk.
+    f32   raw little-endian float32, channel-interleaved
+    i16   raw little-endian int16 scaled by full_scale (clipped samples are counted)
+    csv   text, one row per sample
+
+export_signal() drives a capture (array, memmap or iterator of blocks)
+through a stage list block by block with pipeline.PipelineStream, writing
+the final output and optionally every stage's output. In causal mode
+memory stays at a few blocks whatever the capture size; zero-phase mode
+needs the whole record (filtfilt) and is written in chunks afterwards.
+
+    python stream_writer.py spec.json capture.npy -o filtered.npy --stages
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pipeline
+
+FORMATS = {"npy": ".npy", "f32": ".f32", "i16": ".i16", "csv": ".csv"}
+BLOCK = 65536
+NPY_HEADER = 128 # bytes reserved for the .npy preamble + header dict (multiple of 64)
+
+def _npy_header(rows, channels, dtype):
+    shape = (rows,) if channels is None else (rows, channels)
+    d = "{'descr': '%s', 'fortran_order': False, 'shape': %r, }" % (np.dtype(dtype).str, shape)
+    pad = NPY_HEADER - 10 - len(d) - 1
+    if pad < 0: raise ValueError("shape does not fit the reserved .npy header")
+    return b"\x93NUMPY\x01\x00" + np.uint16(NPY_HEADER - 10).astype("<u2").tobytes() + (d + " " * pad + "\n").encode("latin1")
+
+class StreamWriter:
+    """
+    Block-wise writer for one output file. write() accepts (rows,) or
+    (rows, channels) blocks; close() finalises the file and returns the
+    stats dict (rows, bytes, seconds spent writing, MB/s, clipped).
+    names: CSV column header. full_scale: value mapped to int16 full scale.
+    """
+    def __init__(self, path, fmt="npy", names=None, full_scale=1.0):
+        if fmt not in FORMATS: raise ValueError(f"unknown format {fmt!r} (use one of {', '.join(FORMATS)})")
+        self.path = path; self.fmt = fmt; self.names = names; self.full_scale = full_scale
+        self.rows = 0; self.channels = None; self.clipped = 0; self.seconds = 0.0
+        self.fh = open(path, "w" if fmt == "csv" else "wb")
+        if fmt == "npy": self.fh.write(_npy_header(0, 1, "<f4")) # placeholder, patched in close()
+        if fmt == "csv" and names: self.fh.write(",".join(names) + "\n")
+
+    def write(self, block):
+        block = np.asarray(block)
+        if block.size == 0: return
+        t0 = time.perf_counter()
+        if block.ndim == 1: block = block[:, None]
+        if self.channels is None: self.channels = block.shape[1]
+        elif block.shape[1] != self.channels:
+            raise ValueError(f"block has {block.shape[1]} channels, file has {self.channels}")
+        if self.fmt == "csv":
+            np.savetxt(self.fh, block, delimiter=",", fmt="%.7g")
+        elif self.fmt == "i16":
+            q = np.rint(block * (32767.0 / self.full_scale))
+            self.clipped += int(np.count_nonzero((q > 32767) | (q < -32768)))
+            self.fh.write(np.clip(q, -32768, 32767).astype("<i2").tobytes())
+        else:
+            self.fh.write(np.ascontiguousarray(block, dtype="<f4").tobytes())
+        self.rows += block.shape[0]
+        self.seconds += time.perf_counter() - t0
+
+    def close(self):
+        if self.fh is None: return self.stats()
+        if self.fmt == "npy":
+            self.fh.seek(0)
+            self.fh.write(_npy_header(self.rows, None if self.channels in (None, 1) else self.channels, "<f4"))
+        self.fh.close(); self.fh = None
+        return self.stats()
+
+    def stats(self):
+        size = os.path.getsize(self.path)
+        return {"path": self.path, "format": self.fmt, "rows": self.rows, "channels": self.channels or 0,
+                "bytes": size, "seconds": self.seconds, "mb_per_s": size / 1e6 / max(self.seconds, 1e-9),
+                "clipped": self.clipped}
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+def stage_path(path, index):
+    """Path of stage `index` (1-based) next to the final output: out.npy -> out_stage1.npy."""
+    base, ext = os.path.splitext(path)
+    return f"{base}_stage{index}{ext}"
+
+def _blocks(x, block_size):
+    # Arrays / memmaps are sliced lazily; anything else is taken as an iterator of blocks
+    if isinstance(x, np.ndarray):
+        for i in range(0, x.shape[0], block_size): yield x[i:i + block_size]
+    else:
+        yield from x
+
+def _as_rows(block):
+    block = np.asarray(block)
+    return block[:, None] if block.ndim == 1 else block
+
+def export_signal(x, stages, fs, path, fmt="npy", block_size=BLOCK, zero_phase=False, intermediate=False,
+                  dtype=None, names=None, full_scale=1.0, progress=None):
+    """
+    Filter x (samples,) or (samples, channels) through stages and stream the
+    result to path. intermediate=True also writes each stage's own output
+    to stage_path(path, i) (stages are then run unfused so every tap
+    exists). progress(samples_done) is called after each block. Returns
+    {"outputs": [writer stats], "samples", "seconds", "samples_per_s", "mb_per_s"}.
+    """
+    t0 = time.perf_counter()
+    dt = np.dtype(float if dtype is None else dtype)
+    plans = [pipeline.build_pipeline([st], fs) for st in stages] if intermediate else [pipeline.build_pipeline(stages, fs)]
+    paths = [stage_path(path, i + 1) for i in range(len(plans) - 1)] + [path] if intermediate else [path]
+    writers = [StreamWriter(p, fmt, names, full_scale) for p in paths]
+    n_in = 0
+    try:
+        if zero_phase:
+            # filtfilt needs the whole record; chunking applies to the writing only
+            data = np.vstack([_as_rows(b) for b in _blocks(x, block_size)]).astype(dt)
+            n_in = data.shape[0]
+            cur = data
+            for plan, w in zip(plans, writers):
+                cur = pipeline.run_pipeline(plan, cur.T, zero_phase=True, dtype=dt).T
+                for i in range(0, cur.shape[0], block_size): w.write(cur[i:i + block_size])
+            if progress: progress(n_in)
+        else:
+            streams = None
+            for block in _blocks(x, block_size):
+                block = _as_rows(block).astype(dt, copy=False)
+                if streams is None: streams = [[pipeline.PipelineStream(p, dt) for _ in range(block.shape[1])] for p in plans]
+                cur = block
+                for chans, w in zip(streams, writers):
+                    cur = np.column_stack([st.process(cur[:, c]) for c, st in enumerate(chans)])
+                    w.write(cur)
+                n_in += block.shape[0]
+                if progress: progress(n_in)
+            # Drain in order: each stage's tail also passes through the stages after it
+            pending = None
+            for chans, w in zip(streams or [], writers):
+                cols = [np.concatenate([st.process(pending[:, c] if pending is not None else np.zeros(0, dt)), st.flush()])
+                        for c, st in enumerate(chans)]
+                pending = np.column_stack(cols).astype(dt, copy=False)
+                w.write(pending)
+    finally:
+        outputs = [w.close() for w in writers]
+    wall = max(time.perf_counter() - t0, 1e-9)
+    return {"outputs": outputs, "samples": n_in, "seconds": wall, "samples_per_s": n_in / wall,
+            "mb_per_s": sum(o["bytes"] for o in outputs) / 1e6 / wall}
+
+def summary(result):
+    """Human-readable lines for an export_signal() result."""
+    lines = [f"{result['samples']} samples in {result['seconds']:.2f} s: {result['samples_per_s'] / 1e6:.2f} MS/s, "
+             f"{result['mb_per_s']:.1f} MB/s written"]
+    for o in result["outputs"]:
+        line = f"  {os.path.basename(o['path'])}: {o['rows']} x {o['channels']} ({o['bytes'] / 1e6:.2f} MB, {o['mb_per_s']:.0f} MB/s)"
+        if o["clipped"]: line += f", {o['clipped']} samples clipped"
+        lines.append(line)
+    return "\n".join(lines)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Stream a capture through a pipeline spec into .npy / raw / CSV.")
+    ap.add_argument("spec", help="Pipeline spec JSON (File > Save Pipeline Spec in the studio)")
+    ap.add_argument("input", help=".npy capture (memory-mapped) or a raw-ADC text/CSV file")
+    ap.add_argument("-o", "--output", required=True)
+    ap.add_argument("--format", choices=list(FORMATS), default=None, help="Default: from the output extension, else npy")
+    ap.add_argument("--fs", type=float, default=None, help="Sampling rate (default: the spec's)")
+    ap.add_argument("--block", type=int, default=BLOCK, help="Samples per block")
+    ap.add_argument("--stages", action="store_true", help="Also write every stage's output (<output>_stageN)")
+    ap.add_argument("--full-scale", type=float, default=1.0, help="Value written as int16 full scale (i16 only)")
+    args = ap.parse_args(argv)
+    spec = pipeline.load_spec(args.spec)
+    fmt = args.format or next((f for f, ext in FORMATS.items() if args.output.endswith(ext)), "npy")
+    if args.input.endswith(".npy"):
+        x = np.load(args.input, mmap_mode="r")
+    else:
+        import signal_import
+        x = (b[:, 0] for b in signal_import.iter_csv_chunks(args.input, skiprows=0, chunk_rows=args.block))
+    res = export_signal(x, spec["stages"], args.fs or spec["fs"], args.output, fmt, args.block,
+                        zero_phase=spec.get("zero_phase", False), intermediate=args.stages, full_scale=args.full_scale)
+    print(summary(res))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
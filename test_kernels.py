@@ -0,0 +1,71 @@
+"""
+Parity of the recursive-kernel backends (kernels.py): every available
+backend against the plain-Python reference, and the biquad kernel and the
+pipeline's SOS stream built on it against scipy.
+
+    python -m pytest test_kernels.py
+"""
+import unittest
+import numpy as np
+from scipy import signal
+import kernels
+import latency
+import pipeline
+
+RTOL = 1e-9
+
+class BackendParity(unittest.TestCase):
+    def test_every_backend_matches_reference(self):
+        rng = np.random.default_rng(1)
+        for kernel in kernels.KERNELS:
+            args = kernels._sample_args(kernel, 5000, rng)
+            ref = kernels._copy_args(args); kernels.KERNELS[kernel]["numpy"](*ref)
+            scale = max(max(float(np.max(np.abs(r))) for r in ref if isinstance(r, np.ndarray)), 1.0)
+            for b in kernels.available(kernel):
+                with self.subTest(kernel=kernel, backend=b):
+                    out = kernels._copy_args(args); kernels.KERNELS[kernel][b](*out)
+                    for o, r in zip(out, ref):
+                        if isinstance(o, np.ndarray): np.testing.assert_allclose(o, r, rtol=0, atol=RTOL * scale)
+
+    def test_force_pins_backend(self):
+        try:
+            for b in kernels.available("biquad"):
+                kernels.force(b)
+                self.assertEqual(kernels.backend("biquad"), b)
+        finally:
+            kernels.force(None)
+
+    def test_warm_up_selects_every_kernel(self):
+        kernels.warm_up().join()
+        for kernel in kernels.KERNELS: self.assertIn(kernels.backend(kernel), kernels.available(kernel))
+
+class ScipyParity(unittest.TestCase):
+    def setUp(self):
+        self.x = np.random.default_rng(2).standard_normal(3000) + 0.5
+        self.sos = signal.butter(6, [0.05, 0.3], btype="bandpass", output="sos")
+
+    def test_biquad_matches_sosfilt(self):
+        for b in kernels.available("biquad"):
+            with self.subTest(backend=b):
+                kernels.force(b)
+                try:
+                    y = kernels.biquad(self.sos, self.x, np.zeros(2 * len(self.sos)))
+                    y0 = kernels.biquad(self.sos, self.x, kernels.biquad_zi(self.sos) * self.x[0])
+                finally:
+                    kernels.force(None)
+                np.testing.assert_allclose(y, signal.sosfilt(self.sos, self.x), atol=1e-10)
+                np.testing.assert_allclose(y0, latency.causal_sosfilt(self.sos, self.x), atol=1e-10)
+
+    def test_sos_stream_matches_causal_sosfilt(self):
+        ref = latency.causal_sosfilt(self.sos, self.x)
+        for b in kernels.available("biquad"): # "numpy" runs the stream on sosfilt itself
+            with self.subTest(backend=b):
+                kernels.force(b)
+                try:
+                    y = pipeline.stream_pipeline([{"kind": "sos", "sos": self.sos}], self.x, block_size=700)
+                finally:
+                    kernels.force(None)
+                np.testing.assert_allclose(y, ref, atol=1e-10)
+
+if __name__ == "__main__":
+    unittest.main()